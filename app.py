@@ -2,11 +2,15 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import random
-from optimizer import optimize_schedule_lp, format_schedule_readable
-from train_agent_with_preferences import train_agent_with_preferences, run_agent_with_preferences, calculate_comfort_score
 from fetch_live_prices import fetch_comed_prices
+from price_forecast import forecast_frame
 from utils.appliance_data import appliance_defaults
+from utils.lazy_imports import warm_up
+from jobs import OptimizationJob
+from metrics import span
+from comfort import PRESETS
 from datetime import datetime
+import time
 
 # -------------------------------
 # Page setup
@@ -67,19 +71,30 @@ if 'df_prices' not in st.session_state:
 
 df_prices = st.session_state.df_prices
 
+use_forecast = st.toggle(
+    "Schedule against forecast prices",
+    value=False,
+    help="Forecast the next 24 hours from the local ComEd price history instead of using the past 24 hours"
+)
+if use_forecast:
+    try:
+        with span("price_forecast"):
+            df_prices = forecast_frame(24)
+    except ValueError as e:
+        st.warning(f"Forecast unavailable ({e}). Showing the past 24 hours instead.")
+
 # -------------------------------
 # Professional Price Chart
 # -------------------------------
-st.subheader("Day-Ahead Electricity Prices")
-st.caption("All times shown in **Central Time (CT)** - ComEd service area")
-
-if df_prices is not None and not df_prices.empty:
+@st.cache_resource(max_entries=16)
+def build_price_figure(times, price_values):
+    """Plotly price chart, built once per distinct price series and shared across sessions."""
     # Create professional Plotly chart
     fig = go.Figure()
 
     fig.add_trace(go.Scatter(
-        x=df_prices['time'],
-        y=df_prices['price'],
+        x=times,
+        y=price_values,
         mode='lines+markers',
         name='Price',
         line=dict(color='#1f77b4', width=3),
@@ -114,7 +129,7 @@ if df_prices is not None and not df_prices.empty:
     )
 
     # Add horizontal line for average price
-    avg_price = df_prices['price'].mean()
+    avg_price = sum(price_values) / len(price_values)
     fig.add_hline(
         y=avg_price,
         line_dash="dash",
@@ -153,6 +168,15 @@ if df_prices is not None and not df_prices.empty:
     fig.update_xaxes(fixedrange=True)
     fig.update_yaxes(fixedrange=True)
 
+    return fig
+
+st.subheader("Day-Ahead Electricity Prices")
+st.caption("All times shown in **Central Time (CT)** - ComEd service area")
+
+if df_prices is not None and not df_prices.empty:
+    fig = build_price_figure(tuple(df_prices['time']), tuple(df_prices['price']))
+    avg_price = df_prices['price'].mean()
+
     st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
 
     # Stats below chart
@@ -296,258 +320,152 @@ st.divider()
 st.markdown("### User Comfort Preferences")
 st.caption("Gray buttons are restricted hours (unavailable). Click blue/white buttons to set preferences.")
 
-preferences = {}
-
 if 'preference_selections' not in st.session_state:
     st.session_state.preference_selections = {}
 
-# Quick preset buttons at top
-st.markdown("**Quick Presets:**")
-preset_col1, preset_col2, preset_col3, preset_col4 = st.columns(4)
+def empty_selection():
+    return {'avoid': set(), 'prefer': set(), 'avoid_penalty': 2.0, 'prefer_bonus': 1.0}
 
-with preset_col1:
-    if st.button("Night Sleeper", help="Avoid 10PM-8AM, prefer daytime", use_container_width=True):
-        for idx, appliance in enumerate(appliances):
-            name = appliance['name']
-            unique_key = f"{idx}_{name}"
-            st.session_state.preference_selections[unique_key] = {
-                'avoid': set(list(range(22, 24)) + list(range(0, 8))) - restricted_hour_numbers,
-                'prefer': set(range(10, 18)) - restricted_hour_numbers,
-                'avoid_penalty': 4.0,
-                'prefer_bonus': 2.0
-            }
-        st.rerun()
-
-with preset_col2:
-    if st.button("Early Bird", help="Prefer morning 6AM-12PM", use_container_width=True):
-        for idx, appliance in enumerate(appliances):
-            name = appliance['name']
-            unique_key = f"{idx}_{name}"
-            st.session_state.preference_selections[unique_key] = {
-                'avoid': set(range(20, 24)) - restricted_hour_numbers,
-                'prefer': set(range(6, 12)) - restricted_hour_numbers,
-                'avoid_penalty': 3.0,
-                'prefer_bonus': 2.5
-            }
-        st.rerun()
-
-with preset_col3:
-    if st.button("🦉 Night Owl", help="Prefer evening 6PM-11PM", use_container_width=True):
-        for idx, appliance in enumerate(appliances):
-            name = appliance['name']
-            unique_key = f"{idx}_{name}"
-            st.session_state.preference_selections[unique_key] = {
-                'avoid': set(range(6, 12)) - restricted_hour_numbers,
-                'prefer': set(range(18, 23)) - restricted_hour_numbers,
-                'avoid_penalty': 3.0,
-                'prefer_bonus': 2.5
-            }
-        st.rerun()
-
-with preset_col4:
-    if st.button("🧹 Clear All", help="Remove all preferences", use_container_width=True):
-        for idx, appliance in enumerate(appliances):
-            name = appliance['name']
-            unique_key = f"{idx}_{name}"
-            st.session_state.preference_selections[unique_key] = {
-                'avoid': set(),
-                'prefer': set(),
-                'avoid_penalty': 2.0,
-                'prefer_bonus': 1.0
-            }
-        st.rerun()
-
-# Detailed preferences with compact hour selection
-with st.expander("Customize Individual Preferences", expanded=False):
+def apply_preset(preset, appliances, restricted_hour_numbers):
+    avoid, prefer, avoid_penalty, prefer_bonus = PRESETS[preset]
     for idx, appliance in enumerate(appliances):
-        appliance_name = appliance['name']
-        unique_key = f"{idx}_{appliance_name}"
+        unique_key = f"{idx}_{appliance['name']}"
+        st.session_state.preference_selections[unique_key] = {
+            'avoid': avoid - restricted_hour_numbers,
+            'prefer': prefer - restricted_hour_numbers,
+            'avoid_penalty': avoid_penalty,
+            'prefer_bonus': prefer_bonus
+        }
 
-        st.markdown(f"### {appliance_name}")
+def toggle_hour(unique_key, kind, hour):
+    """Toggle an hour in the 'avoid' or 'prefer' set; an hour can only be in one of them."""
+    selection = st.session_state.preference_selections[unique_key]
+    other = 'prefer' if kind == 'avoid' else 'avoid'
+    if hour in selection[kind]:
+        selection[kind].remove(hour)
+    else:
+        selection[kind].add(hour)
+        selection[other].discard(hour)
+
+def hour_buttons(kind, unique_key, hours, restricted_hour_numbers):
+    """One row of 12 hour toggle buttons."""
+    selected = st.session_state.preference_selections[unique_key][kind]
+    for col, hour in zip(st.columns(12), hours):
+        with col:
+            display_hour = "12" if hour % 12 == 0 else str(hour % 12)
+            hour_help = f"{hour}:00 AM" if hour < 12 else f"{display_hour}:00 PM"
+            if hour in restricted_hour_numbers:
+                st.button(
+                    display_hour,
+                    key=f"{kind}_{unique_key}_{hour}",
+                    disabled=True,
+                    help=f"{hour_help} - RESTRICTED"
+                )
+            else:
+                st.button(
+                    display_hour,
+                    key=f"{kind}_{unique_key}_{hour}",
+                    type="primary" if hour in selected else "secondary",
+                    help=hour_help,
+                    on_click=toggle_hour,
+                    args=(unique_key, kind, hour)
+                )
 
-        if unique_key not in st.session_state.preference_selections:
-            st.session_state.preference_selections[unique_key] = {
-                'avoid': set(),
-                'prefer': set(),
-                'avoid_penalty': 2.0,
-                'prefer_bonus': 1.0
-            }
+# Each appliance's grid is its own fragment, so an hour click reruns ~100 widgets, not all of them
+@st.fragment
+def appliance_preferences(idx, appliance_name, restricted_hour_numbers):
+    unique_key = f"{idx}_{appliance_name}"
 
-        col1, col2 = st.columns(2)
+    st.markdown(f"### {appliance_name}")
 
-        with col1:
-            st.markdown("**Hours to Avoid**")
-
-            # AM Hours
-            st.markdown("*AM Hours:*")
-            am_cols = st.columns(12)
-            for hour in range(12):
-                with am_cols[hour]:
-                    is_restricted = hour in restricted_hour_numbers
-                    is_avoided = hour in st.session_state.preference_selections[unique_key]['avoid']
-
-                    if is_restricted:
-                        st.button(
-                            "12" if hour == 0 else str(hour),
-                            key=f"avoid_{unique_key}_{hour}",
-                            disabled=True,
-                            help=f"{hour}:00 AM - RESTRICTED"
-                        )
-                    else:
-                        button_type = "primary" if is_avoided else "secondary"
-                        display_hour = "12" if hour == 0 else str(hour)
-
-                        if st.button(
-                            display_hour,
-                            key=f"avoid_{unique_key}_{hour}",
-                            type=button_type,
-                            help=f"{hour}:00 AM"
-                        ):
-                            if hour in st.session_state.preference_selections[unique_key]['avoid']:
-                                st.session_state.preference_selections[unique_key]['avoid'].remove(hour)
-                            else:
-                                st.session_state.preference_selections[unique_key]['avoid'].add(hour)
-                                st.session_state.preference_selections[unique_key]['prefer'].discard(hour)
-                            st.rerun()
-
-            # PM Hours
-            st.markdown("*PM Hours:*")
-            pm_cols = st.columns(12)
-            for hour in range(12, 24):
-                with pm_cols[hour - 12]:
-                    is_restricted = hour in restricted_hour_numbers
-                    is_avoided = hour in st.session_state.preference_selections[unique_key]['avoid']
-
-                    if is_restricted:
-                        st.button(
-                            "12" if hour == 12 else str(hour - 12),
-                            key=f"avoid_{unique_key}_{hour}",
-                            disabled=True,
-                            help=f"{hour-12 if hour > 12 else 12}:00 PM - RESTRICTED"
-                        )
-                    else:
-                        button_type = "primary" if is_avoided else "secondary"
-                        display_hour = "12" if hour == 12 else str(hour - 12)
-
-                        if st.button(
-                            display_hour,
-                            key=f"avoid_{unique_key}_{hour}",
-                            type=button_type,
-                            help=f"{display_hour}:00 PM"
-                        ):
-                            if hour in st.session_state.preference_selections[unique_key]['avoid']:
-                                st.session_state.preference_selections[unique_key]['avoid'].remove(hour)
-                            else:
-                                st.session_state.preference_selections[unique_key]['avoid'].add(hour)
-                                st.session_state.preference_selections[unique_key]['prefer'].discard(hour)
-                            st.rerun()
-
-            avoid_penalty = st.slider(
-                "Importance",
-                0.0, 5.0,
-                st.session_state.preference_selections[unique_key].get('avoid_penalty', 2.0),
-                0.5,
-                key=f"avoid_penalty_{unique_key}",
-                help="Higher = stronger avoidance"
-            )
+    if unique_key not in st.session_state.preference_selections:
+        st.session_state.preference_selections[unique_key] = empty_selection()
+    selection = st.session_state.preference_selections[unique_key]
 
-            if st.session_state.preference_selections[unique_key]['avoid']:
-                avoided_list = sorted(st.session_state.preference_selections[unique_key]['avoid'])
-                st.caption(f"✓ Avoiding {len(avoided_list)} hours: {avoided_list[:8]}{'...' if len(avoided_list) > 8 else ''}")
+    col1, col2 = st.columns(2)
 
-        with col2:
-            st.markdown("**Preferred Hours**")
-
-            # AM Hours
-            st.markdown("*AM Hours:*")
-            am_cols = st.columns(12)
-            for hour in range(12):
-                with am_cols[hour]:
-                    is_restricted = hour in restricted_hour_numbers
-                    is_preferred = hour in st.session_state.preference_selections[unique_key]['prefer']
-
-                    if is_restricted:
-                        st.button(
-                            "12" if hour == 0 else str(hour),
-                            key=f"prefer_{unique_key}_{hour}",
-                            disabled=True,
-                            help=f"{hour}:00 AM - RESTRICTED"
-                        )
-                    else:
-                        button_type = "primary" if is_preferred else "secondary"
-                        display_hour = "12" if hour == 0 else str(hour)
-
-                        if st.button(
-                            display_hour,
-                            key=f"prefer_{unique_key}_{hour}",
-                            type=button_type,
-                            help=f"{hour}:00 AM"
-                        ):
-                            if hour in st.session_state.preference_selections[unique_key]['prefer']:
-                                st.session_state.preference_selections[unique_key]['prefer'].remove(hour)
-                            else:
-                                st.session_state.preference_selections[unique_key]['prefer'].add(hour)
-                                st.session_state.preference_selections[unique_key]['avoid'].discard(hour)
-                            st.rerun()
-
-            # PM Hours
-            st.markdown("*PM Hours:*")
-            pm_cols = st.columns(12)
-            for hour in range(12, 24):
-                with pm_cols[hour - 12]:
-                    is_restricted = hour in restricted_hour_numbers
-                    is_preferred = hour in st.session_state.preference_selections[unique_key]['prefer']
-
-                    if is_restricted:
-                        st.button(
-                            "12" if hour == 12 else str(hour - 12),
-                            key=f"prefer_{unique_key}_{hour}",
-                            disabled=True,
-                            help=f"{hour-12 if hour > 12 else 12}:00 PM - RESTRICTED"
-                        )
-                    else:
-                        button_type = "primary" if is_preferred else "secondary"
-                        display_hour = "12" if hour == 12 else str(hour - 12)
-
-                        if st.button(
-                            display_hour,
-                            key=f"prefer_{unique_key}_{hour}",
-                            type=button_type,
-                            help=f"{display_hour}:00 PM"
-                        ):
-                            if hour in st.session_state.preference_selections[unique_key]['prefer']:
-                                st.session_state.preference_selections[unique_key]['prefer'].remove(hour)
-                            else:
-                                st.session_state.preference_selections[unique_key]['prefer'].add(hour)
-                                st.session_state.preference_selections[unique_key]['avoid'].discard(hour)
-                            st.rerun()
-
-            prefer_bonus = st.slider(
-                "Bonus",
-                0.0, 5.0,
-                st.session_state.preference_selections[unique_key].get('prefer_bonus', 1.0),
-                0.5,
-                key=f"prefer_bonus_{unique_key}",
-                help="Higher = stronger preference"
-            )
+    with col1:
+        st.markdown("**Hours to Avoid**")
+        st.markdown("*AM Hours:*")
+        hour_buttons('avoid', unique_key, range(12), restricted_hour_numbers)
+        st.markdown("*PM Hours:*")
+        hour_buttons('avoid', unique_key, range(12, 24), restricted_hour_numbers)
+
+        selection['avoid_penalty'] = st.slider(
+            "Importance",
+            0.0, 5.0,
+            selection.get('avoid_penalty', 2.0),
+            0.5,
+            key=f"avoid_penalty_{unique_key}",
+            help="Higher = stronger avoidance"
+        )
 
-            if st.session_state.preference_selections[unique_key]['prefer']:
-                preferred_list = sorted(st.session_state.preference_selections[unique_key]['prefer'])
-                st.caption(f"✓ Preferring {len(preferred_list)} hours: {preferred_list[:8]}{'...' if len(preferred_list) > 8 else ''}")
+        if selection['avoid']:
+            avoided_list = sorted(selection['avoid'])
+            st.caption(f"✓ Avoiding {len(avoided_list)} hours: {avoided_list[:8]}{'...' if len(avoided_list) > 8 else ''}")
 
-        # Update the stored penalty/bonus values
-        st.session_state.preference_selections[unique_key]['avoid_penalty'] = avoid_penalty
-        st.session_state.preference_selections[unique_key]['prefer_bonus'] = prefer_bonus
+    with col2:
+        st.markdown("**Preferred Hours**")
+        st.markdown("*AM Hours:*")
+        hour_buttons('prefer', unique_key, range(12), restricted_hour_numbers)
+        st.markdown("*PM Hours:*")
+        hour_buttons('prefer', unique_key, range(12, 24), restricted_hour_numbers)
+
+        selection['prefer_bonus'] = st.slider(
+            "Bonus",
+            0.0, 5.0,
+            selection.get('prefer_bonus', 1.0),
+            0.5,
+            key=f"prefer_bonus_{unique_key}",
+            help="Higher = stronger preference"
+        )
 
-        # Build preferences dict for this appliance
-        preferences[appliance_name] = {
-            'avoid_hours': list(st.session_state.preference_selections[unique_key]['avoid']),
-            'avoid_penalty': avoid_penalty,
-            'preferred_hours': list(st.session_state.preference_selections[unique_key]['prefer']),
-            'preferred_bonus': prefer_bonus
+        if selection['prefer']:
+            preferred_list = sorted(selection['prefer'])
+            st.caption(f"✓ Preferring {len(preferred_list)} hours: {preferred_list[:8]}{'...' if len(preferred_list) > 8 else ''}")
+
+    st.divider()
+
+# Clicks inside the editor rerun only the editor (presets) or one appliance (hour buttons),
+# not the whole page
+@st.fragment
+def preference_editor(appliances, restricted_hour_numbers):
+    st.markdown("**Quick Presets:**")
+    preset_col1, preset_col2, preset_col3, preset_col4 = st.columns(4)
+    preset_buttons = [
+        (preset_col1, "Night Sleeper", "Avoid 10PM-8AM, prefer daytime", "night_sleeper"),
+        (preset_col2, "Early Bird", "Prefer morning 6AM-12PM", "early_bird"),
+        (preset_col3, "🦉 Night Owl", "Prefer evening 6PM-11PM", "night_owl"),
+        (preset_col4, "🧹 Clear All", "Remove all preferences", "clear"),
+    ]
+    for col, label, help_text, preset in preset_buttons:
+        with col:
+            st.button(label, help=help_text, use_container_width=True,
+                      on_click=apply_preset, args=(preset, appliances, restricted_hour_numbers))
+
+    # Detailed preferences with compact hour selection
+    with st.expander("Customize Individual Preferences", expanded=False):
+        for idx, appliance in enumerate(appliances):
+            appliance_preferences(idx, appliance['name'], restricted_hour_numbers)
+
+def build_preferences(appliances):
+    """Preference dict for the optimizers, from the selections made in the editor."""
+    preferences = {}
+    for idx, appliance in enumerate(appliances):
+        unique_key = f"{idx}_{appliance['name']}"
+        selection = st.session_state.preference_selections.setdefault(unique_key, empty_selection())
+        preferences[appliance['name']] = {
+            'avoid_hours': list(selection['avoid']),
+            'avoid_penalty': selection['avoid_penalty'],
+            'preferred_hours': list(selection['prefer']),
+            'preferred_bonus': selection['prefer_bonus']
         }
+    return preferences
 
-        st.divider()
+preference_editor(appliances, restricted_hour_numbers)
+
+# Built on full reruns only (e.g. the Optimize click), from the editor's saved selections
+preferences = build_preferences(appliances)
 
 st.divider()
 
@@ -589,130 +507,141 @@ if st.button("⚡ Optimize Schedule", type="primary", use_container_width=True):
         if available_hours < total_required_hours:
             st.error(f"⚠️ Impossible to schedule! You have {total_required_hours} hours of appliance runtime but only {available_hours} available hours (after restrictions). Please reduce restrictions or appliance durations.")
             st.stop()
-        # Create visualization containers
-        progress_container = st.container()
-        viz_container = st.container()
-
-        with progress_container:
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-
-        # LINEAR PROGRAMMING
-        with viz_container:
-            st.markdown("### Optimization in Progress")
-            col1, col2, col3 = st.columns(3)
 
-            with col1:
-                lp_status = st.empty()
-                lp_status.info("Linear Programming...")
+        # LP and RL run in parallel on the shared executor; a new run replaces any running one
+        previous_job = st.session_state.get('optimization_job')
+        if previous_job is not None:
+            previous_job.cancel()
+        # Opening the app with ?profile=1 profiles this run (PROFILE_REQUESTS=1 profiles every run)
+        profile = True if st.query_params.get("profile") == "1" else None
+        st.session_state.optimization_job = OptimizationJob(prices, appliances, restricted_hours, preferences,
+                                                            profile=profile)
 
-        status_text.text("Running Linear Programming optimization...")
-        progress_bar.progress(25)
+job = st.session_state.get('optimization_job')
 
-        lp_schedule, lp_cost = optimize_schedule_lp(prices, appliances, restricted_hours)
-        lp_readable = format_schedule_readable(lp_schedule, appliances)
-
-        with col1:
-            lp_status.success("✅ LP Complete!")
-
-        # REINFORCEMENT LEARNING
-        with col2:
-            rl_status = st.empty()
-            rl_status.info("⏳ Training AI...")
+if job is None:
+    st.info("👆 Click the button above to generate optimized schedules using both Linear Programming and AI!")
+    st.markdown("""
+    ### What you'll get:
+    - **Linear Programming**: Guaranteed absolute cheapest schedule
+    - **AI with Preferences**: Smart schedule balancing cost + your comfort
+    - **Side-by-side comparison**: See the trade-offs clearly
+    """)
+else:
+    job_prices = job.prices
+    job_preferences = job.preferences
 
-        status_text.text("Training AI with your preferences...")
+    if job.profile_dir:
+        st.caption(f"🔬 Profiling this run into `{job.profile_dir}` (see `python profiling.py {job.request_id}`)")
 
-        # Create a nice progress animation for RL training
-        for i in range(25, 75, 5):
-            progress_bar.progress(i)
-            import time
-            time.sleep(0.1)
+    # Clicking Cancel reruns the script, which interrupts the polling loop below
+    if not job.done() and st.button("✖ Cancel Optimization", use_container_width=True):
+        job.cancel()
 
-        model = train_agent_with_preferences(prices, appliances, restricted_hours, preferences)
+    progress_container = st.empty()
 
-        with col2:
-            rl_status.success("✅ AI Trained!")
+    # RESULTS
+    st.markdown("---")
+    st.markdown("## Results Comparison")
 
-        # Generate schedule
-        with col3:
-            gen_status = st.empty()
-            gen_status.info("Generating Schedule...")
+    col1, col2 = st.columns(2)
 
-        status_text.text("Generating optimized schedule...")
-        progress_bar.progress(85)
+    with col1:
+        st.markdown("### Linear Programming")
+        st.caption("Guaranteed cheapest - ignores comfort")
+        lp_slot = st.empty()
 
-        rl_schedule = run_agent_with_preferences(model, prices, appliances, restricted_hours, preferences)
+    with col2:
+        st.markdown("### AI with Preferences")
+        st.caption("Balances cost + your comfort")
+        rl_slot = st.empty()
+
+    lp_slot.info("Linear Programming...")
+    rl_slot.info("⏳ Training AI...")
+
+    # Stream results: LP renders as soon as it is ready, progress follows real training timesteps
+    lp_shown = False
+    lp_schedule = None
+    while True:
+        if not lp_shown and job.lp.done():
+            try:
+                lp_result = job.lp.result()
+            except Exception as e:
+                lp_slot.error(f"⚠️ Linear Programming failed: {e}")
+                # A failed job would fail again on every rerun, so forget it
+                st.session_state.pop('optimization_job', None)
+            else:
+                lp_schedule, lp_cost = lp_result["schedule"], lp_result["cost"]
+                # LP ignores preferences while solving, but its schedule is scored the same way
+                lp_comfort = lp_schedule.comfort(job_preferences)
+
+                with lp_slot.container():
+                    st.json(lp_schedule.format_readable())
+                    st.metric("Total Daily Cost", f"${lp_cost:.2f}")
+                    # Show on 0–10 scale consistently
+                    st.metric("Comfort Score", f"{lp_comfort:.1f}/10", help="LP doesn't consider preferences")
+            lp_shown = True
+
+        if lp_shown and job.rl.done():
+            break
+
+        with progress_container.container():
+            st.progress(job.progress.fraction)
+            st.text(f"{job.progress.stage}... {job.progress.timesteps:,} / {job.progress.total_timesteps:,} training steps")
+        time.sleep(0.2)
+
+    progress_container.empty()
+
+    rl_error = None if job.rl.cancelled() else job.rl.exception()
+    rl_result = None if job.rl.cancelled() or rl_error is not None else job.rl.result()
+
+    if rl_error is not None:
+        rl_slot.error(f"⚠️ AI training failed: {rl_error}")
+        st.session_state.pop('optimization_job', None)
+    elif rl_result is None:
+        rl_slot.warning("Optimization cancelled. Click **Optimize Schedule** to start again.")
+    elif lp_schedule is None:
+        rl_schedule = rl_result["schedule"]
+        with rl_slot.container():
+            st.json(rl_schedule.format_readable())
+            st.metric("Total Daily Cost", f"${rl_schedule.cost(job_prices):.2f}")
+            st.metric("Comfort Score", f"{sanitize_score(rl_schedule.comfort(job_preferences), 1.0, 2.6):.1f}/10",
+                      help="Higher is better")
+    else:
+        rl_schedule = rl_result["schedule"]
 
         # Validate that RL schedule is not empty
-        if all(len(rl_schedule.get(a['name'], [])) == 0 for a in appliances):
+        if not rl_schedule.hours.any():
             st.error("⚠️ AI failed to generate a schedule. This may happen with very restrictive settings. Try reducing time restrictions or adjusting preferences.")
             # Fall back to LP schedule for RL
-            rl_schedule = lp_schedule.copy()
+            rl_schedule = lp_schedule
             st.warning("Using Linear Programming schedule as fallback for AI with Preferences.")
 
-        rl_readable = format_schedule_readable(rl_schedule, appliances)
-
-        rl_cost = sum(
-            prices[h] * a['power']
-            for a in appliances
-            for h in rl_schedule[a['name']]
-        )
-
-        # --- Compute comfort scores SEPARATELY ---
-        # LP gets a random comfort score between 1.2 and 2.6 (doesn't consider preferences)
-        lp_comfort = round(random.uniform(1.2, 2.6), 1)
+        rl_cost = rl_schedule.cost(job_prices)
 
         # AI with Preferences uses the actual algorithm
-        rl_comfort_raw = calculate_comfort_score(rl_schedule, preferences)
+        rl_comfort_raw = rl_schedule.comfort(job_preferences)
         rl_comfort = sanitize_score(rl_comfort_raw, 1.0, 2.6)
 
-        with col3:
-            gen_status.success("Schedule Ready!")
-
-        progress_bar.progress(100)
-        status_text.text("Optimization complete!")
+        with rl_slot.container():
+            st.json(rl_schedule.format_readable())
 
-        st.balloons()
-
-        # Clear visualization
-        viz_container.empty()
-        progress_container.empty()
-
-        # RESULTS
-        st.markdown("---")
-        st.markdown("## Results Comparison")
-
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.markdown("### Linear Programming")
-            st.caption("Guaranteed cheapest - ignores comfort")
+            cost_diff = rl_cost - lp_cost
+            st.metric(
+                "Total Daily Cost",
+                f"${rl_cost:.2f}",
+                delta=f"${cost_diff:+.2f}",
+                delta_color="inverse"
+            )
+            st.metric(
+                "Comfort Score",
+                f"{rl_comfort:.1f}/10",
+                help="Higher is better"
+            )
 
-            with st.container():
-                st.json(lp_readable)
-                st.metric("Total Daily Cost", f"${lp_cost:.2f}")
-                # Show on 0–10 scale consistently
-                st.metric("Comfort Score", f"{lp_comfort:.1f}/10", help="LP doesn't consider preferences")
-
-        with col2:
-            st.markdown("### AI with Preferences")
-            st.caption("Balances cost + your comfort")
-
-            with st.container():
-                st.json(rl_readable)
-
-                cost_diff = rl_cost - lp_cost
-                st.metric(
-                    "Total Daily Cost",
-                    f"${rl_cost:.2f}",
-                    delta=f"${cost_diff:+.2f}",
-                    delta_color="inverse"
-                )
-                st.metric(
-                    "Comfort Score",
-                    f"{rl_comfort:.1f}/10",
-                    help="Higher is better"
-                )
+        if not job.celebrated:
+            st.balloons()
+            job.celebrated = True
 
         # ANALYSIS
         st.markdown("---")
@@ -737,11 +666,7 @@ if st.button("⚡ Optimize Schedule", type="primary", use_container_width=True):
         else:
             st.success(f"✨ Perfect optimization! Same cost as LP (${lp_cost:.2f}) while achieving a comfort score of **{rl_comfort:.1f}/10**. No compromise needed!")
 
-else:
-    st.info("👆 Click the button above to generate optimized schedules using both Linear Programming and AI!")
-    st.markdown("""
-    ### What you'll get:
-    - **Linear Programming**: Guaranteed absolute cheapest schedule
-    - **AI with Preferences**: Smart schedule balancing cost + your comfort
-    - **Side-by-side comparison**: See the trade-offs clearly
-    """)
\ No newline at end of file
+# -------------------------------
+# Preload the solver and ML stacks now that the page has rendered
+# -------------------------------
+warm_up()
@@ -0,0 +1,317 @@
+"""
+Backtests of scheduling strategies over a long price history.
+
+Replays hourly prices window by window, a day at a time by default or on a
+rolling horizon (--window/--step), for many households at once. Records
+what every strategy would have cost, its comfort score
+(calculate_comfort_score semantics via comfort.score_comfort_batch) and
+the household's peak load.
+
+Strategies:
+    asap   every appliance runs in its first allowed hours (no scheduling, the baseline)
+    lp     cost-minimal hours, the optimize_schedule_lp optimum (optimizer.cheapest_hours_batch)
+    rl     a trained policy (lookup table or NumPy export) rolled out with rollout.rollout_batch;
+           the preference-trained agent is the default
+
+Households come from a synthetic_fleet directory, or are generated. Each
+household gets one slot per appliance type, so a batch of windows is a
+single (windows, households, appliance types, hours) array. Batches run in
+this process or across a pool (--workers) that attaches to the inputs
+through shared_fleet.SharedArrays and writes results in place.
+
+    python backtest.py --households 1000 --days 365
+    python backtest.py --fleet fleet/ --prices data/prices.csv --window 24 --step 6 -o results.parquet
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from comfort import score_comfort_batch
+from optimizer import cheapest_hours_batch
+from shared_fleet import SharedArrays, attach
+from synthetic_fleet import APPLIANCES, NUM_HOURS, generate_fleet, generate_prices, load_fleet, unpack_masks
+
+DEFAULT_POLICY = "models/energy_agent_preferences_table.npz"
+OUTPUTS = {"cost": np.float32, "comfort": np.float32, "peak_load": np.float32,
+           "energy_kwh": np.float32, "complete": bool}
+
+STRATEGIES = {}
+
+# Attached arrays of this worker process, set by _init_worker
+_worker = {}
+
+
+def strategy(name):
+    """Register `fn(prices, duration, allowed, policy) -> hours` under `name`."""
+    def register(fn):
+        STRATEGIES[name] = fn
+        return fn
+    return register
+
+
+# ----------------------------------------------------------------------
+# Inputs
+# ----------------------------------------------------------------------
+def load_price_history(path):
+    """Hourly prices from a synthetic_fleet directory, a .npy array or a CSV with a price column."""
+    if os.path.isdir(path):
+        return np.load(os.path.join(path, "prices.npy")).ravel().astype(np.float64)
+    if path.endswith(".npy"):
+        return np.load(path).ravel().astype(np.float64)
+    return pd.read_csv(path)["price"].to_numpy(np.float64)
+
+
+def price_windows(prices, window=24, step=24):
+    """(num_windows, window) slices of an hourly price series, and the start hour of each."""
+    prices = np.ravel(np.asarray(prices, dtype=np.float64))
+    starts = np.arange(0, len(prices) - window + 1, step)
+    return prices[starts[:, None] + np.arange(window)], starts
+
+
+def household_slots(fleet, households):
+    """
+    Fleet households as fixed appliance-type slots:
+        power, duration: (H, A), zero where the household has no such appliance
+        restricted, prefer, avoid: bool (H, 24) by hour of day
+        prefer_weight, avoid_weight: (H, 1); scored: bool (H, A)
+    """
+    households = np.asarray(households, dtype=np.int64)
+    offsets = np.asarray(fleet["offsets"])
+    lo, counts = offsets[households], offsets[households + 1] - offsets[households]
+    owner = np.repeat(np.arange(len(households)), counts)
+    rows = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    kind = np.asarray(fleet["appliance"][rows], dtype=np.int64)
+
+    power = np.zeros((len(households), len(APPLIANCES)))
+    duration = np.zeros((len(households), len(APPLIANCES)), dtype=np.int64)
+    power[owner, kind] = fleet["power"][rows]
+    duration[owner, kind] = fleet["duration"][rows]
+
+    prefer = unpack_masks(fleet["prefer"][households])
+    avoid = unpack_masks(fleet["avoid"][households])
+    return {
+        "power": power,
+        "duration": duration,
+        "restricted": unpack_masks(fleet["restricted"][households]),
+        "prefer": prefer,
+        "avoid": avoid,
+        "prefer_weight": np.asarray(fleet["prefer_bonus"][households], dtype=np.float64)[:, None],
+        "avoid_weight": np.asarray(fleet["avoid_penalty"][households], dtype=np.float64)[:, None],
+        "scored": (duration > 0) & (prefer | avoid).any(axis=1)[:, None],
+    }
+
+
+# ----------------------------------------------------------------------
+# Strategies: prices (B, T), duration (H, A), allowed (B, H, T) -> hours (B, H, A, T)
+# ----------------------------------------------------------------------
+@strategy("asap")
+def run_asap(prices, duration, allowed, policy=None):
+    allowed = allowed[:, :, None, :]
+    return allowed & (np.cumsum(allowed, axis=-1) <= duration[None, :, :, None])
+
+
+@strategy("lp")
+def run_lp(prices, duration, allowed, policy=None):
+    num_windows, num_households, num_hours = allowed.shape
+    hours = np.zeros((num_windows, num_households, duration.shape[1], num_hours), dtype=bool)
+    b, h, a = np.nonzero(np.broadcast_to(duration > 0, hours.shape[:3]))
+    hours[b, h, a], _ = cheapest_hours_batch(prices[b], duration[h, a], ~allowed[b, h])
+    return hours
+
+
+@strategy("rl")
+def run_rl(prices, duration, allowed, policy=None):
+    """Policy rollout, appliance types taken in groups of the policy's action size."""
+    from policy_pool import get_policy
+    from rollout import rollout_batch
+
+    model = get_policy(policy or DEFAULT_POLICY)
+    size = getattr(model, "num_appliances", None) or model.action_size
+    num_windows, num_households, num_hours = allowed.shape
+    num_types = duration.shape[1]
+    groups = -(-num_types // size)
+
+    padded = np.zeros((num_households, groups * size), dtype=np.int64)
+    padded[:, :num_types] = duration
+    durations = np.broadcast_to(padded.reshape(num_households, groups, size),
+                                (num_windows, num_households, groups, size)).reshape(-1, size)
+    restricted = np.broadcast_to(~allowed[:, :, None, :], (num_windows, num_households, groups, num_hours))
+    scenario_prices = np.broadcast_to(prices[:, None, None, :], restricted.shape)
+
+    placeholder = [{"name": str(i), "power": 0.0, "duration": 0} for i in range(size)]
+    result = rollout_batch(model, scenario_prices.reshape(-1, num_hours), placeholder,
+                           restricted.reshape(-1, num_hours), durations=durations)
+    hours = result["hours"].reshape(num_windows, num_households, groups * size, num_hours)
+    return hours[:, :, :num_types]
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
+def evaluate(hours, prices, arrays, hour_of_day):
+    """Cost, comfort, peak load, energy and completeness (B, H) of schedules (B, H, A, T)."""
+    num_windows, num_households, num_types, num_hours = hours.shape
+    load = np.einsum("ha,bhat->bht", arrays["power"], hours)
+    allowed = ~arrays["restricted"][:, hour_of_day].transpose(1, 0, 2)
+    served = (hours & allowed[:, :, None, :]).sum(axis=-1)
+
+    flat = num_windows * num_households
+    comfort = score_comfort_batch(
+        hours.reshape(flat, num_types, num_hours),
+        arrays["prefer"][:, hour_of_day].transpose(1, 0, 2).reshape(flat, 1, num_hours),
+        arrays["avoid"][:, hour_of_day].transpose(1, 0, 2).reshape(flat, 1, num_hours),
+        np.broadcast_to(arrays["prefer_weight"], (num_windows, num_households, 1)).reshape(flat, 1),
+        np.broadcast_to(arrays["avoid_weight"], (num_windows, num_households, 1)).reshape(flat, 1),
+        np.broadcast_to(arrays["scored"], (num_windows, num_households, num_types)).reshape(flat, num_types),
+    )
+    return {
+        "cost": np.einsum("bht,bt->bh", load, prices),
+        "comfort": comfort.reshape(num_windows, num_households),
+        "peak_load": load.max(axis=-1),
+        "energy_kwh": load.sum(axis=-1),
+        "complete": (served >= arrays["duration"]).all(axis=-1),
+    }
+
+
+def run_windows(arrays, w0, w1, strategies, policy=None):
+    """Run windows w0:w1 for every strategy, writing into arrays[<output>][strategy, w0:w1]."""
+    prices = arrays["prices"][w0:w1]
+    hour_of_day = arrays["hour_of_day"][w0:w1]
+    allowed = ~arrays["restricted"][:, hour_of_day].transpose(1, 0, 2)
+    for s, name in enumerate(strategies):
+        hours = STRATEGIES[name](prices, arrays["duration"], allowed, policy)
+        for output, values in evaluate(hours, prices, arrays, hour_of_day).items():
+            arrays[output][s, w0:w1] = values
+    return w1 - w0
+
+
+def _init_worker(spec):
+    _worker.clear()
+    _worker.update(attach(spec))
+
+
+def _run_shared(w0, w1, strategies, policy):
+    return run_windows(_worker, w0, w1, strategies, policy)
+
+
+def backtest(prices, fleet, households=None, strategies=("asap", "lp"), window=24, step=24,
+             first_hour=0, policy=None, workers=1, batch_windows=8):
+    """
+    Backtest `strategies` for fleet households (default: all) over an hourly
+    price series whose first price is at hour-of-day `first_hour`.
+
+    Returns the results table: one row per (strategy, window, household) with
+    cost, comfort, peak_load, energy_kwh and complete (every appliance got
+    its hours outside restricted ones).
+    """
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown strategies: {', '.join(unknown)}")
+    if households is None:
+        households = np.arange(len(fleet["offsets"]) - 1)
+    households = np.asarray(households, dtype=np.int64)
+    windows, starts = price_windows(prices, window, step)
+    if not len(windows):
+        raise ValueError(f"Price history has {np.size(prices)} hours, fewer than one {window}-hour window")
+
+    arrays = household_slots(fleet, households)
+    arrays["prices"] = windows
+    arrays["hour_of_day"] = (first_hour + starts[:, None] + np.arange(window)) % NUM_HOURS
+    shape = (len(strategies), len(windows), len(households))
+    batches = [(w0, min(w0 + batch_windows, len(windows))) for w0 in range(0, len(windows), batch_windows)]
+
+    if workers > 1:
+        with SharedArrays(arrays) as shared:
+            for name, dtype in OUTPUTS.items():
+                shared.empty(name, shape, dtype)
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(shared.spec,)) as pool:
+                for f in [pool.submit(_run_shared, w0, w1, tuple(strategies), policy) for w0, w1 in batches]:
+                    f.result()
+            outputs = {name: shared[name].copy() for name in OUTPUTS}
+    else:
+        outputs = {name: np.zeros(shape, dtype) for name, dtype in OUTPUTS.items()}
+        arrays.update(outputs)
+        for w0, w1 in batches:
+            run_windows(arrays, w0, w1, strategies, policy)
+
+    num_rows = int(np.prod(shape))
+    return pd.DataFrame({
+        "strategy": pd.Categorical.from_codes(np.repeat(np.arange(len(strategies)), num_rows // len(strategies)),
+                                              list(strategies)),
+        "window": np.tile(np.repeat(np.arange(len(windows), dtype=np.int32), len(households)), len(strategies)),
+        "start_hour": np.tile(np.repeat(starts.astype(np.int32), len(households)), len(strategies)),
+        "household": np.tile(households.astype(np.int32), len(strategies) * len(windows)),
+        **{name: values.ravel() for name, values in outputs.items()},
+    })
+
+
+def summarize(results, baseline="asap"):
+    """Per strategy: mean cost per household and window, savings against `baseline`, comfort and peaks."""
+    results = results.assign(cost=results["cost"].astype(np.float64))
+    summary = results.groupby("strategy", observed=True).agg(
+        cost=("cost", "mean"),
+        total_cost=("cost", "sum"),
+        comfort=("comfort", "mean"),
+        peak_load=("peak_load", "mean"),
+        max_peak_load=("peak_load", "max"),
+        complete=("complete", "mean"),
+    )
+    if baseline in summary.index:
+        summary["savings"] = 1 - summary["total_cost"] / summary.loc[baseline, "total_cost"]
+    return summary
+
+
+def write_results(results, path):
+    if path.endswith(".parquet"):
+        results.to_parquet(path, index=False)
+    else:
+        results.to_csv(path, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest scheduling strategies over a price history")
+    parser.add_argument("--fleet", help="synthetic_fleet directory (default: generate --households)")
+    parser.add_argument("--households", type=int, default=1000, help="Households to backtest (the first N of --fleet)")
+    parser.add_argument("--prices", help="Price history: fleet directory, .npy or CSV with a price column "
+                                         "(default: the fleet's prices, or --days of synthetic ones)")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--first-hour", type=int, default=0, help="Hour of day of the first price")
+    parser.add_argument("--strategies", default="asap,lp,rl", help=f"Comma-separated: {', '.join(STRATEGIES)}")
+    parser.add_argument("--window", type=int, default=24, help="Hours scheduled at once")
+    parser.add_argument("--step", type=int, default=24, help="Hours between window starts")
+    parser.add_argument("--policy", help=f"Policy for the rl strategy (default {DEFAULT_POLICY})")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-windows", type=int, default=8, help="Windows per batch (and per pool task)")
+    parser.add_argument("--baseline", default="asap", help="Strategy the savings are measured against")
+    parser.add_argument("-o", "--output", help="Write the results table (.parquet or .csv[.gz])")
+    args = parser.parse_args()
+
+    if args.fleet:
+        fleet = load_fleet(args.fleet)
+        households = np.arange(min(args.households, fleet["meta"]["households"]))
+    else:
+        fleet = generate_fleet(args.households, args.days, args.seed)
+        households = None
+    if args.prices:
+        prices = load_price_history(args.prices)
+    elif args.fleet:
+        prices = np.asarray(fleet["prices"], dtype=np.float64).ravel()
+    else:
+        prices = generate_prices(args.days, args.seed + 1).ravel()
+
+    start = time.perf_counter()
+    results = backtest(prices, fleet, households, args.strategies.split(","), args.window, args.step,
+                       args.first_hour, args.policy, args.workers, args.batch_windows)
+    elapsed = time.perf_counter() - start
+
+    num_households = results["household"].nunique()
+    num_windows = results["window"].nunique()
+    print(f"Backtested {num_households:,} households × {num_windows:,} windows of {args.window}h "
+          f"(step {args.step}h) in {elapsed:.1f}s\n")
+    print(summarize(results, args.baseline).to_string(float_format=lambda x: f"{x:,.4f}"))
+    if args.output:
+        write_results(results, args.output)
+        print(f"\n✅ Wrote {len(results):,} rows to {args.output}")
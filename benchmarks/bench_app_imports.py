@@ -0,0 +1,78 @@
+"""
+Import-time budget for the Streamlit app's first render.
+
+Reads the module-level imports of app.py, imports them in a fresh
+interpreter and fails if they take longer than the budget or pull in
+the solver/ML stacks that should only load lazily. Streamlit itself is
+imported first and reported separately, since a server pays for it once.
+
+Run from the repository root:
+    python -m benchmarks.bench_app_imports [--budget 1.0]
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+
+HEAVY = ("torch", "stable_baselines3", "pulp")
+
+PROBE = """
+import importlib, json, sys, time
+t0 = time.perf_counter()
+import streamlit
+streamlit_s = time.perf_counter() - t0
+t0 = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+app_s = time.perf_counter() - t0
+print(json.dumps({{"streamlit_s": streamlit_s, "app_s": app_s,
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+LAZY_PROBE = """
+import importlib, time
+t0 = time.perf_counter()
+importlib.import_module({name!r})
+print(time.perf_counter() - t0)
+"""
+
+
+def app_imports(path="app.py"):
+    """Top-level modules imported by the app script."""
+    modules = []
+    for node in ast.parse(open(path, encoding="utf-8").read()).body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return [m for m in modules if m.split(".")[0] != "streamlit"]
+
+
+def run(code):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()[-1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds allowed for app imports")
+    args = parser.parse_args()
+
+    from utils.lazy_imports import HEAVY_MODULES
+
+    modules = app_imports()
+    stats = json.loads(run(PROBE.format(modules=modules, heavy=HEAVY)))
+    print(f"streamlit: {stats['streamlit_s']:.2f}s (once per server process)")
+    print(f"app imports ({', '.join(modules)}): {stats['app_s']:.2f}s")
+    for name in HEAVY_MODULES:
+        print(f"deferred {name}: {float(run(LAZY_PROBE.format(name=name))):.2f}s")
+
+    failures = []
+    if stats["app_s"] > args.budget:
+        failures.append(f"app imports took {stats['app_s']:.2f}s (budget {args.budget:.2f}s)")
+    if stats["heavy"]:
+        failures.append(f"heavy modules imported at startup: {', '.join(stats['heavy'])}")
+    if failures:
+        sys.exit("FAIL: " + "; ".join(failures))
+    print("OK")
@@ -0,0 +1,136 @@
+"""
+Server CPU time per click on the preference grid.
+
+Starts `streamlit run` on the app, connects over the same websocket the
+browser uses, and clicks hour buttons in the preference editor one after the
+other. Each click is sent the way the browser sends it (scoped to the
+button's fragment when it has one), and the server process's CPU time is
+read from /proc before and after, so it counts everything the click costs:
+reruns, figure serialization, protobuf encoding. Linux only.
+
+Run from the repository root:
+    python -m benchmarks.bench_app_rerun [--script app.py] [--clicks 20]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetStates
+
+FINAL_STATUSES = (
+    ForwardMsg.FINISHED_SUCCESSFULLY,
+    ForwardMsg.FINISHED_WITH_COMPILE_ERROR,
+    ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def cpu_seconds(pid):
+    """User + system CPU time of a process, from /proc."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_server(script, port):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", script,
+         "--server.headless", "true", "--server.port", str(port),
+         "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Streamlit server did not start")
+
+
+async def rerun(ws, widget_states=None, fragment_id=""):
+    """Send one rerun request and wait for the final script run to finish."""
+    msg = BackMsg()
+    msg.rerun_script.page_script_hash = ""
+    msg.rerun_script.fragment_id = fragment_id
+    if widget_states is not None:
+        msg.rerun_script.widget_states.CopyFrom(widget_states)
+    await ws.send(msg.SerializeToString())
+
+    buttons = {}
+    while True:
+        fm = ForwardMsg()
+        fm.ParseFromString(await ws.recv())
+        kind = fm.WhichOneof("type")
+        if kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+            element = fm.delta.new_element
+            if element.WhichOneof("type") == "button" and not element.button.disabled:
+                buttons[element.button.id] = fm.delta.fragment_id
+        elif kind == "script_finished" and fm.script_finished in FINAL_STATUSES:
+            return buttons
+
+
+async def click_grid(port, pid, clicks, settle):
+    url = f"ws://localhost:{port}/_stcore/stream"
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+        buttons = await rerun(ws)
+        # Let background imports (utils.lazy_imports.warm_up) finish first
+        await asyncio.sleep(settle)
+
+        grid = [(widget_id, fragment_id) for widget_id, fragment_id in buttons.items()
+                if "-prefer_" in widget_id or "-avoid_" in widget_id]
+        if not grid:
+            raise RuntimeError("No preference buttons found")
+
+        cpu, wall = [], []
+        for i in range(clicks):
+            widget_id, fragment_id = grid[i % len(grid)]
+            states = WidgetStates()
+            state = states.widgets.add()
+            state.id = widget_id
+            state.trigger_value = True
+
+            cpu_start, wall_start = cpu_seconds(pid), time.perf_counter()
+            await rerun(ws, states, fragment_id)
+            wall.append(time.perf_counter() - wall_start)
+            cpu.append(cpu_seconds(pid) - cpu_start)
+        return cpu, wall, bool(grid[0][1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--script", default="app.py", help="Streamlit script to benchmark")
+    parser.add_argument("--clicks", type=int, default=20)
+    parser.add_argument("--settle", type=float, default=15.0,
+                        help="Seconds to wait after the first render before clicking")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(args.script, port)
+    try:
+        cpu, wall, scoped = asyncio.run(click_grid(port, server.pid, args.clicks, args.settle))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{args.script}: {args.clicks} clicks, {'fragment' if scoped else 'full-script'} reruns")
+    print(f"  server CPU per click: mean {statistics.mean(cpu) * 1e3:.0f} ms, "
+          f"total {sum(cpu):.2f} s")
+    print(f"  latency per click:    median {statistics.median(wall) * 1e3:.0f} ms, "
+          f"max {max(wall) * 1e3:.0f} ms")
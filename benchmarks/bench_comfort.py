@@ -0,0 +1,51 @@
+"""
+Throughput of batch comfort scoring versus one calculate_comfort_score
+call per schedule.
+
+Run from the repository root:
+    python -m benchmarks.bench_comfort [--schedules 200000]
+"""
+import argparse
+import time
+import numpy as np
+from comfort import preference_arrays, score_comfort_batch
+from schedule import Schedule
+
+
+def random_problem(num_schedules, num_appliances=10, num_slots=24, seed=0):
+    rng = np.random.default_rng(seed)
+    names = [f"Appliance {i}" for i in range(num_appliances)]
+    hours = rng.random((num_schedules, num_appliances, num_slots)) < 0.15
+    preferences = {}
+    for name in names:
+        slots = rng.permutation(num_slots)
+        preferences[name] = {
+            "avoid_hours": slots[:6].tolist(),
+            "preferred_hours": slots[6:12].tolist(),
+            "avoid_penalty": float(rng.choice([1.0, 2.0, 4.0])),
+            "preferred_bonus": float(rng.choice([1.0, 2.0, 2.5])),
+        }
+    return names, hours, preferences
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schedules", type=int, default=200_000)
+    args = parser.parse_args()
+
+    names, hours, preferences = random_problem(args.schedules)
+    arrays = preference_arrays(names, preferences, hours.shape[-1])
+
+    score_comfort_batch(hours[:1000], **arrays)  # warm up
+    t0 = time.perf_counter()
+    scores = score_comfort_batch(hours, **arrays)
+    elapsed = time.perf_counter() - t0
+    print(f"score_comfort_batch: {args.schedules:,} schedules in {elapsed:.3f}s "
+          f"({args.schedules / elapsed:,.0f} schedules/s)")
+
+    sample = min(args.schedules, 5_000)
+    t0 = time.perf_counter()
+    single = [Schedule(names, np.zeros(len(names)), h).comfort(preferences) for h in hours[:sample]]
+    elapsed = time.perf_counter() - t0
+    print(f"one Schedule.comfort per schedule: {sample / elapsed:,.0f} schedules/s")
+    assert np.array_equal(scores[:sample], single)
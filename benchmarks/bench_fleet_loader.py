@@ -0,0 +1,74 @@
+"""
+Throughput of the fleet appliance loader on a generated 1M-row file,
+compared with the old row-by-row `iterrows` conversion on a sample.
+
+Run from the repository root:
+    python -m benchmarks.bench_fleet_loader [--rows 1000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from utils.appliance_data import appliance_defaults
+from utils.io_utils import FleetDatasetReader, load_appliance_power_dataset
+
+
+def write_fleet_csv(path, rows, seed=0, bad_fraction=0.001):
+    rng = np.random.default_rng(seed)
+    names = np.array(list(appliance_defaults))
+    power = np.array(list(appliance_defaults.values()))
+    kind = rng.integers(0, len(names), rows)
+
+    df = pd.DataFrame({
+        "Household ID": np.arange(rows) // 6,
+        "Appliance": names[kind],
+        "Power kWh": np.round(power[kind] * rng.uniform(0.8, 1.2, rows), 3).astype(object),
+        "Duration Hours": rng.integers(1, 6, rows),
+    })
+    bad = rng.random(rows) < bad_fraction
+    df.loc[bad, "Power kWh"] = "n/a"
+    df.to_csv(path, index=False)
+
+
+def iterrows_baseline(path, sample_rows):
+    """The previous per-row conversion, timed on the first `sample_rows` rows."""
+    df = pd.read_csv(path, nrows=sample_rows)
+    t0 = time.perf_counter()
+    out = []
+    for _, row in df.iterrows():
+        try:
+            out.append({"name": str(row["Appliance"]).strip(), "power": float(row["Power kWh"]),
+                        "duration": int(round(float(row["Duration Hours"])))})
+        except Exception:
+            pass
+    return sample_rows / (time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunksize", type=int, default=250_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fleet.csv")
+        write_fleet_csv(path, args.rows)
+
+        t0 = time.perf_counter()
+        reader = FleetDatasetReader(path, chunksize=args.chunksize)
+        households = sum(len(chunk["households"]) for chunk in reader.iter_chunks())
+        elapsed = time.perf_counter() - t0
+        print(f"chunked reader: {args.rows:,} rows, {households:,} households in {elapsed:.2f}s "
+              f"({args.rows / elapsed:,.0f} rows/s)")
+        print(reader.reject_summary().to_string(index=False))
+
+        t0 = time.perf_counter()
+        appliances = load_appliance_power_dataset(path)
+        elapsed = time.perf_counter() - t0
+        print(f"load_appliance_power_dataset: {len(appliances):,} appliances in {elapsed:.2f}s "
+              f"({args.rows / elapsed:,.0f} rows/s)")
+
+        rate = iterrows_baseline(path, min(args.rows, 20_000))
+        print(f"iterrows baseline: {rate:,.0f} rows/s (extrapolated {args.rows / rate:.1f}s for {args.rows:,} rows)")
@@ -0,0 +1,55 @@
+"""
+Cost of the metrics instrumentation: per-call overhead of span() and inc()
+with recording off and on, and optimize_schedule_lp latency either way.
+
+Run from the repository root:
+    python -m benchmarks.bench_metrics
+"""
+import time
+import numpy as np
+import metrics
+from optimizer import optimize_schedule_lp
+
+APPLIANCES = [
+    {"name": "Washing Machine", "power": 0.3, "duration": 2},
+    {"name": "Dryer", "power": 2.5, "duration": 2},
+    {"name": "Dishwasher", "power": 1.5, "duration": 1},
+    {"name": "Computer", "power": 0.1, "duration": 5},
+]
+
+
+def per_call_ns(fn, repeats=200_000):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e9
+
+
+def empty_span():
+    with metrics.span("bench"):
+        pass
+
+
+def counter():
+    metrics.inc("bench_total", result="hit")
+
+
+def lp_ms(prices, repeats=30):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        optimize_schedule_lp(prices, APPLIANCES, [0, 1, 2, 3])
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+if __name__ == "__main__":
+    prices = np.random.default_rng(0).uniform(0.02, 0.08, 24).tolist()
+    baseline = per_call_ns(lambda: None)
+    print(f"{'':<12} {'span()':>10} {'inc()':>10} {'LP solve':>10}")
+    for on in (False, True):
+        metrics.enable(on)
+        span_ns = per_call_ns(empty_span) - baseline
+        inc_ns = per_call_ns(counter) - baseline
+        print(f"{'enabled' if on else 'disabled':<12} {span_ns:>8.0f}ns {inc_ns:>8.0f}ns {lp_ms(prices):>8.2f}ms")
+    metrics.registry.clear()
@@ -0,0 +1,69 @@
+"""
+Cold start, memory and per-step latency of the NumPy policy artifact
+versus loading the stable-baselines3 model, plus an action agreement check.
+
+Each loading path runs in a fresh interpreter so import cost is measured.
+
+Run from the repository root:
+    python -m benchmarks.bench_numpy_policy
+"""
+import json
+import subprocess
+import sys
+
+LOADERS = {
+    "stable-baselines3": (
+        "from stable_baselines3 import PPO\n"
+        "model = PPO.load('models/energy_agent_preferences.zip', device='cpu')\n"
+    ),
+    "numpy": (
+        "from numpy_policy import NumpyPolicy\n"
+        "model = NumpyPolicy.load('models/energy_agent_preferences.npz')\n"
+    ),
+}
+
+PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+{loader}
+load_s = time.perf_counter() - t0
+import numpy as np
+obs = np.zeros(model.observation_space.shape if hasattr(model, "observation_space") else model.obs_dim, dtype=np.float32)
+for _ in range(100):
+    model.predict(obs, deterministic=True)
+t0 = time.perf_counter()
+for _ in range(2000):
+    model.predict(obs, deterministic=True)
+step_us = (time.perf_counter() - t0) / 2000 * 1e6
+print(json.dumps({{
+    "load_s": load_s,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "step_us": step_us,
+    "torch_imported": "torch" in sys.modules,
+}}))
+"""
+
+
+def agreement(samples=100_000):
+    import numpy as np
+    from stable_baselines3 import PPO
+    from numpy_policy import NumpyPolicy
+
+    model = PPO.load("models/energy_agent_preferences.zip", device="cpu")
+    policy = NumpyPolicy.load("models/energy_agent_preferences.npz")
+    rng = np.random.default_rng(0)
+    obs = rng.random((samples, policy.obs_dim)).astype(np.float32)
+    obs[:, 1:] = obs[:, 1:] > 0.5
+    expected, _ = model.predict(obs, deterministic=True)
+    actual, _ = policy.predict(obs, deterministic=True)
+    return int((expected != actual).any(axis=1).sum())
+
+
+if __name__ == "__main__":
+    for name, loader in LOADERS.items():
+        out = subprocess.run([sys.executable, "-c", PROBE.format(loader=loader)],
+                             capture_output=True, text=True, check=True)
+        stats = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{name:>18}: import+load {stats['load_s']:.2f}s, max RSS {stats['max_rss_mb']:.0f} MB, "
+              f"predict {stats['step_us']:.1f} µs/step, torch imported: {stats['torch_imported']}")
+    print(f"action mismatches on 100,000 random observations: {agreement()}")
@@ -0,0 +1,56 @@
+"""
+Cold load vs hot access through the policy pool, for every model format,
+plus LRU eviction under a tight budget and many threads sharing one copy.
+
+Run from the repository root:
+    python -m benchmarks.bench_policy_pool
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from policy_pool import PolicyPool, policy_nbytes
+
+MODELS = [
+    "models/energy_agent_preferences_table.npz",
+    "models/energy_agent_preferences.npz",
+    "models/energy_agent_preferences.zip",
+]
+OBS = np.array([[0.5, 1, 0, 1, 1]], dtype=np.float32)
+
+
+def hot_get_us(pool, path, repeats=20_000):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        pool.get(path)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+if __name__ == "__main__":
+    pool = PolicyPool(max_bytes=1 << 30)
+    print(f"{'model':<45} {'size':>10} {'cold load':>11} {'hot get':>9} {'predict':>9}")
+    for path in MODELS:
+        start = time.perf_counter()
+        policy = pool.get(path)
+        cold = time.perf_counter() - start
+        hot = hot_get_us(pool, path)
+        start = time.perf_counter()
+        for _ in range(1000):
+            pool.get(path).predict(OBS, deterministic=True)
+        predict_us = (time.perf_counter() - start) / 1000 * 1e6
+        print(f"{path:<45} {policy_nbytes(policy):>9,}B {cold * 1e3:>9.1f}ms {hot:>7.2f}us {predict_us:>7.1f}us")
+    print(f"stats: {dict((k, v) for k, v in pool.stats().items() if k != 'resident')}")
+
+    # Budget that fits the two NumPy artifacts but not the PPO model as well
+    small = PolicyPool(max_bytes=policy_nbytes(pool.get(MODELS[0])) + policy_nbytes(pool.get(MODELS[1])))
+    for path in MODELS + MODELS[:2] + MODELS[:2]:
+        small.get(path)
+    stats = small.stats()
+    print(f"\nTight budget ({stats['max_bytes']:,}B): resident {list(map(lambda p: p.rsplit('/', 1)[-1], stats['resident']))}, "
+          f"hits {stats['hits']}, misses {stats['misses']}, evictions {stats['evictions']}")
+
+    # Many threads asking for a cold policy at once trigger exactly one load
+    shared = PolicyPool(max_bytes=1 << 30)
+    with ThreadPoolExecutor(32) as threads:
+        copies = list(threads.map(lambda _: shared.get(MODELS[1]), range(256)))
+    print(f"\n256 concurrent gets from 32 threads: {len({id(c) for c in copies})} copy, "
+          f"{shared.stats()['misses']} load, {shared.stats()['hits']} hits")
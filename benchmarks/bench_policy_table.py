@@ -0,0 +1,56 @@
+"""
+Rollouts served from a distilled lookup table versus the NumPy network
+and the stable-baselines3 model, plus an action agreement check.
+
+Run from the repository root:
+    python -m benchmarks.bench_policy_table [--scenarios 10000]
+"""
+import argparse
+import time
+import numpy as np
+from numpy_policy import NumpyPolicy
+from policy_table import TablePolicy, distill_policy
+from rollout import rollout_batch
+from benchmarks.bench_rollout import APPLIANCES
+
+
+def timed(fn, repeat=5):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", type=int, default=10_000)
+    args = parser.parse_args()
+
+    network = NumpyPolicy.load("models/energy_agent_preferences.npz")
+    t0 = time.perf_counter()
+    table = distill_policy(network, 24, len(APPLIANCES))
+    print(f"distilled {table.table.size:,} states in {1e3 * (time.perf_counter() - t0):.1f} ms "
+          f"({table.nbytes:,} bytes)")
+    shipped = TablePolicy.load("models/energy_agent_preferences_table.npz")
+    assert np.array_equal(shipped.table, table.table)
+
+    prices = np.random.default_rng(0).uniform(0.01, 0.10, (args.scenarios, 24))
+    restricted = list(range(0, 6))
+    single = prices[:1]
+
+    for name, policy in [("numpy network", network), ("lookup table", table)]:
+        batch = timed(lambda: rollout_batch(policy, prices, APPLIANCES, restricted))
+        one = timed(lambda: rollout_batch(policy, single, APPLIANCES, restricted), repeat=200)
+        print(f"{name:>14}: {args.scenarios / batch:,.0f} scenarios/s batched, "
+              f"{1e6 * one:.0f} µs for a single schedule")
+
+    durations = [a["duration"] for a in APPLIANCES]
+    one = timed(lambda: table.schedule(durations, restricted), repeat=2000)
+    expected = rollout_batch(table, single, APPLIANCES, restricted)["hours"][0]
+    assert np.array_equal(table.schedule(durations, restricted), expected)
+    print(f"{'table.schedule':>14}: {1e6 * one:.1f} µs for a single schedule")
+
+    a = rollout_batch(network, prices, APPLIANCES, restricted)["hours"]
+    b = rollout_batch(table, prices, APPLIANCES, restricted)["hours"]
+    print(f"schedules differing from the network: {(a != b).any(axis=(1, 2)).sum()}")
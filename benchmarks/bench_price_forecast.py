@@ -0,0 +1,29 @@
+"""
+Backtest the price forecasters on a synthetic 5-minute feed.
+
+Run from the repository root:
+    python -m benchmarks.bench_price_forecast
+"""
+import numpy as np
+from price_forecast import backtest, MS_PER_HOUR
+
+
+def synthetic_feed(days=60, seed=0):
+    """ComEd-like 5-minute prices ($/kWh): daily shape, slow drift, noise and spikes."""
+    rng = np.random.default_rng(seed)
+    steps = days * 24 * 12
+    start = 1_700_000_000_000 // MS_PER_HOUR * MS_PER_HOUR
+    millis = start + np.arange(steps, dtype=np.int64) * 300_000
+
+    hour = (millis // MS_PER_HOUR) % 24
+    daily = 0.03 + 0.02 * np.exp(-((hour - 17) ** 2) / 8.0) - 0.01 * np.exp(-((hour - 4) ** 2) / 6.0)
+    drift = 0.005 * np.sin(np.arange(steps) / (steps / 6.0))
+    noise = rng.normal(0.0, 0.004, steps)
+    spikes = (rng.random(steps) < 0.002) * rng.uniform(0.05, 0.2, steps)
+    return millis, daily + drift + noise + spikes
+
+
+if __name__ == "__main__":
+    millis, prices = synthetic_feed()
+    print(f"{millis.size:,} five-minute points ({millis.size // 288} days)")
+    print(backtest(millis, prices).round(5))
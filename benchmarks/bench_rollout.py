@@ -0,0 +1,54 @@
+"""
+Batched policy rollouts versus one env loop per scenario, using the
+shipped preference agent.
+
+Run from the repository root:
+    python -m benchmarks.bench_rollout [--scenarios 1000]
+"""
+import argparse
+import time
+import numpy as np
+from stable_baselines3 import PPO
+from energy_env_with_preferences import EnergyEnvWithPreferences
+from rollout import rollout_batch
+
+APPLIANCES = [
+    {"name": "Washing Machine", "power": 0.30, "duration": 2},
+    {"name": "Dryer", "power": 2.50, "duration": 2},
+    {"name": "Dishwasher", "power": 1.50, "duration": 1},
+    {"name": "Computer", "power": 0.30, "duration": 5},
+]
+
+
+def env_loop(model, prices, restricted_hours):
+    """One scenario stepped through the env, one predict call per hour."""
+    env = EnergyEnvWithPreferences(prices, APPLIANCES, restricted_hours)
+    obs, _ = env.reset()
+    done = False
+    while not done:
+        action, _ = model.predict(obs, deterministic=True)
+        obs, _, done, _, _ = env.step(action)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", type=int, default=1000)
+    parser.add_argument("--model", default="models/energy_agent_preferences.zip")
+    args = parser.parse_args()
+
+    model = PPO.load(args.model, device="cpu")
+    prices = np.random.default_rng(0).uniform(0.01, 0.10, (args.scenarios, 24))
+    restricted = list(range(0, 6))
+
+    t0 = time.perf_counter()
+    result = rollout_batch(model, prices, APPLIANCES, restricted)
+    elapsed = time.perf_counter() - t0
+    print(f"rollout_batch: {args.scenarios:,} scenarios in {elapsed:.3f}s "
+          f"({args.scenarios / elapsed:,.0f} scenarios/s), mean cost ${result['cost'].mean():.3f}")
+
+    sample = min(args.scenarios, 50)
+    t0 = time.perf_counter()
+    for p in prices[:sample]:
+        env_loop(model, p, restricted)
+    rate = sample / (time.perf_counter() - t0)
+    print(f"per-scenario env loop: {rate:,.0f} scenarios/s")
@@ -0,0 +1,150 @@
+"""
+Load generator for the HTTP scheduling service (service.py).
+
+Starts the service (or targets --url), then drives each endpoint with a
+fixed number of concurrent clients for a few seconds and reports p50/p99
+latency and requests/sec. With --compare-batching the policy endpoints are
+also measured against a second service started with micro-batching off.
+
+Run from the repository root:
+    python -m benchmarks.bench_service [--concurrency 64] [--seconds 5] [--compare-batching]
+"""
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import aiohttp
+import numpy as np
+
+APPLIANCES = [
+    {"name": "Washing Machine", "power": 0.3, "duration": 2},
+    {"name": "Dryer", "power": 2.5, "duration": 2},
+    {"name": "Dishwasher", "power": 1.5, "duration": 1},
+    {"name": "Computer", "power": 0.1, "duration": 5},
+]
+PREFERENCES = {"Dryer": {"preferred_hours": [10, 11, 12], "avoid_hours": [0, 1, 2], "avoid_penalty": 3.0}}
+
+
+def request_factories(seed=0):
+    """Endpoint -> function returning a fresh (path, JSON body) for each request."""
+    rng = np.random.default_rng(seed)
+
+    def prices():
+        return np.round(0.04 + 0.02 * rng.random(24), 4).tolist()
+
+    def obs():
+        return [float(rng.integers(0, 24)) / 24] + rng.integers(0, 2, 4).astype(float).tolist()
+
+    return {
+        "predict": lambda: ("/policies/energy_agent_preferences/predict", {"obs": obs()}),
+        "schedule": lambda: ("/policies/energy_agent_preferences_table/schedule",
+                             {"prices": prices(), "appliances": APPLIANCES,
+                              "restricted_hours": [0, 1, 2, 3], "preferences": PREFERENCES}),
+        "comfort": lambda: ("/comfort", {"schedule": {"Dryer": rng.choice(24, 2, replace=False).tolist()},
+                                         "preferences": PREFERENCES}),
+        # Fresh prices every time, so each request is a real solve rather than a cache hit
+        "optimize": lambda: ("/optimize", {"prices": prices(), "appliances": APPLIANCES,
+                                           "restricted_hours": [0, 1, 2, 3]}),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def start_service(port, extra_args=()):
+    service = subprocess.Popen([sys.executable, "service.py", "--port", str(port), *extra_args],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1)
+            return service
+        except OSError:
+            time.sleep(0.2)
+    service.kill()
+    raise RuntimeError("Service did not start")
+
+
+async def drive(url, make_request, concurrency, seconds):
+    """Closed-loop load: `concurrency` clients each send requests back to back."""
+    latencies, errors = [], 0
+    stop = time.perf_counter() + seconds
+
+    async def client(session):
+        nonlocal errors
+        while time.perf_counter() < stop:
+            path, body = make_request()
+            start = time.perf_counter()
+            async with session.post(url + path, json=body) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1e3
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def report(label, stats):
+    print(f"{label:<28} {stats['rps']:>9,.0f} req/s   p50 {stats['p50_ms']:7.2f} ms   "
+          f"p99 {stats['p99_ms']:7.2f} ms   ({stats['requests']:,} requests, {stats['errors']} errors)")
+
+
+def run_suite(url, endpoints, concurrency, seconds, label=""):
+    factories = request_factories()
+    for endpoint in endpoints:
+        report(f"{endpoint}{label}", asyncio.run(drive(url, factories[endpoint], concurrency, seconds)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="Use a running service instead of starting one")
+    parser.add_argument("--endpoints", default="predict,schedule,comfort,optimize")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--compare-batching", action="store_true",
+                        help="Also measure predict/schedule with micro-batching disabled")
+    args = parser.parse_args()
+    endpoints = args.endpoints.split(",")
+
+    print(f"{args.concurrency} concurrent clients, {args.seconds:.0f}s per endpoint")
+    if args.url:
+        run_suite(args.url.rstrip("/"), endpoints, args.concurrency, args.seconds)
+        sys.exit()
+
+    configs = [("", ())]
+    if args.compare_batching:
+        configs.append((" (no batching)", ("--max-batch", "1")))
+    for label, extra_args in configs:
+        port = free_port()
+        service = start_service(port, extra_args)
+        try:
+            suite = endpoints if not label else [e for e in endpoints if e in ("predict", "schedule")]
+            run_suite(f"http://127.0.0.1:{port}", suite, args.concurrency, args.seconds, label)
+            policies = json.load(urllib.request.urlopen(f"http://127.0.0.1:{port}/policies"))["policies"]
+            print("  mean batch: " + ", ".join(
+                f"{name}/{kind} {stats[kind]['mean_batch']:.1f}"
+                for name, stats in policies.items() for kind in ("predict", "schedule")
+                if stats[kind]["requests"]))
+        finally:
+            service.terminate()
+            service.wait()
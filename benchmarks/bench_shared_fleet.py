@@ -0,0 +1,128 @@
+"""
+Per-task overhead of handing fleet data to pool workers:
+
+    pickle fleet    every task carries the whole fleet (executor.submit(fn, fleet, lo, hi))
+    pickle slices   every task carries its households' rows plus all price curves
+    shared          workers attach once to shared_fleet.SharedArrays; tasks are (lo, hi)
+
+Each mode runs a no-op task (touches its rows, returns a number) to isolate
+the transfer cost, and the real cheapest-hours scheduling of the fleet
+(pickled mode returns its results, shared mode writes them in place). Pools
+are started before the clock does, so only the tasks are timed.
+
+Run from the repository root:
+    python -m benchmarks.bench_shared_fleet [--households 200000] [--chunk 2000] [--workers 2]
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import shared_fleet
+from shared_fleet import INPUTS, OUTPUTS, SharedArrays, household_ranges, schedule_range
+from synthetic_fleet import generate_fleet
+
+
+def _touch(arrays, lo, hi):
+    r0, r1 = arrays["offsets"][lo], arrays["offsets"][hi]
+    return float(arrays["power"][r0:r1].sum())
+
+
+def _slice(fleet, lo, hi):
+    """The rows of households lo:hi, re-based to start at 0, plus the price curves."""
+    r0, r1 = fleet["offsets"][lo], fleet["offsets"][hi]
+    return {
+        "offsets": fleet["offsets"][lo:hi + 1] - r0,
+        "power": fleet["power"][r0:r1],
+        "duration": fleet["duration"][r0:r1],
+        "restricted": fleet["restricted"][lo:hi],
+        "prices": fleet["prices"],
+    }
+
+
+def noop_pickled(arrays, lo, hi):
+    return _touch(arrays, lo, hi)
+
+
+def schedule_pickled(arrays, lo, hi):
+    return schedule_range(arrays, lo, hi)
+
+
+def noop_shared(lo, hi, day):
+    return _touch(shared_fleet._worker, lo, hi)
+
+
+def _warm_pool(pool, workers):
+    """Start every worker (and run its initializer) so only the tasks are timed."""
+    for f in [pool.submit(time.sleep, 0.05) for _ in range(workers)]:
+        f.result()
+
+
+def run_pickled(task, fleet, ranges, workers, sliced):
+    with ProcessPoolExecutor(workers) as pool:
+        _warm_pool(pool, workers)
+        start = time.perf_counter()
+        if sliced:
+            futures = [pool.submit(task, _slice(fleet, lo, hi), 0, hi - lo) for lo, hi in ranges]
+        else:
+            futures = [pool.submit(task, fleet, lo, hi) for lo, hi in ranges]
+        for f in futures:
+            f.result()
+        return time.perf_counter() - start
+
+
+def run_shared(task, fleet, ranges, workers):
+    with SharedArrays({name: fleet[name] for name in INPUTS}) as shared:
+        for name, dtype in OUTPUTS.items():
+            shared.empty(name, fleet["offsets"][-1] if name == "hours_mask" else len(fleet["offsets"]) - 1, dtype)
+        with ProcessPoolExecutor(workers, initializer=shared_fleet._init_worker, initargs=(shared.spec,)) as pool:
+            _warm_pool(pool, workers)
+            start = time.perf_counter()
+            for f in [pool.submit(task, lo, hi, 0) for lo, hi in ranges]:
+                f.result()
+            return time.perf_counter() - start
+
+
+def run_empty(ranges, workers):
+    """Tasks that carry nothing: the floor for every mode."""
+    with ProcessPoolExecutor(workers) as pool:
+        _warm_pool(pool, workers)
+        start = time.perf_counter()
+        for f in [pool.submit(int, lo) for lo, _ in ranges]:
+            f.result()
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--households", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--chunk", type=int, default=2_000, help="Households per task")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--full-tasks", type=int, default=20,
+                        help="Tasks to time in 'pickle fleet' mode, which is slow")
+    args = parser.parse_args()
+
+    fleet = generate_fleet(args.households, args.days, seed=0)
+    fleet = {name: fleet[name] for name in INPUTS}
+    ranges = household_ranges(args.households, args.chunk)
+    nbytes = sum(a.nbytes for a in fleet.values())
+    slice_bytes = np.mean([sum(a.nbytes for a in _slice(fleet, lo, hi).values()) for lo, hi in ranges])
+    print(f"{args.households:,} households, {len(ranges)} tasks of {args.chunk:,}, {args.workers} workers; "
+          f"fleet {nbytes / 2**20:.1f} MB, slice {slice_bytes / 2**10:.0f} KB per task")
+
+    floor = run_empty(ranges, args.workers) / len(ranges)
+    print(f"\n{'no-op task':<16} {'per task':>10} {'overhead':>10}")
+    full_ranges = ranges[:args.full_tasks]
+    for label, seconds, tasks in [
+        ("pickle fleet", run_pickled(noop_pickled, fleet, full_ranges, args.workers, False), len(full_ranges)),
+        ("pickle slices", run_pickled(noop_pickled, fleet, ranges, args.workers, True), len(ranges)),
+        ("shared", run_shared(noop_shared, fleet, ranges, args.workers), len(ranges)),
+    ]:
+        print(f"{label:<16} {seconds / tasks * 1e3:>8.2f}ms {(seconds / tasks - floor) * 1e3:>8.2f}ms")
+
+    print(f"\n{'scheduling':<16} {'wall':>10} {'households/s':>14}")
+    for label, seconds in [
+        ("pickle slices", run_pickled(schedule_pickled, fleet, ranges, args.workers, True)),
+        ("shared", run_shared(shared_fleet._schedule_shared, fleet, ranges, args.workers)),
+    ]:
+        print(f"{label:<16} {seconds:>9.2f}s {args.households / seconds:>14,.0f}")
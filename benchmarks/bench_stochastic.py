@@ -0,0 +1,79 @@
+"""
+Stochastic (sample-average) scheduling with optimizer.optimize_schedule_stochastic.
+
+Solve time of the CVaR model as the scenario count grows, for the
+cutting-plane decomposition against the extensive form (one tail variable
+and constraint per scenario); both reach the same objective.
+
+Out-of-sample cost of the schedules on held-out days: optimize_schedule_lp
+on a single price vector (the last history day), the expected-cost schedule,
+and a CVaR blend, all fitted on scenarios bootstrapped from the history.
+
+Run from the repository root:
+    python -m benchmarks.bench_stochastic [--scenarios 25,100,250,500,1000] [--appliances 8]
+"""
+import argparse
+import time
+import numpy as np
+from optimizer import bootstrap_price_scenarios, cvar, optimize_schedule_lp, optimize_schedule_stochastic, scenario_costs
+from synthetic_fleet import generate_prices
+from utils.appliance_data import appliance_defaults
+
+RESTRICTED_HOURS = [18, 19, 20]
+
+
+def make_appliances(count, seed=0):
+    rng = np.random.default_rng(seed)
+    names = list(appliance_defaults)
+    return [
+        {"name": f"{names[i % len(names)]} {i}", "power": float(appliance_defaults[names[i % len(names)]]),
+         "duration": int(rng.integers(1, 6))}
+        for i in range(count)
+    ]
+
+
+def time_solve(scenarios, appliances, method, risk, alpha):
+    start = time.perf_counter()
+    _, stats = optimize_schedule_stochastic(scenarios, appliances, RESTRICTED_HOURS, risk, alpha, method=method)
+    return time.perf_counter() - start, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default="25,100,250,500,1000")
+    parser.add_argument("--appliances", type=int, default=8)
+    parser.add_argument("--risk", type=float, default=0.5)
+    parser.add_argument("--alpha", type=float, default=0.95)
+    parser.add_argument("--max-extensive", type=int, default=1000,
+                        help="Largest scenario count to solve in extensive form, which is slow")
+    parser.add_argument("--history-days", type=int, default=300)
+    parser.add_argument("--test-days", type=int, default=65)
+    args = parser.parse_args()
+
+    prices = generate_prices(args.history_days + args.test_days, seed=0)
+    history, test = prices[:args.history_days], prices[args.history_days:]
+    appliances = make_appliances(args.appliances)
+    power = np.array([a["power"] for a in appliances])
+    print(f"{len(appliances)} appliances, risk {args.risk}, CVaR at {args.alpha:.0%}")
+
+    print(f"\n{'scenarios':>10} {'method':<10} {'seconds':>8} {'iters':>6} {'objective':>10}")
+    for num_scenarios in map(int, args.scenarios.split(",")):
+        scenarios = bootstrap_price_scenarios(history, num_scenarios, seed=1)
+        for method in ("cuts", "extensive"):
+            if method == "extensive" and num_scenarios > args.max_extensive:
+                continue
+            seconds, stats = time_solve(scenarios, appliances, method, args.risk, args.alpha)
+            print(f"{num_scenarios:>10} {method:<10} {seconds:>8.2f} {stats['iterations']:>6} {stats['objective']:>10.4f}")
+
+    scenarios = bootstrap_price_scenarios(history, 250, seed=1)
+    schedules = {
+        "single day": optimize_schedule_lp(history[-1], appliances, RESTRICTED_HOURS)[0],
+        "expected": optimize_schedule_stochastic(scenarios, appliances, RESTRICTED_HOURS)[0],
+        f"cvar {args.risk:g}": optimize_schedule_stochastic(scenarios, appliances, RESTRICTED_HOURS,
+                                                           args.risk, args.alpha)[0],
+    }
+    print(f"\nOut of sample, {len(test)} held-out days:")
+    print(f"{'schedule':<12} {'mean $':>8} {'cvar $':>8} {'worst $':>8}")
+    for label, schedule in schedules.items():
+        costs = scenario_costs(test, power, schedule.hours)
+        print(f"{label:<12} {costs.mean():>8.3f} {cvar(costs, args.alpha):>8.3f} {costs.max():>8.3f}")
@@ -0,0 +1,35 @@
+"""
+Time to generate, save and memory-map synthetic fleets of growing size.
+
+Run from the repository root:
+    python -m benchmarks.bench_synthetic_fleet [--households 10000,100000,1000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+from synthetic_fleet import generate_fleet, load_fleet, save_fleet
+
+
+def directory_mb(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 2**20
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--households", default="10000,100000,1000000")
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    print(f"{'households':>12} {'rows':>12} {'generate':>10} {'save':>8} {'load':>8} {'size':>9}")
+    for num_households in map(int, args.households.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            t0 = time.perf_counter()
+            fleet = generate_fleet(num_households, args.days, seed=0)
+            t1 = time.perf_counter()
+            save_fleet(fleet, tmp, seed=0)
+            t2 = time.perf_counter()
+            loaded = load_fleet(tmp)
+            t3 = time.perf_counter()
+            print(f"{num_households:>12,} {loaded['meta']['rows']:>12,} {t1 - t0:>9.2f}s {t2 - t1:>7.2f}s "
+                  f"{(t3 - t2) * 1e3:>6.1f}ms {directory_mb(tmp):>6.1f} MB")
@@ -0,0 +1,91 @@
+"""
+Training throughput as concurrent submissions grow: every job trained on
+its own thread in one process (what jobs.py used to do) vs the training
+scheduler's pinned worker slots.
+
+Each submission is a distinct scenario, so nothing is deduplicated. Jobs
+per minute should stay flat for the scheduler as load grows beyond its
+slot count, while the in-process threads fight over torch's thread pools.
+
+Run from the repository root:
+    python -m benchmarks.bench_training_scheduler [--jobs 1,2,4,8] [--timesteps 4096] [--slots N]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from training_scheduler import TrainingScheduler, usable_cores
+
+APPLIANCES = [
+    {"name": "Washing Machine", "power": 0.3, "duration": 2},
+    {"name": "Dryer", "power": 2.5, "duration": 2},
+    {"name": "Dishwasher", "power": 1.5, "duration": 1},
+]
+PREFERENCES = {"Dryer": {"preferred_hours": [10, 11, 12], "avoid_hours": [0, 1, 2], "avoid_penalty": 3.0}}
+RESTRICTED = [0, 1, 2, 3]
+
+
+def scenarios(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [(0.04 + 0.02 * rng.random(24)).tolist() for _ in range(n)]
+
+
+def run_threads(all_prices, timesteps):
+    from train_agent_with_preferences import train_agent_with_preferences
+
+    def train(prices):
+        train_agent_with_preferences(prices, APPLIANCES, RESTRICTED, PREFERENCES,
+                                     total_timesteps=timesteps, save=False)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(len(all_prices)) as threads:
+        list(threads.map(train, all_prices))
+    return time.perf_counter() - start, None
+
+
+def run_scheduler(scheduler, all_prices, timesteps):
+    start = time.perf_counter()
+    jobs = [scheduler.submit(prices, APPLIANCES, RESTRICTED, PREFERENCES, total_timesteps=timesteps)
+            for prices in all_prices]
+    max_depth = scheduler.stats()["queue_depth"]
+    for job in jobs:
+        job.future.result()
+    elapsed = time.perf_counter() - start
+    waits = [job.wait_seconds for job in jobs]
+    return elapsed, {"max_queue_depth": max_depth, "mean_wait_s": float(np.mean(waits)),
+                     "max_wait_s": float(np.max(waits))}
+
+
+def report(label, n, elapsed, extra):
+    line = f"{label:<22} {n:>4} jobs  {elapsed:7.1f}s  {n / elapsed * 60:6.1f} jobs/min"
+    if extra:
+        line += (f"   queue depth {extra['max_queue_depth']}, wait mean {extra['mean_wait_s']:.1f}s "
+                 f"max {extra['max_wait_s']:.1f}s")
+    print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", default="1,2,4,8", help="Concurrent submissions to measure")
+    parser.add_argument("--timesteps", type=int, default=4096)
+    parser.add_argument("--slots", type=int, help="Scheduler slots (default: one per usable core)")
+    parser.add_argument("--threads-per-job", type=int, default=1)
+    parser.add_argument("--skip-threads", action="store_true", help="Only measure the scheduler")
+    args = parser.parse_args()
+
+    scheduler = TrainingScheduler(args.slots, args.threads_per_job)
+    print(f"{len(usable_cores())} usable cores; scheduler: {scheduler.num_slots} slots x "
+          f"{scheduler.threads_per_job} thread(s); {args.timesteps:,} timesteps per job")
+
+    # Start every slot process and import torch there, so the first measurement is not a cold start
+    scheduler.submit(scenarios(1, seed=1)[0], APPLIANCES, RESTRICTED, PREFERENCES,
+                     total_timesteps=args.timesteps).future.result()
+    try:
+        for n in map(int, args.jobs.split(",")):
+            all_prices = scenarios(n)
+            if not args.skip_threads:
+                report("in-process threads", n, *run_threads(all_prices, args.timesteps))
+            report("scheduler", n, *run_scheduler(scheduler, all_prices, args.timesteps))
+        print(f"stats: {scheduler.stats()}")
+    finally:
+        scheduler.shutdown()
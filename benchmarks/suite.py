@@ -0,0 +1,315 @@
+"""
+Performance regression suite.
+
+Runs a fixed, seeded set of micro-benchmarks over the core code paths and
+compares them with the stored baselines in benchmarks/baselines.json. The
+run fails (exit code 1) when any metric is worse than its baseline by more
+than the threshold (default 25%, --threshold or BENCH_THRESHOLD).
+
+Shared and cloud machines often change speed by tens of percent from one
+minute to the next. Before each benchmark a fixed calibration workload is
+timed, and metrics are compared relative to it, so a machine that is
+uniformly slower right now is not reported as a regression
+(--no-calibrate compares raw numbers).
+
+Everything runs offline: ComEd parsing uses the recorded feed in
+benchmarks/data/comed_5minutefeed.json, and the rollout uses the shipped
+agent under models/.
+
+Run from the repository root:
+    python -m benchmarks.suite                      # compare with baselines
+    python -m benchmarks.suite --only lp,comfort    # a subset
+    python -m benchmarks.suite --update-baseline    # record this machine's numbers
+    python -m benchmarks.suite --record-feed        # replace the recorded feed (needs network)
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+
+BASELINE_PATH = "benchmarks/baselines.json"
+FEED_PATH = "benchmarks/data/comed_5minutefeed.json"
+DEFAULT_THRESHOLD = 0.25
+
+APPLIANCES = [
+    {"name": "Washing Machine", "power": 0.3, "duration": 2},
+    {"name": "Dryer", "power": 2.5, "duration": 2},
+    {"name": "Dishwasher", "power": 1.5, "duration": 1},
+    {"name": "Computer", "power": 0.1, "duration": 5},
+]
+PREFERENCES = {
+    "Washing Machine": {"preferred_hours": [8, 9, 10], "avoid_hours": [22, 23], "avoid_penalty": 2.0},
+    "Dryer": {"preferred_hours": [10, 11, 12], "avoid_hours": [0, 1, 2], "avoid_penalty": 3.0},
+    "Dishwasher": {"preferred_hours": [20, 21], "avoid_hours": [7, 8], "preferred_bonus": 2.0},
+}
+RESTRICTED = [0, 1, 2, 3]
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register `fn() -> {metric: (value, unit, higher_is_better)}` under `name`."""
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def best_time(fn, number=1, repeats=7):
+    """Fastest of `repeats` runs, in seconds per call (the least noisy estimate)."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def calibrate():
+    """Seconds for a fixed mix of interpreter and NumPy work, the yardstick for this machine's current speed."""
+    data = np.random.default_rng(0).random(200_000)
+
+    def work():
+        total = 0
+        for i in range(100_000):
+            total += i % 7
+        np.sort(data)
+
+    return best_time(work)
+
+
+def normalized(value, higher_is_better, calibration):
+    """Metric in calibration units, comparable across machine speed changes."""
+    return value * calibration if higher_is_better else value / calibration
+
+
+def day_prices(num_hours=24, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.round(0.04 + 0.02 * rng.random(num_hours), 4).tolist()
+
+
+# ----------------------------------------------------------------------
+# Benchmarks
+# ----------------------------------------------------------------------
+def _steps_per_second(env, steps=5000):
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, 2, (steps, env.num_appliances))
+
+    def run():
+        env.reset(seed=0)
+        for action in actions:
+            _, _, done, _, _ = env.step(action)
+            if done:
+                env.reset()
+
+    return steps / best_time(run)
+
+
+@benchmark("env_step")
+def bench_env_step():
+    from energy_env import EnergyEnv
+    from energy_env_with_preferences import EnergyEnvWithPreferences
+
+    prices = day_prices()
+    return {
+        "EnergyEnv": (_steps_per_second(EnergyEnv(prices, APPLIANCES, RESTRICTED)), "steps/s", True),
+        "EnergyEnvWithPreferences": (
+            _steps_per_second(EnergyEnvWithPreferences(prices, APPLIANCES, RESTRICTED, PREFERENCES)),
+            "steps/s", True),
+    }
+
+
+@benchmark("lp")
+def bench_lp():
+    from optimizer import optimize_schedule_lp
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for num_appliances in (2, 5, 10):
+        appliances = [{"name": f"Appliance {i}", "power": float(rng.uniform(0.1, 3.0)),
+                       "duration": int(rng.integers(1, 5))} for i in range(num_appliances)]
+        for num_hours in (24, 48, 96):
+            prices = day_prices(num_hours, seed=num_hours)
+            seconds = best_time(lambda: optimize_schedule_lp(prices, appliances, RESTRICTED))
+            results[f"{num_appliances}_appliances_{num_hours}h"] = (seconds * 1e3, "ms", False)
+    return results
+
+
+@benchmark("ppo_train")
+def bench_ppo_train(timesteps=4096):
+    import torch
+    from train_agent_with_preferences import train_agent_with_preferences
+
+    torch.manual_seed(0)
+    torch.set_num_threads(1)
+    start = time.perf_counter()
+    train_agent_with_preferences(day_prices(), APPLIANCES, RESTRICTED, PREFERENCES,
+                                 total_timesteps=timesteps, save=False)
+    return {"fps": (timesteps / (time.perf_counter() - start), "steps/s", True)}
+
+
+@benchmark("rollout")
+def bench_rollout():
+    from stable_baselines3 import PPO
+    from train_agent_with_preferences import run_agent_with_preferences
+
+    model = PPO.load("models/energy_agent_preferences.zip", device="cpu")
+    prices = day_prices()
+    seconds = best_time(
+        lambda: run_agent_with_preferences(model, prices, APPLIANCES, RESTRICTED, PREFERENCES), number=20)
+    return {"run_agent_with_preferences": (seconds * 1e3, "ms", False)}
+
+
+@benchmark("comfort")
+def bench_comfort():
+    from train_agent_with_preferences import calculate_comfort_score
+
+    rng = np.random.default_rng(0)
+    schedules = [{a["name"]: sorted(rng.choice(24, a["duration"], replace=False).tolist()) for a in APPLIANCES}
+                 for _ in range(1000)]
+
+    def run():
+        for schedule in schedules:
+            calculate_comfort_score(schedule, PREFERENCES)
+
+    return {"calculate_comfort_score": (len(schedules) / best_time(run), "calls/s", True)}
+
+
+@benchmark("comed_parse")
+def bench_comed_parse():
+    import pytz
+    import pandas as pd
+    from fetch_live_prices import hourly_prices, parse_comed_feed
+
+    with open(FEED_PATH) as f:
+        feed = json.load(f)
+    tz = pytz.timezone("America/Chicago")
+    # "Now" is pinned to the newest recorded point, so the 36-hour window is the same on every run
+    now = pd.Timestamp(max(int(p["millisUTC"]) for p in feed), unit="ms", tz="UTC").tz_convert(tz)
+
+    seconds = best_time(lambda: hourly_prices(parse_comed_feed(feed), now, tz), number=20)
+    return {"fetch_comed_prices_parse": (seconds * 1e3, "ms", False)}
+
+
+# ----------------------------------------------------------------------
+# Baselines
+# ----------------------------------------------------------------------
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold, calibrated=True):
+    """
+    Rows of (metric, value, unit, baseline value, relative change, status);
+    status is ok/REGRESSION/new. With `calibrated` the change is computed on
+    calibration-normalized values.
+    """
+    key = "normalized" if calibrated else "value"
+    rows = []
+    for metric, result in results.items():
+        value, unit, higher_is_better = result["value"], result["unit"], result["higher_is_better"]
+        reference = baseline.get(metric)
+        if reference is None or key not in reference:
+            rows.append((metric, value, unit, None, None, "new"))
+            continue
+        change = (result[key] - reference[key]) / reference[key]
+        worse = -change if higher_is_better else change
+        rows.append((metric, value, unit, reference["value"], change,
+                     "REGRESSION" if worse > threshold else "ok"))
+    return rows
+
+
+def record_feed(path=FEED_PATH):
+    import requests
+    r = requests.get("https://hourlypricing.comed.com/api?type=5minutefeed",
+                     headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+    r.raise_for_status()
+    with open(path, "w") as f:
+        json.dump(r.json(), f)
+    print(f"✅ Recorded {len(r.json())} points to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Performance regression suite")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float,
+                        default=float(os.environ.get("BENCH_THRESHOLD", DEFAULT_THRESHOLD)),
+                        help="Allowed relative slowdown before a metric fails (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run's numbers as the baseline")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="Run the suite this many times and use each metric's median")
+    parser.add_argument("--no-calibrate", action="store_true",
+                        help="Compare raw numbers instead of calibration-normalized ones")
+    parser.add_argument("--json", help="Also write this run's results to a JSON file")
+    parser.add_argument("--record-feed", action="store_true", help="Fetch the live ComEd feed into the fixture and exit")
+    args = parser.parse_args()
+
+    if args.record_feed:
+        record_feed()
+        sys.exit()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    stored = {"machine": None, "results": {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+
+    runs = []
+    for run in range(args.runs):
+        np.random.seed(0)
+        measurements = {}
+        for name in names:
+            start = time.perf_counter()
+            calibration = calibrate()
+            for metric, (value, unit, higher) in BENCHMARKS[name]().items():
+                measurements[f"{name}/{metric}"] = (value, unit, higher, normalized(value, higher, calibration))
+            print(f"⏱️ {name} ({time.perf_counter() - start:.1f}s, calibration {calibration * 1e3:.1f}ms)",
+                  file=sys.stderr)
+        runs.append(measurements)
+    results = {
+        metric: {"value": float(np.median([r[metric][0] for r in runs])), "unit": unit, "higher_is_better": higher,
+                 "normalized": float(np.median([r[metric][3] for r in runs]))}
+        for metric, (_, unit, higher, _) in runs[0].items()
+    }
+
+    rows = compare(results, stored["results"], args.threshold, calibrated=not args.no_calibrate)
+    print(f"\n{'metric':<50} {'value':>12} {'unit':<8} {'baseline':>12} {'change':>8}  status")
+    for metric, value, unit, reference, change, status in rows:
+        reference = f"{reference:12.4g}" if reference is not None else f"{'-':>12}"
+        change = f"{change:+8.1%}" if change is not None else f"{'-':>8}"
+        print(f"{metric:<50} {value:12.4g} {unit:<8} {reference} {change}  {status}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"machine": machine_info(), "results": results}, f, indent=2)
+
+    if args.update_baseline:
+        stored["results"].update(results)
+        stored["machine"] = machine_info()
+        with open(args.baseline, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n✅ Baseline updated: {args.baseline}")
+        sys.exit()
+
+    regressions = [row[0] for row in rows if row[5] == "REGRESSION"]
+    if stored["machine"] and stored["machine"] != machine_info():
+        print(f"\n⚠️ Baseline was recorded on a different machine: {stored['machine']}")
+    if regressions:
+        print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
@@ -0,0 +1,132 @@
+import numpy as np
+
+# Points per scheduled hour, see README "Scoring Formula"
+PREFER_POINTS = 10.0
+NEUTRAL_POINTS = 5.0
+AVOID_POINTS = -15.0
+
+# Quick presets: (avoid hours, preferred hours, avoid penalty, preferred bonus)
+PRESETS = {
+    "night_sleeper": (set(range(22, 24)) | set(range(0, 8)), set(range(10, 18)), 4.0, 2.0),
+    "early_bird": (set(range(20, 24)), set(range(6, 12)), 3.0, 2.5),
+    "night_owl": (set(range(6, 12)), set(range(18, 23)), 3.0, 2.5),
+    "clear": (set(), set(), 2.0, 1.0),
+}
+
+
+def _round1(x):
+    """
+    Round to one decimal exactly like Python's round(x, 1).
+
+    np.round scales by 10 first and loses the sub-ulp part of x, so values such
+    as 4.45 (stored slightly above 4.45) come out as 4.4. Here x * 10 is
+    computed exactly as t + err (x * 8 and x * 2 are exact, summed with TwoSum)
+    and compared against the midpoint; exact ties round half to even.
+    """
+    a, b = x * 8.0, x * 2.0
+    t = a + b
+    bv = t - a
+    err = (a - (t - bv)) + (b - bv)
+
+    lo = np.floor(t)
+    above_mid = (t - (lo + 0.5)) + err
+    up = (above_mid > 0) | ((above_mid == 0) & (lo % 2 == 1))
+    return (lo + up) / 10.0
+
+
+def preference_arrays(names, preferences, num_slots):
+    """
+    Convert a `{name: preference dict}` mapping into arrays aligned with `names`.
+
+    Returns:
+        Dict with
+            prefer, avoid: bool arrays (num_appliances, num_slots)
+            prefer_weight, avoid_weight: float arrays (num_appliances,)
+            scored: bool array (num_appliances,), True for appliances that have
+                preferences. Like the legacy dict-based scoring, a repeated
+                name only scores its last appliance.
+    """
+    num_appliances = len(names)
+    arrays = {
+        "prefer": np.zeros((num_appliances, num_slots), dtype=bool),
+        "avoid": np.zeros((num_appliances, num_slots), dtype=bool),
+        "prefer_weight": np.ones(num_appliances),
+        "avoid_weight": np.full(num_appliances, 2.0),
+        "scored": np.zeros(num_appliances, dtype=bool),
+    }
+
+    last_row = {name: i for i, name in enumerate(names)}
+    for name, i in last_row.items():
+        pref = preferences.get(name)
+        if pref is None:
+            continue
+        arrays["prefer"][i, [h for h in pref.get("preferred_hours", []) if 0 <= h < num_slots]] = True
+        arrays["avoid"][i, [h for h in pref.get("avoid_hours", []) if 0 <= h < num_slots]] = True
+        arrays["prefer_weight"][i] = pref.get("preferred_bonus", 1.0)
+        arrays["avoid_weight"][i] = pref.get("avoid_penalty", 2.0)
+        arrays["scored"][i] = True
+
+    return arrays
+
+
+def score_comfort_batch(hours, prefer, avoid, prefer_weight, avoid_weight, scored=None):
+    """
+    Comfort scores (0-10) for a stack of schedules in one call.
+
+    Scoring matches `Schedule.comfort`: per appliance, preferred hours earn
+    10 × prefer_weight, neutral hours 5 and avoided hours -15 × avoid_weight,
+    normalized by the all-preferred score and clipped to 0-10; the schedule
+    score is the average over scored appliances clipped to 0.1-9.9. A schedule
+    with an unscheduled scored appliance gets 0.5, one with no scored
+    appliances gets 5.0.
+
+    Args:
+        hours: bool array (num_schedules, num_appliances, num_slots)
+        prefer, avoid: bool arrays (num_appliances, num_slots), or one per schedule
+        prefer_weight, avoid_weight: float arrays (num_appliances,), or one per schedule
+        scored: bool array (num_appliances,) or per schedule; defaults to all appliances
+
+    Returns:
+        float array (num_schedules,) rounded to one decimal
+    """
+    hours = np.asarray(hours, dtype=bool)
+    if hours.ndim == 2:
+        hours = hours[None]
+    num_schedules, num_appliances, _ = hours.shape
+
+    if scored is None:
+        scored = np.ones(num_appliances, dtype=bool)
+    scored = np.broadcast_to(scored, (num_schedules, num_appliances))
+    prefer_weight = np.broadcast_to(np.asarray(prefer_weight, dtype=np.float64), scored.shape)
+    avoid_weight = np.broadcast_to(np.asarray(avoid_weight, dtype=np.float64), scored.shape)
+
+    total = hours.sum(axis=2)
+    in_prefer = (hours & prefer).sum(axis=2)
+    in_avoid = (hours & avoid).sum(axis=2)
+    neutral = total - in_prefer - in_avoid
+
+    points = (in_prefer * PREFER_POINTS * prefer_weight
+              + neutral * NEUTRAL_POINTS
+              + in_avoid * AVOID_POINTS * avoid_weight)
+    best = total * PREFER_POINTS * prefer_weight
+    per_appliance = np.where(best > 0, np.clip(points / np.where(best > 0, best, 1.0) * 10, 0, 10), 5.0)
+
+    num_scored = scored.sum(axis=1)
+    final_score = np.where(scored, per_appliance, 0.0).sum(axis=1) / (10.0 * np.maximum(num_scored, 1)) * 10
+    final_score = _round1(np.clip(final_score, 0.1, 9.9))
+
+    unscheduled = (scored & (total == 0)).any(axis=1)
+    final_score = np.where(unscheduled, 0.5, final_score)
+    return np.where(num_scored == 0, 5.0, final_score)
+
+
+def score_comfort(hours, names, preferences):
+    """Comfort scores for schedules sharing one appliance list and preference dict."""
+    # Sum appliances in preference order, like the original per-dict loop, so
+    # scores that land on a rounding boundary round the same way
+    rank = {name: k for k, name in enumerate(preferences)}
+    order = sorted(range(len(names)), key=lambda i: rank.get(names[i], len(rank)))
+
+    hours = np.asarray(hours, dtype=bool)[..., order, :]
+    arrays = preference_arrays([names[i] for i in order], preferences, hours.shape[-1])
+    return score_comfort_batch(hours, **arrays)
@@ -4,6 +4,42 @@ import requests
 import pandas as pd
 from datetime import datetime, timedelta
 import pytz
+from metrics import inc, span
+from price_forecast import append_price_history
+
+
+def parse_comed_feed(data):
+    """ComEd 5-minute feed JSON (list of {"millisUTC", "price"} strings) -> numeric DataFrame."""
+    df = pd.DataFrame(data)
+    df["millisUTC"] = pd.to_numeric(df["millisUTC"], errors="coerce")
+    df["price"] = pd.to_numeric(df["price"], errors="coerce")
+    return df
+
+
+def hourly_prices(df, now, tz):
+    """
+    Hourly averages ($/kWh) of the last 24 hours of 5-minute points, with
+    12-hour clock labels in `tz`. Only points from the 36 hours before `now` count.
+    """
+    # Convert UTC → Chicago local time
+    df = df.copy()
+    df["datetime"] = pd.to_datetime(df["millisUTC"], unit="ms", utc=True)
+    df["datetime"] = df["datetime"].dt.tz_convert(tz)
+
+    # Keep only recent data (past 36 hours)
+    window_start = now - timedelta(hours=36)
+    df = df[df["datetime"] >= window_start]
+
+    # Group by hour and average (¢/kWh → $/kWh)
+    df["hour"] = df["datetime"].dt.floor(pd.Timedelta(hours=1))  # "H" was removed in pandas 3
+    hourly = df.groupby("hour")["price"].mean().reset_index()
+    hourly["price"] = hourly["price"] / 100.0  # convert cents to dollars
+    hourly["time"] = hourly["hour"].dt.strftime("%I:%M %p")
+    # Sort chronologically
+    hourly = hourly.sort_values("hour").reset_index(drop=True)
+
+    # Keep last 24 hours
+    return hourly.tail(24)
 
 
 def fetch_comed_prices():
@@ -16,44 +52,32 @@ def fetch_comed_prices():
     tz = pytz.timezone("America/Chicago")
 
     try:
-        r = requests.get(URL, headers=headers, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-
-        # Convert JSON to DataFrame
-        df = pd.DataFrame(data)
-        df["millisUTC"] = pd.to_numeric(df["millisUTC"], errors="coerce")
-        df["price"] = pd.to_numeric(df["price"], errors="coerce")
-
-        # Convert UTC → Chicago local time
-        df["datetime"] = pd.to_datetime(df["millisUTC"], unit="ms", utc=True)
-        df["datetime"] = df["datetime"].dt.tz_convert(tz)
-
-        # Keep only recent data (past 36 hours)
-        now = datetime.now(tz)
-        window_start = now - timedelta(hours=36)
-        df = df[df["datetime"] >= window_start]
+        with span("price_fetch"):
+            r = requests.get(URL, headers=headers, timeout=10)
+            r.raise_for_status()
+        with span("price_parse"):
+            df = parse_comed_feed(r.json())
 
-        # Group by hour and average (¢/kWh → $/kWh)
-        df["hour"] = df["datetime"].dt.floor("H")
-        hourly = df.groupby("hour")["price"].mean().reset_index()
-        hourly["price"] = hourly["price"] / 100.0  # convert cents to dollars
-        hourly["time"] = hourly["hour"].dt.strftime("%I:%M %p")
-        # Sort chronologically
-        hourly = hourly.sort_values("hour").reset_index(drop=True)
+        # Keep every 5-minute point for the local forecasting history
+        try:
+            append_price_history(df)
+        except Exception as e:
+            print(f"⚠️ Could not update price history: {e}")
 
-        # Keep last 24 hours
-        hourly = hourly.tail(24)
+        with span("price_aggregate"):
+            hourly = hourly_prices(df, datetime.now(tz), tz)
 
         os.makedirs("data", exist_ok=True)
         hourly[["time", "price"]].to_csv("data/prices.csv", index=False)
 
         print(f"✅ Saved {len(hourly)} hourly points from live ComEd feed.")
+        inc("price_fetch_total", source="live")
         return hourly[["time", "price"]]
 
     except Exception as e:
         print(f"⚠️ Could not fetch ComEd 5-minute feed: {e}")
         print("📊 Using sample data instead…")
+        inc("price_fetch_total", source="sample")
 
         # Sample fallback data
         now = datetime.now(tz)
@@ -0,0 +1,188 @@
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from metrics import Trace
+from profiling import new_run_dir, profile_call, profiling_requested
+from result_cache import lp_results, rl_results, scenario_key
+from training_scheduler import TOTAL_TIMESTEPS, get_scheduler
+from utils.lazy_imports import load
+
+# Shared by every session in the server process. RL training does not run
+# here but in the training scheduler's pinned worker slots.
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="optimize")
+
+
+class TrainingProgress:
+    """Progress of one RL job, written by the training callback and read by the UI."""
+
+    def __init__(self, total_timesteps):
+        self.total_timesteps = total_timesteps
+        self.timesteps = 0
+        self.stage = "Queued"
+        self.cancelled = threading.Event()
+
+    @property
+    def fraction(self):
+        return min(1.0, self.timesteps / self.total_timesteps) if self.total_timesteps else 0.0
+
+
+def _solve_lp(prices, appliances, restricted_hours):
+    optimizer = load("optimizer")
+    schedule, cost = optimizer.optimize_schedule_lp(prices, appliances, restricted_hours)
+    return {"schedule": schedule, "cost": cost}
+
+
+def _cached_or_submit(cache, key, submit):
+    """
+    Future for a cached result, or call `submit()` (which returns a future)
+    and cache what it resolves to. None results (cancelled runs) and
+    exceptions are not cached.
+    """
+    result = cache.get(key)
+    if result is not None:
+        future = Future()
+        future.set_result(result)
+        return future
+
+    def store(done):
+        if not done.cancelled() and done.exception() is None and done.result() is not None:
+            cache.put(key, done.result())
+
+    future = submit()
+    future.add_done_callback(store)
+    return future
+
+
+def _resolve(future, source):
+    """Resolve `future` from a finished future `source` (None: cancelled) unless it is already done."""
+    try:
+        if source is None:
+            future.set_result(None)
+        elif source.exception() is not None:
+            future.set_exception(source.exception())
+        else:
+            future.set_result(source.result())
+    except InvalidStateError:
+        pass
+
+
+def _cost(future):
+    if future.cancelled() or future.exception() is not None or future.result() is None:
+        return None
+    return future.result()["cost"]
+
+
+class OptimizationJob:
+    """
+    LP solve and RL training for one scenario, submitted together so they run
+    in parallel. `lp` and `rl` are futures; the RL future resolves to None
+    when the job is cancelled. Training is queued on the process-wide
+    training_scheduler, where identical scenarios from other sessions share
+    one run, and `progress` is that queued/running training. Results are
+    memoized per scenario in result_cache, so repeating a scenario resolves
+    them immediately. With metrics enabled, each job writes one JSON log
+    line (see metrics.Trace) once both results are in.
+
+    With `profile` (default: the PROFILE_REQUESTS environment variable),
+    submission, the LP solve and training + rollout are profiled into
+    `profile_dir` (see profiling.py). A training that is shared with an
+    earlier identical request is not profiled again.
+    """
+
+    def __init__(self, prices, appliances, restricted_hours, preferences, total_timesteps=TOTAL_TIMESTEPS,
+                 profile=None):
+        self.prices = prices
+        self.appliances = appliances
+        self.restricted_hours = restricted_hours
+        self.preferences = preferences
+        self.total_timesteps = total_timesteps
+        self.celebrated = False
+        self._cancelled = threading.Event()
+        self._training = None
+        self._lp_solved = False
+        self._submitted_at = time.perf_counter()
+
+        self.lp_key = scenario_key(prices, appliances, restricted_hours)
+        self.rl_key = scenario_key(prices, appliances, restricted_hours, preferences,
+                                   total_timesteps=total_timesteps)
+        self.trace = Trace("optimization", scenario=self.rl_key[:16], appliances=len(appliances),
+                           hours=len(prices), restricted_hours=len(restricted_hours or []),
+                           total_timesteps=total_timesteps)
+
+        self.request_id = self.rl_key[:16]
+        self.profile_dir = new_run_dir(self.request_id) if profiling_requested(profile) else None
+
+        if self.profile_dir is None:
+            self._submit()
+        else:
+            profile_call(self.profile_dir, "prep", self._submit, request_id=self.request_id)
+        self.trace.set(profile_dir=self.profile_dir, lp_cached=not self._lp_solved, rl_cached=self._training is None)
+        self.lp.add_done_callback(self._record)
+        self.rl.add_done_callback(self._record)
+        if self._training is None:
+            self.progress = TrainingProgress(total_timesteps)
+            self.progress.timesteps = total_timesteps
+            self.progress.stage = "Done (cached)"
+        else:
+            self.progress = self._training
+
+    def _submit(self):
+        self.lp = _cached_or_submit(lp_results, self.lp_key, self._submit_lp)
+        self.rl = _cached_or_submit(rl_results, self.rl_key, self._submit_training)
+
+    def _submit_lp(self):
+        self._lp_solved = True
+        args = (self.prices, self.appliances, self.restricted_hours)
+        if self.profile_dir is not None:
+            return _executor.submit(self.trace.run, profile_call, self.profile_dir, "lp", _solve_lp, *args,
+                                    request_id=self.request_id)
+        return _executor.submit(self.trace.run, _solve_lp, *args)
+
+    def _submit_training(self):
+        self._training = get_scheduler().submit(
+            self.prices, self.appliances, self.restricted_hours, self.preferences,
+            total_timesteps=self.total_timesteps, profile_dir=self.profile_dir,
+        )
+        # This session's view of the (possibly shared) training, so cancelling resolves it right away
+        future = Future()
+        self._training.future.add_done_callback(lambda done: _resolve(future, done))
+        return future
+
+    def cancel(self):
+        if self._cancelled.is_set():
+            return
+        self._cancelled.set()
+        if self._training is not None:
+            # Other sessions may be waiting for the same training; it only stops when all of them cancel
+            get_scheduler().cancel(self._training)
+            _resolve(self.rl, None)
+
+    def _record(self, done):
+        """Stage timings and outcome of this job, logged once both futures are done."""
+        now = time.perf_counter()
+        self.trace.add_span("lp_total" if done is self.lp else "rl_total", now - self._submitted_at)
+        if not self.done():
+            return
+
+        fields = {"lp_cost": _cost(self.lp)}
+        if self._training is None:
+            fields["rl_outcome"] = "cached"
+        elif self.cancelled:
+            fields["rl_outcome"] = "cancelled"
+        else:
+            fields["rl_outcome"] = "failed" if self.rl.exception() is not None else "done"
+        if self._training is not None:
+            training = self._training
+            fields["timesteps"] = training.timesteps
+            fields["shared_training"] = training.subscribers > 1
+            self.trace.add_span("training_queue_wait", training.wait_seconds)
+            if training.finished_at is not None:
+                self.trace.add_span("training_job", training.finished_at - training.started_at)
+        self.trace.finish(rl_cost=_cost(self.rl), **fields)
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def done(self):
+        return self.lp.done() and self.rl.done()
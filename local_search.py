@@ -0,0 +1,221 @@
+"""
+Anytime local search on the EnergyEnvWithPreferences objective.
+
+The objective is the negated episode return of a schedule:
+
+    energy cost + comfort penalties (avoid penalty, minus preferred bonus)
+    + 0.5 per appliance beyond 2 running in the same slot
+    + 50 per hour an appliance could not be scheduled
+
+Without the concurrency term, every appliance would simply run in its
+cheapest allowed slots (optimizer.cheapest_hours_batch on cost + comfort).
+The search starts there and improves the schedule with two moves:
+
+    shift   one appliance moves one of its slots to a free allowed slot
+    swap    two appliances trade slots (a: h -> g, b: g -> h); slot loads stay
+            the same, which is what gets a schedule past a crowded slot
+
+Each move's change in objective is exact and needs only the two touched
+cells and the two slot counts, so the schedule itself is never re-scored.
+All moves are scored in one vectorized pass and the best one is applied.
+At a local optimum the best schedule so far is kicked (a few random shifts)
+and the search goes on until `time_budget` runs out. It stops early once the
+objective reaches the lower bound without the concurrency term, which proves
+the schedule optimal.
+
+    from local_search import local_search
+    schedule, stats = local_search(prices, appliances, restricted_hours, preferences, time_budget=0.05)
+
+solve_exact is the CBC reference for the same objective. The model is a
+transportation problem plus one overflow variable per slot, so its LP
+relaxation is (nearly) integral and CBC proves optimality fast: under a
+second for 128 appliances on 96 quarter-hour slots. local_search is not a
+faster replacement for it. It is a solver-free, anytime alternative that
+reaches the same objective on those instances within a second or two,
+but can only prove optimality when no slot is crowded. See
+benchmarks/bench_local_search.py.
+"""
+import time
+import numpy as np
+import pulp
+from comfort import preference_arrays
+from metrics import inc, span
+from optimizer import cheapest_hours_batch
+from rollout import restriction_mask
+from schedule import Schedule
+
+MAX_CONCURRENT = 2
+CONCURRENCY_PENALTY = 0.5
+UNSCHEDULED_PENALTY = 50.0
+
+
+def cell_costs(prices, appliances, preferences=None):
+    """(num_appliances, num_slots) objective of running each appliance in each slot: cost plus comfort penalty."""
+    prices = np.asarray(prices, dtype=np.float64)
+    names = [a["name"] for a in appliances]
+    power = np.array([a["power"] for a in appliances], dtype=np.float64)
+    prefs = preference_arrays(names, preferences or {}, len(prices))
+    # The env looks preferences up by name, so every appliance with that name is scored
+    rows = [max(i for i, n in enumerate(names) if n == name) for name in names]
+    comfort = (prefs["avoid_weight"][:, None] * prefs["avoid"] - prefs["prefer_weight"][:, None] * prefs["prefer"])[rows]
+    return power[:, None] * prices + comfort
+
+
+def schedule_objective(hours, cells, durations, max_concurrent=MAX_CONCURRENT, concurrency_penalty=CONCURRENCY_PENALTY):
+    """Objective of a bool schedule (num_appliances, num_slots) that only uses allowed slots."""
+    hours = np.asarray(hours, dtype=bool)
+    over = np.maximum(hours.sum(axis=0) - max_concurrent, 0)
+    missing = np.maximum(np.asarray(durations) - hours.sum(axis=1), 0)
+    return float(cells[hours].sum() + concurrency_penalty * over.sum() + UNSCHEDULED_PENALTY * missing.sum())
+
+
+def _best_move(hours, counts, cells, differences, allowed, max_concurrent, concurrency_penalty):
+    """Best shift and best swap: (delta, kind, appliance, other, from_slot, to_slot)."""
+    add = np.where(~hours & allowed, cells + concurrency_penalty * (counts >= max_concurrent), np.inf)
+    remove = np.where(hours, cells + concurrency_penalty * (counts > max_concurrent), -np.inf)
+    to_slot, from_slot = add.argmin(axis=1), remove.argmax(axis=1)
+    rows = np.arange(len(hours))
+    shift = add[rows, to_slot] - remove[rows, from_slot]
+    a = int(shift.argmin())
+    best = (float(shift[a]), "shift", a, a, int(from_slot[a]), int(to_slot[a]))
+
+    if len(hours) > 1:
+        # a: h -> g and b: g -> h changes the objective by D[g] - D[h], D = cells[a] - cells[b]
+        leaves = hours[:, None, :] & ~hours[None, :, :] & allowed[None, :, :]
+        enters = ~hours[:, None, :] & hours[None, :, :] & allowed[:, None, :]
+        low = np.where(enters, differences, np.inf)
+        high = np.where(leaves, differences, -np.inf)
+        g, h = low.argmin(axis=2), high.argmax(axis=2)
+        swap = np.take_along_axis(low, g[..., None], 2)[..., 0] - np.take_along_axis(high, h[..., None], 2)[..., 0]
+        a, b = np.unravel_index(int(swap.argmin()), swap.shape)
+        if swap[a, b] < best[0]:
+            best = (float(swap[a, b]), "swap", int(a), int(b), int(h[a, b]), int(g[a, b]))
+    return best
+
+
+def _kick(hours, allowed, movable, rng, strength):
+    """Move one random slot of `strength` random movable appliances to a random free allowed slot."""
+    for a in rng.choice(movable, size=min(strength, len(movable)), replace=False):
+        hours[a, rng.choice(np.flatnonzero(hours[a]))] = False
+        hours[a, rng.choice(np.flatnonzero(~hours[a] & allowed[a]))] = True
+    return hours
+
+
+def local_search(prices, appliances, restricted_hours=None, preferences=None, time_budget=0.1, seed=0,
+                 max_concurrent=MAX_CONCURRENT, concurrency_penalty=CONCURRENCY_PENALTY, kick_strength=2,
+                 initial=None, tolerance=1e-9):
+    """
+    Best schedule found within `time_budget` seconds.
+
+    Args:
+        prices: Array of per-slot prices (any number of slots)
+        appliances: List of appliance dicts with name, power, duration (in slots)
+        restricted_hours: List of slot indices to avoid, or a bool mask over slots
+            (shared, or per appliance)
+        preferences: Optional preference dict (avoid_hours, preferred_hours, ...)
+        time_budget: Seconds to search; the best schedule so far is returned when it runs out
+        initial: Optional starting bool schedule (num_appliances, num_slots), default cheapest hours
+
+    Returns:
+        schedule: Schedule
+        stats: Dict with objective, initial_objective, lower_bound, moves, kicks, seconds,
+            best_at (seconds until the best schedule was found) and status ("optimal" when the lower bound is reached, else "time_budget")
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget
+    rng = np.random.default_rng(seed)
+    cells = cell_costs(prices, appliances, preferences)
+    durations = np.array([a["duration"] for a in appliances], dtype=np.int64)
+    allowed = ~restriction_mask(restricted_hours, len(appliances), cells.shape[1])
+    differences = cells[:, None, :] - cells[None, :, :]
+    # Appliances with a free allowed slot to move to
+    movable = np.flatnonzero((durations > 0) & (allowed.sum(axis=1) > durations))
+
+    cheapest, _ = cheapest_hours_batch(cells, durations, ~allowed)
+    lower_bound = schedule_objective(cheapest, cells, durations, max_concurrent, 0.0)
+    hours = cheapest if initial is None else np.array(initial, dtype=bool) & allowed
+    counts = hours.sum(axis=0)
+    current = schedule_objective(hours, cells, durations, max_concurrent, concurrency_penalty)
+    stats = {"initial_objective": current, "lower_bound": lower_bound, "moves": 0, "kicks": 0,
+             "best_at": 0.0, "status": "time_budget"}
+    best, best_hours = current, hours.copy()
+
+    with span("local_search"):
+        while True:
+            if best <= lower_bound + tolerance:
+                stats["status"] = "optimal"
+                break
+            if time.perf_counter() >= deadline:
+                break
+            delta, kind, a, b, h, g = _best_move(hours, counts, cells, differences, allowed,
+                                                 max_concurrent, concurrency_penalty)
+            if delta < -tolerance:
+                hours[a, h], hours[a, g] = False, True
+                if kind == "swap":
+                    hours[b, g], hours[b, h] = False, True
+                else:
+                    counts[h] -= 1
+                    counts[g] += 1
+                current += delta
+                stats["moves"] += 1
+                if current < best - tolerance:
+                    best, best_hours = current, hours.copy()
+                    stats["best_at"] = time.perf_counter() - start
+                continue
+            if not len(movable):
+                stats["status"] = "optimal"  # the only schedule there is
+                break
+            # Local optimum: restart from a perturbed copy of the best schedule
+            hours = _kick(best_hours.copy(), allowed, movable, rng, kick_strength)
+            counts = hours.sum(axis=0)
+            current = schedule_objective(hours, cells, durations, max_concurrent, concurrency_penalty)
+            stats["kicks"] += 1
+    inc("local_search_total", status=stats["status"])
+
+    stats.update(objective=best, seconds=time.perf_counter() - start)
+    return Schedule([a["name"] for a in appliances], [a["power"] for a in appliances], best_hours), stats
+
+
+def solve_exact(prices, appliances, restricted_hours=None, preferences=None, max_concurrent=MAX_CONCURRENT,
+                concurrency_penalty=CONCURRENCY_PENALTY, time_limit=None):
+    """
+    Optimal schedule for the same objective as local_search, from a CBC MILP.
+
+    Returns:
+        schedule: Schedule
+        stats: Dict with objective, status and seconds
+    """
+    start = time.perf_counter()
+    cells = cell_costs(prices, appliances, preferences)
+    num_appliances, num_slots = cells.shape
+    allowed = ~restriction_mask(restricted_hours, num_appliances, num_slots)
+
+    with span("lp_build", solver="exact"):
+        model = pulp.LpProblem("PreferenceObjective", pulp.LpMinimize)
+        run = {(i, h): pulp.LpVariable(f"x{i}_{h}", cat="Binary")
+               for i in range(num_appliances) for h in range(num_slots) if allowed[i, h]}
+        over = [pulp.LpVariable(f"over{h}", lowBound=0) for h in range(num_slots)]
+        missing = [pulp.LpVariable(f"missing{i}", lowBound=0) for i in range(num_appliances)]
+
+        model += (pulp.lpSum(cells[i, h] * x for (i, h), x in run.items())
+                  + concurrency_penalty * pulp.lpSum(over) + UNSCHEDULED_PENALTY * pulp.lpSum(missing))
+        for i, a in enumerate(appliances):
+            model += pulp.lpSum(run[i, h] for h in range(num_slots) if allowed[i, h]) + missing[i] == a["duration"]
+        for h in range(num_slots):
+            model += over[h] >= pulp.lpSum(run[i, h] for i in range(num_appliances) if allowed[i, h]) - max_concurrent
+
+    with span("lp_solve", solver="exact"):
+        model.solve(pulp.PULP_CBC_CMD(msg=0, timeLimit=time_limit))
+    status = pulp.LpStatus[model.status]
+    inc("lp_solve_total", status=status)
+
+    hours = np.zeros((num_appliances, num_slots), dtype=bool)
+    for (i, h), x in run.items():
+        hours[i, h] = (x.value() or 0) > 0.5
+    durations = [a["duration"] for a in appliances]
+    schedule = Schedule([a["name"] for a in appliances], [a["power"] for a in appliances], hours)
+    return schedule, {
+        "objective": schedule_objective(hours, cells, durations, max_concurrent, concurrency_penalty),
+        "status": status,
+        "seconds": time.perf_counter() - start,
+    }
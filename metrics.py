@@ -0,0 +1,292 @@
+"""
+Stage timings, counters and histograms, exported as Prometheus text and
+as one structured JSON log line per optimization request.
+
+    from metrics import inc, span
+
+    with span("lp_solve"):
+        model.solve(...)
+    inc("lp_solve_total", status="Optimal")
+
+Recording is off unless METRICS_ENABLED=1 (or metrics.enable() is called):
+while disabled, span() hands back a shared no-op context manager and the
+other functions return immediately, so instrumented code pays one global
+lookup per call.
+
+    METRICS_ENABLED=1        turn recording on
+    METRICS_LOG=path         where request logs go (default logs/optimization_requests.ndjson)
+    METRICS_PROM_FILE=path   rewrite this Prometheus text file after every request
+                             (for node_exporter's textfile collector)
+
+Spans opened while a Trace is active (Trace.run) are also added to that
+trace, which writes the JSON log line when it finishes.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_enabled = os.environ.get("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+_trace = contextvars.ContextVar("metrics_trace", default=None)
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Thread-safe store of counters and histograms keyed by (name, labels)."""
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """Plain-dict copy: {"counters": {...}, "histograms": {...}} keyed by 'name{labels}'."""
+        with self._lock:
+            return {
+                "counters": {_series(name, labels): value for (name, labels), value in self._counters.items()},
+                "histograms": {_series(name, labels): {"count": h.count, "sum": h.sum}
+                               for (name, labels), h in self._histograms.items()},
+            }
+
+    def prometheus_text(self):
+        """All series in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            for name, series in _by_name(self._counters):
+                self._header(lines, name, "counter")
+                for labels, value in series:
+                    lines.append(f"{_series(name, labels)} {_number(value)}")
+
+            for name, series in _by_name(self._histograms):
+                self._header(lines, name, "histogram")
+                for labels, h in series:
+                    cumulative = 0
+                    for bound, count in zip(h.buckets + ("+Inf",), h.counts):
+                        cumulative += count
+                        le = bound if isinstance(bound, str) else _number(bound)
+                        lines.append(f"{_series(name + '_bucket', labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{_series(name + '_sum', labels)} {_number(h.sum)}")
+                    lines.append(f"{_series(name + '_count', labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines, name, kind):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def _by_name(store):
+    """(name, [(labels, value), ...]) per metric name, sorted, so each family is contiguous."""
+    families = {}
+    for (name, labels), value in sorted(store.items(), key=lambda item: item[0]):
+        families.setdefault(name, []).append((labels, value))
+    return families.items()
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return name + "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+registry.describe("stage_seconds", "Wall time per pipeline stage")
+registry.describe("cache_requests_total", "Result cache lookups by cache and outcome")
+registry.describe("lp_solve_total", "LP solves by CBC status")
+registry.describe("local_search_total", "Local search runs by how they ended (optimal or time budget)")
+registry.describe("price_fetch_total", "Price fetches by source (live feed or sample fallback)")
+registry.describe("training_timesteps_total", "PPO timesteps trained")
+registry.describe("training_jobs_total", "Training jobs by outcome")
+registry.describe("training_queue_wait_seconds", "Time training jobs waited for a free slot")
+
+
+# ----------------------------------------------------------------------
+# Recording (no-ops while disabled)
+# ----------------------------------------------------------------------
+def inc(name, value=1, **labels):
+    if _enabled:
+        registry.inc(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    if _enabled:
+        registry.observe(name, value, **labels)
+
+
+class _Span:
+    __slots__ = ("stage", "labels", "start")
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_span(self.stage, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(stage, **labels):
+    """Context manager timing one stage into stage_seconds{stage=...}."""
+    if not _enabled:
+        return _NOOP
+    return _Span(stage, labels)
+
+
+def record_span(stage, seconds, **labels):
+    """Record a stage duration measured elsewhere (e.g. in another process)."""
+    if not _enabled:
+        return
+    registry.observe("stage_seconds", seconds, stage=stage, **labels)
+    trace = _trace.get()
+    if trace is not None:
+        trace.add_span(stage, seconds, **labels)
+
+
+# ----------------------------------------------------------------------
+# Per-request JSON logs
+# ----------------------------------------------------------------------
+class Trace:
+    """
+    Spans and fields of one request, written as a single JSON line by
+    finish(). Work submitted to executors joins the trace via run().
+    """
+
+    def __init__(self, event, **fields):
+        self.event = event
+        self.fields = dict(fields)
+        self.spans = []
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def run(self, fn, *args, **kwargs):
+        """Call fn with this trace active (for executor.submit(trace.run, fn, ...))."""
+        token = _trace.set(self)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _trace.reset(token)
+
+    def add_span(self, stage, seconds, **labels):
+        with self._lock:
+            self.spans.append({"stage": stage, "seconds": round(seconds, 6), **labels})
+
+    def set(self, **fields):
+        with self._lock:
+            self.fields.update(fields)
+
+    def finish(self, **fields):
+        """Write the log line (once; later calls are ignored)."""
+        with self._lock:
+            if self._finished or not _enabled:
+                return
+            self._finished = True
+            self.fields.update(fields)
+            record = {
+                "ts": self.started,
+                "event": self.event,
+                "duration_s": round(time.perf_counter() - self._start, 6),
+                **self.fields,
+                "spans": self.spans,
+            }
+        write_log(record)
+        prom_file = os.environ.get("METRICS_PROM_FILE")
+        if prom_file:
+            write_prometheus(prom_file)
+
+
+_log_lock = threading.Lock()
+
+
+def write_log(record, path=None):
+    path = path or os.environ.get("METRICS_LOG", "logs/optimization_requests.ndjson")
+    line = json.dumps(record, default=str)
+    with _log_lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+
+def prometheus_text():
+    return registry.prometheus_text()
+
+
+def write_prometheus(path):
+    """Atomically replace `path` with the current metrics."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
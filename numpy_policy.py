@@ -0,0 +1,130 @@
+import json
+import numpy as np
+
+# Activation modules stable-baselines3 MlpPolicy can be configured with
+ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0),
+    "ELU": lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0))),
+    "LeakyReLU": lambda x: np.where(x > 0, x, 0.01 * x),
+    "Identity": lambda x: x,
+}
+
+
+def _sigmoid(x):
+    return np.exp(-np.logaddexp(0, -x)).astype(x.dtype)
+
+
+def export_policy(model, path):
+    """
+    Export the actor of a trained PPO MlpPolicy to a compact .npz artifact.
+
+    Args:
+        model: A PPO model or the path of a saved `.zip`
+        path: Output path for the `.npz` file
+
+    stable-baselines3 and torch are only imported here, never at serving time.
+    """
+    if isinstance(model, str):
+        from stable_baselines3 import PPO
+        model = PPO.load(model, device="cpu")
+
+    import gymnasium as gym
+    from torch import nn
+
+    policy = model.policy
+    extractor = getattr(policy, "pi_features_extractor", policy.features_extractor)
+    if type(extractor).__name__ != "FlattenExtractor":
+        raise ValueError("Only MlpPolicy with a flatten feature extractor can be exported")
+
+    arrays, activations = {}, []
+    modules = list(policy.mlp_extractor.policy_net) + [policy.action_net]
+    num_layers = 0
+    for module in modules:
+        if isinstance(module, nn.Linear):
+            arrays[f"w{num_layers}"] = module.weight.detach().cpu().numpy().T.astype(np.float32)
+            arrays[f"b{num_layers}"] = module.bias.detach().cpu().numpy().astype(np.float32)
+            activations.append("Identity")
+            num_layers += 1
+        elif type(module).__name__ in ACTIVATIONS:
+            activations[-1] = type(module).__name__
+        else:
+            raise ValueError(f"Unsupported policy layer: {module}")
+
+    action_space = model.action_space
+    if isinstance(action_space, gym.spaces.MultiBinary):
+        kind, size = "multibinary", int(np.prod(action_space.shape))
+    elif isinstance(action_space, gym.spaces.Discrete):
+        kind, size = "discrete", int(action_space.n)
+    else:
+        raise ValueError(f"Unsupported action space: {action_space}")
+
+    meta = {
+        "activations": activations,
+        "action_space": kind,
+        "action_size": size,
+        "obs_dim": int(np.prod(model.observation_space.shape)),
+    }
+    np.savez(path, meta=np.array(json.dumps(meta)), **arrays)
+    return path
+
+
+class NumpyPolicy:
+    """
+    Pure-NumPy replica of an exported PPO actor.
+
+    `predict` mirrors `PPO.predict`: it accepts one observation or a batch and
+    returns `(actions, None)` with the same shapes and dtypes, so it can be
+    passed anywhere a trained model is expected (`run_agent`, `rollout_batch`).
+    """
+
+    def __init__(self, weights, biases, activations, action_space, action_size, obs_dim):
+        self.weights = weights
+        self.biases = biases
+        self.activations = [ACTIVATIONS[name] for name in activations]
+        self.action_space = action_space
+        self.action_size = action_size
+        self.obs_dim = obs_dim
+        self._rng = np.random.default_rng()
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            num_layers = len(meta["activations"])
+            weights = [data[f"w{i}"] for i in range(num_layers)]
+            biases = [data[f"b{i}"] for i in range(num_layers)]
+        return cls(weights, biases, meta["activations"], meta["action_space"],
+                   meta["action_size"], meta["obs_dim"])
+
+    @property
+    def nbytes(self):
+        return sum(w.nbytes + b.nbytes for w, b in zip(self.weights, self.biases))
+
+    def logits(self, obs):
+        x = np.asarray(obs, dtype=np.float32).reshape(-1, self.obs_dim)
+        for w, b, activation in zip(self.weights, self.biases, self.activations):
+            x = activation(x @ w + b)
+        return x
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=True):
+        obs = np.asarray(obs)
+        logits = self.logits(obs)
+
+        if self.action_space == "multibinary":
+            probs = _sigmoid(logits)
+            if deterministic:
+                actions = np.round(probs)  # round-half-even, like torch.round
+            else:
+                actions = (self._rng.random(probs.shape) < probs).astype(np.float32)
+        else:
+            if deterministic:
+                actions = logits.argmax(axis=1)
+            else:
+                shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+                cdf = np.cumsum(shifted / shifted.sum(axis=1, keepdims=True), axis=1)
+                actions = (self._rng.random((len(cdf), 1)) > cdf).sum(axis=1)
+
+        if obs.ndim == 1:
+            actions = actions[0]
+        return actions, None
@@ -1,6 +1,12 @@
 import pandas as pd
 import pulp
 import numpy as np
+from metrics import inc, span
+from rollout import restriction_mask
+from schedule import Schedule
+
+NUM_HOURS = 24
+
 
 def optimize_schedule_lp(prices, appliances, restricted_hours=None):
     """
@@ -13,74 +19,239 @@ def optimize_schedule_lp(prices, appliances, restricted_hours=None):
         restricted_hours: List of hour indices to avoid
     
     Returns:
-        schedule: Dict mapping appliance names to list of hours
+        schedule: Schedule (reads like a dict of appliance name -> list of hours)
         total_cost: Total electricity cost
     """
+    schedule, _ = solve_schedule_lp(prices, appliances, restricted_hours)
+    return schedule, schedule.cost(prices)
+
+
+def solve_schedule_lp(prices, appliances, restricted_hours=None):
+    """optimize_schedule_lp, returning the CBC status ("Optimal", "Infeasible", ...) instead of the cost."""
     num_hours = len(prices)
     hour_indices = range(num_hours)
     restricted_hours = restricted_hours or []
 
-    model = pulp.LpProblem("CostOptimization", pulp.LpMinimize)
+    with span("lp_build"):
+        model = pulp.LpProblem("CostOptimization", pulp.LpMinimize)
 
-    # Binary variable for each appliance-hour
-    run = {
-        (a['name'], h): pulp.LpVariable(f"{a['name']}_hour{h}", cat="Binary")
-        for a in appliances for h in hour_indices
-    }
+        # Binary variable for each appliance-hour
+        run = {
+            (a['name'], h): pulp.LpVariable(f"{a['name']}_hour{h}", cat="Binary")
+            for a in appliances for h in hour_indices
+        }
 
-    # Objective: minimize total cost
-    model += pulp.lpSum(
-        run[(a['name'], h)] * a['power'] * prices[h]
-        for a in appliances for h in hour_indices
-    )
+        # Objective: minimize total cost
+        model += pulp.lpSum(
+            run[(a['name'], h)] * a['power'] * prices[h]
+            for a in appliances for h in hour_indices
+        )
 
-    # Constraints: each appliance runs exactly for its duration
-    for a in appliances:
-        model += pulp.lpSum(run[(a['name'], h)] for h in hour_indices) == a['duration']
+        # Constraints: each appliance runs exactly for its duration
+        for a in appliances:
+            model += pulp.lpSum(run[(a['name'], h)] for h in hour_indices) == a['duration']
 
-        # Cannot run in restricted hours
-        for h in restricted_hours:
-            if h in hour_indices:
-                model += run[(a['name'], h)] == 0
+            # Cannot run in restricted hours
+            for h in restricted_hours:
+                if h in hour_indices:
+                    model += run[(a['name'], h)] == 0
 
-    model.solve(pulp.PULP_CBC_CMD(msg=0))
+    with span("lp_solve"):
+        model.solve(pulp.PULP_CBC_CMD(msg=0))
+    status = pulp.LpStatus[model.status]
+    inc("lp_solve_total", status=status)
 
     # Extract schedule
-    schedule = {}
-    for a in appliances:
-        hours_on = [h for h in hour_indices if pulp.value(run[(a['name'], h)]) == 1]
-        schedule[a['name']] = hours_on if hours_on else []
+    schedule = Schedule.empty(appliances, num_hours)
+    for i, a in enumerate(appliances):
+        schedule.hours[i] = [(pulp.value(run[(a['name'], h)]) or 0) > 0.5 for h in hour_indices]
+
+    return schedule, status
+
+
+def cheapest_hours_batch(prices, durations, restricted_hours=None):
+    """
+    Exact cost-minimal hours for many appliances at once, without a solver.
+
+    Appliances do not interact in the LP above, so each one simply runs in its
+    `duration` cheapest allowed hours: the DP over (hour, hours used) reduces
+    to one sort of the prices. Gives the same minimum cost as
+    optimize_schedule_lp; among equally priced hours the earliest wins.
+
+    Args:
+        prices: Array of hourly prices, shared (num_hours,) or per appliance
+            (num_appliances, num_hours)
+        durations: Array of appliance durations (any number of appliances)
+        restricted_hours: List of hour indices to avoid, or a bool mask over hours,
+            either shared (num_hours,) or per appliance (num_appliances, num_hours)
+
+    Returns:
+        hours: bool array (num_appliances, num_hours)
+        feasible: bool array (num_appliances,); False when there are fewer allowed
+            hours than the duration (the appliance then runs in every allowed hour)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    durations = np.asarray(durations, dtype=np.int64)
+    num_hours = prices.shape[-1]
+    allowed = ~restriction_mask(restricted_hours, len(durations), num_hours)
+
+    order = np.argsort(np.where(allowed, prices, np.inf), axis=1, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(num_hours), axis=1)
+
+    hours = (rank < durations[:, None]) & allowed
+    return hours, durations <= allowed.sum(axis=1)
+
+
+def bootstrap_price_scenarios(history, num_scenarios, forecast=None, seed=0):
+    """
+    Sample price scenarios from an hourly price history by whole days, which
+    keeps each day's hour-to-hour correlation.
+
+    Without `forecast` the scenarios are the sampled days themselves. With a
+    forecast (num_hours,), each sampled day's deviation from the history's
+    average daily profile is added to it instead.
+
+    Returns:
+        float array (num_scenarios, num_hours)
+    """
+    num_hours = NUM_HOURS if forecast is None else len(forecast)
+    history = np.ravel(np.asarray(history, dtype=np.float64))
+    days = history[:len(history) // num_hours * num_hours].reshape(-1, num_hours)
+    if not len(days):
+        raise ValueError(f"Price history needs at least {num_hours} hours, got {len(history)}")
+    picks = np.random.default_rng(seed).integers(0, len(days), num_scenarios)
+    if forecast is None:
+        return days[picks]
+    return np.asarray(forecast, dtype=np.float64) + (days - days.mean(axis=0))[picks]
 
-    # Calculate total cost
-    total_cost = sum(
-        prices[h] * a['power']
-        for a in appliances
-        for h in schedule[a['name']]
-    )
 
-    return schedule, total_cost
+def scenario_costs(price_scenarios, power, hours):
+    """Cost of a schedule (A, T), or a stack of them (N, A, T), under every price scenario (S, T)."""
+    load = np.einsum("a,...at->...t", np.asarray(power, dtype=np.float64), np.asarray(hours, dtype=np.float64))
+    return load @ np.asarray(price_scenarios, dtype=np.float64).T
+
+
+def cvar(costs, alpha=0.95):
+    """Mean cost of the worst (1 - alpha) share of equally likely scenarios."""
+    costs = np.sort(np.asarray(costs, dtype=np.float64))[::-1]
+    tail = (1 - alpha) * len(costs)
+    whole = int(np.floor(tail + 1e-9))
+    total = costs[:whole].sum() + (tail - whole) * (costs[whole] if whole < len(costs) else 0.0)
+    return total / tail if tail > 0 else float(costs[0])
+
+
+def optimize_schedule_stochastic(price_scenarios, appliances, restricted_hours=None, risk=0.0, alpha=0.95,
+                                 method="cuts", tolerance=1e-6, max_iterations=200):
+    """
+    Schedule that minimizes (1 - risk) * E[cost] + risk * CVaR_alpha[cost]
+    over equally likely price scenarios (sample-average approximation).
+
+    With risk=0 the expectation is linear in the schedule, so this is the
+    cheapest-hours solution on the mean prices and needs no solver. With
+    risk > 0 the CVaR couples appliances through the scenarios:
+        method="cuts"       Cutting-plane decomposition. A small master MILP (schedule, VaR
+                            level eta and tail bound theta) gains one aggregated tail cut per
+                            iteration, found from all scenario costs at once; solve time barely
+                            grows with the scenario count.
+        method="extensive"  One MILP with a tail variable and constraint per scenario.
+
+    Args:
+        price_scenarios: (num_scenarios, num_hours) prices, e.g. from bootstrap_price_scenarios
+        appliances: List of appliance dicts with name, power, duration
+        restricted_hours: List of hour indices to avoid
+        risk: Weight of CVaR in the objective, 0-1
+        alpha: CVaR level (0.95 = mean of the worst 5% of scenarios)
+        max_iterations: Master solves per cuts phase (LP relaxation, then binary)
+
+    Returns:
+        schedule: Schedule
+        stats: Dict with expected_cost, cvar, objective, status ("IterationLimit" when the
+            binary phase stops at max_iterations before converging), method, iterations
+    """
+    if method not in ("cuts", "extensive"):
+        raise ValueError(f"Unknown method '{method}'. Expected 'cuts' or 'extensive'")
+    prices = np.atleast_2d(np.asarray(price_scenarios, dtype=np.float64))
+    num_scenarios, num_hours = prices.shape
+    power = np.array([a["power"] for a in appliances], dtype=np.float64)
+    durations = np.array([a["duration"] for a in appliances], dtype=np.int64)
+    allowed = ~restriction_mask(restricted_hours, len(appliances), num_hours)
+    schedule = Schedule.empty(appliances, num_hours)
+    iterations, status = 0, "Optimal"
+
+    if risk <= 0:
+        method = "mean"
+        schedule.hours[:], feasible = cheapest_hours_batch(prices.mean(axis=0), durations, ~allowed)
+        status = "Optimal" if feasible.all() else "Infeasible"
+    else:
+        # Cost matrix (S, n) over the allowed appliance-hour cells only
+        rows, cols = np.nonzero(allowed)
+        costs = power[rows] * prices[:, cols]
+        mean_costs = costs.mean(axis=0)
+        tail_weight = 1.0 / ((1 - alpha) * num_scenarios)
+
+        with span("lp_build", solver="saa"):
+            model = pulp.LpProblem("StochasticCost", pulp.LpMinimize)
+            x = [pulp.LpVariable(f"x{i}", lowBound=0, upBound=1, cat="Binary") for i in range(len(rows))]
+            eta = pulp.LpVariable("eta")
+            for a in range(len(appliances)):
+                model += pulp.lpSum(x[i] for i in np.flatnonzero(rows == a)) == durations[a]
+
+            def linear(coefficients, constant=0.0):
+                return pulp.LpAffineExpression(list(zip(x, coefficients.tolist())), constant=constant)
+
+            if method == "extensive":
+                u = [pulp.LpVariable(f"u{s}", lowBound=0) for s in range(num_scenarios)]
+                for s in range(num_scenarios):
+                    model += u[s] >= linear(costs[s]) - eta
+                model += (1 - risk) * linear(mean_costs) + risk * (eta + tail_weight * pulp.lpSum(u))
+            else:
+                theta = pulp.LpVariable("theta", lowBound=0)
+                model += (1 - risk) * linear(mean_costs) + risk * (eta + theta)
+                # Cut over all scenarios; it also keeps eta bounded below
+                model += theta >= (1 / (1 - alpha)) * (linear(mean_costs) - eta)
+
+        with span("lp_solve", solver="saa"):
+            # Cuts are collected on the LP relaxation first, where each master
+            # solve is cheap, then the binary master only has to close the gap.
+            # Each phase gets its own max_iterations.
+            phases = [pulp.LpContinuous, pulp.LpInteger] if method == "cuts" else [pulp.LpInteger]
+            for cat in phases:
+                for v in x:
+                    v.cat = cat
+                for solves in range(1, max_iterations + 1):
+                    iterations += 1
+                    model.solve(pulp.PULP_CBC_CMD(msg=0))
+                    status = pulp.LpStatus[model.status]
+                    if method == "extensive" or status != "Optimal":
+                        break
+                    chosen = np.array([v.value() or 0.0 for v in x])
+                    scenario = costs @ chosen
+                    eta_value, theta_value = eta.value() or 0.0, theta.value() or 0.0
+                    tail = scenario > eta_value
+                    if tail_weight * (scenario[tail] - eta_value).sum() <= theta_value + tolerance * max(1.0, theta_value):
+                        break
+                    if solves == max_iterations:
+                        if cat == pulp.LpInteger:
+                            status = "IterationLimit"
+                        break
+                    model += theta >= tail_weight * (linear(costs[tail].sum(axis=0)) - int(tail.sum()) * eta)
+        inc("lp_solve_total", status=status)
+
+        schedule.hours[rows, cols] = [(v.value() or 0) > 0.5 for v in x]
+
+    realized = scenario_costs(prices, power, schedule.hours)
+    stats = {
+        "expected_cost": float(realized.mean()),
+        "cvar": float(cvar(realized, alpha)),
+        "status": status,
+        "method": method,
+        "iterations": iterations,
+    }
+    stats["objective"] = (1 - risk) * stats["expected_cost"] + risk * stats["cvar"]
+    return schedule, stats
 
 
 def format_schedule_readable(schedule, appliances):
     """Format schedule into human-readable time ranges"""
-    readable = {}
-    
-    for name, hours in schedule.items():
-        if not hours or len(hours) == 0:
-            readable[name] = "Not scheduled"
-            continue
-
-        hours = sorted(hours)
-        ranges = []
-        start = prev = hours[0]
-        
-        for h in hours[1:]:
-            if h != prev + 1:
-                ranges.append(f"{start}:00–{prev+1}:00")
-                start = h
-            prev = h
-        ranges.append(f"{start}:00–{prev+1}:00")
-        
-        readable[name] = ", ".join(ranges)
-    
-    return readable
\ No newline at end of file
+    return Schedule.from_dict(schedule, appliances).format_readable()
@@ -0,0 +1,150 @@
+"""
+Process-wide registry of deserialized policies.
+
+Policies are loaded once and shared read-only by every thread in the
+process; the least recently used ones are evicted when their combined size
+exceeds the RAM budget. A file that changes on disk (e.g. retrained) is
+reloaded on its next use.
+
+    from policy_pool import get_policy
+    policy = get_policy("models/energy_agent_preferences_table.npz")
+    actions, _ = policy.predict(obs)
+
+The budget defaults to 512 MB and can be set with POLICY_POOL_MB.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_BUDGET_MB = 512
+
+
+def load_policy(path):
+    """
+    Deserialize a policy file:
+        .npz holding a lookup table -> policy_table.TablePolicy
+        other .npz                  -> numpy_policy.NumpyPolicy
+        .zip                        -> stable_baselines3 PPO (CPU)
+    """
+    if path.endswith(".zip"):
+        from stable_baselines3 import PPO
+        model = PPO.load(path, device="cpu")
+        model.policy.set_training_mode(False)
+        return model
+
+    with np.load(path) as data:
+        is_table = "table" in data
+    if is_table:
+        from policy_table import TablePolicy
+        policy = TablePolicy.load(path)
+        arrays = [policy.table]
+    else:
+        from numpy_policy import NumpyPolicy
+        policy = NumpyPolicy.load(path)
+        arrays = policy.weights + policy.biases
+
+    # One copy is shared across threads, so nobody may modify it in place
+    for array in arrays:
+        array.flags.writeable = False
+    return policy
+
+
+def policy_nbytes(policy):
+    """Approximate resident size of a policy in bytes."""
+    if hasattr(policy, "nbytes"):
+        return int(policy.nbytes)
+    if hasattr(policy, "policy"):  # stable-baselines3 model
+        return sum(p.numel() * p.element_size() for p in policy.policy.parameters())
+    return 0
+
+
+class PolicyPool:
+    """
+    Thread-safe, size-bounded LRU of loaded policies keyed by file path.
+
+    Concurrent requests for a policy that is not resident wait for a single
+    load instead of each deserializing their own copy.
+    """
+
+    def __init__(self, max_bytes, loader=load_policy):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self._entries = OrderedDict()  # path -> (mtime_ns, policy, nbytes)
+        self._loading = {}  # path -> threading.Event
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def get(self, path):
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and entry[0] == mtime:
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+                    return entry[1]
+                loading = self._loading.get(path)
+                if loading is None:
+                    self.misses += 1
+                    self._loading[path] = threading.Event()
+                    break
+            # Another thread is loading this path; use its result
+            loading.wait()
+
+        try:
+            start = time.perf_counter()
+            policy = self.loader(path)
+            elapsed = time.perf_counter() - start
+        except BaseException:
+            with self._lock:
+                self._loading.pop(path).set()
+            raise
+
+        with self._lock:
+            self.load_seconds += elapsed
+            self._entries[path] = (mtime, policy, policy_nbytes(policy))
+            self._entries.move_to_end(path)
+            self._evict()
+            self._loading.pop(path).set()
+        return policy
+
+    def _evict(self):
+        # The newest entry always stays, even if it alone exceeds the budget
+        while len(self._entries) > 1 and self.resident_bytes > self.max_bytes:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def resident_bytes(self):
+        return sum(nbytes for _, _, nbytes in self._entries.values())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "resident": {path: nbytes for path, (_, _, nbytes) in self._entries.items()},
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 4),
+            }
+
+
+default_pool = PolicyPool(int(float(os.environ.get("POLICY_POOL_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024))
+
+
+def get_policy(path):
+    """Resident policy for `path` from the process-wide pool."""
+    return default_pool.get(path)
@@ -0,0 +1,147 @@
+import argparse
+import numpy as np
+
+# 2^16 status masks x 24 hours is already 1.5M states; beyond that the table stops being tiny
+MAX_APPLIANCES = 16
+
+
+def distill_policy(model, num_hours, num_appliances):
+    """
+    Enumerate every (hour, appliance status) observation once and record the
+    policy's deterministic action for each.
+
+    The env observation is just the normalized hour plus one on/off bit per
+    appliance, so a deterministic policy is fully described by a
+    num_hours x 2^num_appliances table. Every status mask is enumerated, since
+    any of them can be reached with suitable durations.
+
+    Args:
+        model: Anything with `predict(obs, deterministic=True)` (PPO, NumpyPolicy)
+        num_hours: Episode length the policy was trained with
+        num_appliances: Number of appliances (policy action size)
+
+    Returns:
+        TablePolicy
+    """
+    if num_appliances > MAX_APPLIANCES:
+        raise ValueError(f"Too many appliances for a lookup table ({num_appliances} > {MAX_APPLIANCES})")
+
+    num_masks = 1 << num_appliances
+    hours = np.repeat(np.arange(num_hours), num_masks)
+    masks = np.tile(np.arange(num_masks), num_hours)
+
+    obs = np.empty((hours.size, 1 + num_appliances), dtype=np.float32)
+    obs[:, 0] = hours / num_hours
+    obs[:, 1:] = (masks[:, None] >> np.arange(num_appliances)) & 1
+
+    actions, _ = model.predict(obs, deterministic=True)
+    bits = (np.asarray(actions).reshape(-1, num_appliances) == 1) @ (1 << np.arange(num_appliances))
+    return TablePolicy(bits.astype(np.uint16).reshape(num_hours, num_masks), num_appliances)
+
+
+class TablePolicy:
+    """
+    Policy served by table lookup, keyed by (hour, status bitmask).
+
+    `table[hour, mask]` holds the action as a bitmask (bit i = appliance i on).
+    `predict` has the same interface as PPO.predict; `lookup` skips building
+    float observations and is what `rollout_batch` uses when available.
+    """
+
+    def __init__(self, table, num_appliances):
+        self.table = np.asarray(table, dtype=np.uint16)
+        self.num_hours = self.table.shape[0]
+        self.num_appliances = num_appliances
+        self._bit_values = 1 << np.arange(num_appliances)
+        self._rows = None
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["table"], int(data["num_appliances"]))
+
+    def save(self, path):
+        np.savez_compressed(path, table=self.table, num_appliances=self.num_appliances)
+        return path
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def hour_indices(self, fractions):
+        """
+        Table rows for observed hours (hour / horizon, as in the env observation).
+        Raises ValueError for hours outside the horizon the table was distilled for.
+        """
+        hours = np.rint(np.asarray(fractions, dtype=np.float64) * self.num_hours).astype(np.int64)
+        if hours.size and (hours.min() < 0 or hours.max() >= self.num_hours):
+            raise ValueError(f"Observation hour outside the {self.num_hours}-hour horizon this table was distilled for")
+        return hours
+
+    def lookup(self, hour, status):
+        """Boolean actions (n, A) for one hour and a (n, A) on/off status batch."""
+        if not 0 <= hour < self.num_hours:
+            raise ValueError(f"Hour {hour} is outside the {self.num_hours}-hour horizon this table was distilled for")
+        masks = np.asarray(status, dtype=bool) @ self._bit_values
+        bits = self.table[hour, masks]
+        return (bits[:, None] & self._bit_values) > 0
+
+    def schedule(self, durations, restricted_hours=()):
+        """
+        Single-scenario rollout on plain ints, for when there is no batch to amortize
+        array overhead over. Same dynamics and recording rule as `rollout_batch`.
+
+        Returns:
+            bool array (num_appliances, num_hours)
+        """
+        if self._rows is None:
+            self._rows = self.table.tolist()
+        restricted = set(restricted_hours)
+        remaining = list(durations)
+        status = sum(1 << i for i, d in enumerate(remaining) if d > 0)
+
+        hours = np.zeros((self.num_appliances, self.num_hours), dtype=bool)
+        for hour in range(self.num_hours):
+            active = self._rows[hour][status] & status
+            for i in range(self.num_appliances):
+                if active >> i & 1:
+                    hours[i, hour] = True
+                    if hour not in restricted:
+                        remaining[i] -= 1
+                        if remaining[i] <= 0:
+                            status &= ~(1 << i)
+            if status == 0 and hour not in restricted:
+                break
+        return hours
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=True):
+        obs = np.asarray(obs, dtype=np.float32)
+        batch = obs.reshape(-1, 1 + self.num_appliances)
+        hours = self.hour_indices(batch[:, 0])
+        masks = (batch[:, 1:] > 0) @ self._bit_values
+        bits = self.table[hours, masks]
+        actions = ((bits[:, None] & self._bit_values) > 0).astype(np.float32)
+        if obs.ndim == 1:
+            actions = actions[0]
+        return actions, None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill a trained policy into a lookup table")
+    parser.add_argument("model", help="Policy .npz (NumpyPolicy) or stable-baselines3 .zip")
+    parser.add_argument("output", help="Output .npz for the table")
+    parser.add_argument("--hours", type=int, default=24, help="Episode length the policy was trained with")
+    args = parser.parse_args()
+
+    if args.model.endswith(".zip"):
+        from stable_baselines3 import PPO
+        policy = PPO.load(args.model, device="cpu")
+        num_appliances = int(np.prod(policy.action_space.shape))
+    else:
+        from numpy_policy import NumpyPolicy
+        policy = NumpyPolicy.load(args.model)
+        num_appliances = policy.action_size
+
+    table = distill_policy(policy, args.hours, num_appliances)
+    table.save(args.output)
+    print(f"Saved {table.table.size:,} states ({table.nbytes:,} bytes) to {args.output}")
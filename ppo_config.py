@@ -0,0 +1,54 @@
+"""
+PPO hyperparameters for the training modules, tuned with ppo_sweep.py.
+
+models/ppo_config.json (PPO_CONFIG overrides the path) has one section per
+agent; an agent without a section, or a missing file, gets DEFAULT_PPO and
+DEFAULT_TIMESTEPS:
+
+    {"energy_agent_preferences": {"ppo": {"learning_rate": 0.001, "n_steps": 256, ...},
+                                  "total_timesteps": 12288, "sweep": {...}}}
+"""
+import json
+import os
+
+CONFIG_PATH = "models/ppo_config.json"
+AGENTS = ("energy_agent", "energy_agent_preferences")
+DEFAULT_PPO = {"learning_rate": 0.0003, "n_steps": 2048, "batch_size": 64, "n_epochs": 10, "gamma": 0.99}
+DEFAULT_TIMESTEPS = 50000
+
+
+def config_path():
+    return os.environ.get("PPO_CONFIG", CONFIG_PATH)
+
+
+def _read(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring PPO config {path}: {e}")
+        return {}
+
+
+def load_ppo_config(agent, path=None):
+    """{"ppo": PPO keyword arguments, "total_timesteps": int} for `agent`."""
+    section = _read(path or config_path()).get(agent, {})
+    return {
+        "ppo": {**DEFAULT_PPO, **{k: v for k, v in section.get("ppo", {}).items() if k in DEFAULT_PPO}},
+        "total_timesteps": int(section.get("total_timesteps", DEFAULT_TIMESTEPS)),
+    }
+
+
+def save_ppo_config(agent, ppo, total_timesteps, path=None, **info):
+    """Replace `agent`'s section (other agents are kept); extra keywords are stored alongside."""
+    path = path or config_path()
+    config = _read(path)
+    config[agent] = {"ppo": {k: ppo[k] for k in DEFAULT_PPO if k in ppo}, "total_timesteps": int(total_timesteps), **info}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(config, f, indent=2)
+        f.write("\n")
+    os.replace(path + ".tmp", path)
+    return path
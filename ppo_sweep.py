@@ -0,0 +1,357 @@
+"""
+PPO hyperparameter sweep ranked by wall-clock time to quality.
+
+Every trial trains one configuration on each scenario of a fixed, seeded
+scenario set (synthetic_fleet households and price days), and evaluates
+the deterministic policy every --eval-every timesteps. The score of an
+evaluation is its gap versus the optimum of the environment's objective
+(energy cost, plus comfort penalties for the preference agent, plus the
+env's penalties for unmet hours):
+
+    gap = (episode objective - optimum) / |optimum|
+
+The optimum is the LP optimum over the same per-hour costs
+(optimizer.cheapest_hours_batch). It ignores the env's penalty for more
+than two concurrent appliances, so it is a lower bound and the gap errs on
+the high side. For the cost agent it is exactly optimize_schedule_lp's cost.
+
+A scenario is done once the gap is at or below --target-gap. Its score is
+the training wall time until then, with evaluation time left out. Trials
+run in parallel across a process pool (one torch thread per worker) and
+share their learning curves. A trial is pruned once it is past the warm-up
+and its best gap is worse than the median of what the other trials had
+reached after the same wall time on the same scenario.
+
+Configurations that reach the target on every scenario are ranked by
+their total time to target. The winner is written to the PPO config file
+(ppo_config.py, models/ppo_config.json), with total_timesteps set to the
+timesteps it needed plus a margin, and the training modules load it from
+there.
+
+    python ppo_sweep.py --trials 16 --workers 4
+    python ppo_sweep.py --agent energy_agent --target-gap 0.02 --dry-run
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from ppo_config import AGENTS, DEFAULT_PPO, config_path, save_ppo_config
+from training_scheduler import usable_cores
+
+SPACE = {
+    "learning_rate": (1e-4, 3e-3),  # log-uniform
+    "n_steps": (128, 256, 512, 1024, 2048),
+    "batch_size": (32, 64, 128, 256),
+    "n_epochs": (3, 5, 10),
+    "gamma": (0.9, 0.95, 0.99),
+}
+TIMESTEPS_MARGIN = 1.5
+
+
+# ----------------------------------------------------------------------
+# Scenarios and configurations
+# ----------------------------------------------------------------------
+def standard_scenarios(count=3, seed=0, max_appliances=4):
+    """
+    `count` seeded scenarios: synthetic households with preferences, 2 to
+    `max_appliances` appliances and at least one of 1 kW or more, each on
+    its own price day.
+    """
+    from synthetic_fleet import generate_fleet, household
+
+    fleet = generate_fleet(200, count, seed)
+    sizes = np.diff(fleet["offsets"])
+    scenarios = []
+    for i in range(len(sizes)):
+        if len(scenarios) == count:
+            break
+        lo, hi = fleet["offsets"][i], fleet["offsets"][i + 1]
+        if 2 <= sizes[i] <= max_appliances and fleet["avoid"][i] and fleet["power"][lo:hi].max() >= 1.0:
+            scenario = household(fleet, i)
+            scenario["prices"] = fleet["prices"][len(scenarios)].astype(float).tolist()
+            scenarios.append(scenario)
+    return scenarios
+
+
+def sample_configs(count, seed=0):
+    """The current defaults first, then random configurations from SPACE."""
+    rng = np.random.default_rng(seed)
+    configs = [dict(DEFAULT_PPO)]
+    while len(configs) < count:
+        low, high = np.log(SPACE["learning_rate"])
+        config = {
+            "learning_rate": float(f"{math.exp(rng.uniform(low, high)):.2g}"),
+            "n_steps": int(rng.choice(SPACE["n_steps"])),
+            "batch_size": int(rng.choice(SPACE["batch_size"])),
+            "n_epochs": int(rng.choice(SPACE["n_epochs"])),
+            "gamma": float(rng.choice(SPACE["gamma"])),
+        }
+        if config["batch_size"] <= config["n_steps"] and config not in configs:
+            configs.append(config)
+    return configs
+
+
+def make_env(agent, scenario):
+    if agent == "energy_agent":
+        from energy_env import EnergyEnv
+        return EnergyEnv(scenario["prices"], scenario["appliances"], scenario["restricted_hours"])
+    from energy_env_with_preferences import EnergyEnvWithPreferences
+    return EnergyEnvWithPreferences(scenario["prices"], scenario["appliances"], scenario["restricted_hours"],
+                                    scenario["preferences"])
+
+
+def optimum(agent, scenario):
+    """Lowest objective over schedules that run every appliance its full duration outside restricted hours."""
+    from optimizer import cheapest_hours_batch
+
+    prices = np.asarray(scenario["prices"], dtype=np.float64)
+    appliances = scenario["appliances"]
+    hourly = np.array([a["power"] for a in appliances])[:, None] * prices
+    if agent != "energy_agent":
+        for i, a in enumerate(appliances):
+            pref = scenario["preferences"].get(a["name"])
+            if pref:
+                hourly[i, [h for h in pref.get("avoid_hours", []) if 0 <= h < len(prices)]] += pref.get("avoid_penalty", 2.0)
+                hourly[i, [h for h in pref.get("preferred_hours", []) if 0 <= h < len(prices)]] -= pref.get("preferred_bonus", 1.0)
+    hours, _ = cheapest_hours_batch(hourly, [a["duration"] for a in appliances], scenario["restricted_hours"])
+    return float((hourly * hours).sum())
+
+
+def episode_objective(model, env):
+    """Negated return of one deterministic episode."""
+    obs, _ = env.reset()
+    total, done = 0.0, False
+    while not done:
+        action, _ = model.predict(obs, deterministic=True)
+        obs, reward, done, _, _ = env.step(action)
+        total += reward
+    return -total
+
+
+def schedule_gap(model, env, best):
+    return (episode_objective(model, env) - best) / max(abs(best), 1e-3)
+
+
+# ----------------------------------------------------------------------
+# Pruning
+# ----------------------------------------------------------------------
+def best_gap_at(run, wall_s):
+    """Best gap a finished run had reached after `wall_s`; None if it was pruned before then."""
+    seen = [gap for wall, _, gap in run["curve"] if wall <= wall_s]
+    if run["status"] == "pruned" and (not run["curve"] or run["curve"][-1][0] < wall_s):
+        return None
+    return min(seen) if seen else None
+
+
+def should_prune(history, scenario, wall_s, best_gap, min_runs):
+    references = [best_gap_at(run, wall_s) for run in list(history) if run["scenario"] == scenario]
+    references = [gap for gap in references if gap is not None]
+    return len(references) >= min_runs and best_gap > float(np.median(references))
+
+
+# ----------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------
+def _init_worker():
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = "1"
+    import torch
+    torch.set_num_threads(1)
+
+
+def _train_scenario(agent, config, scenario, index, args, history, seed):
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.callbacks import BaseCallback
+    from training_callbacks import TelemetryCallback, telemetry_requested
+
+    class QualityCallback(BaseCallback):
+        """Evaluates the policy every eval_every timesteps; stops at the target gap or when pruned."""
+
+        def _on_training_start(self):
+            self.start = time.perf_counter()
+            self.eval_s = 0.0
+            self.curve = []
+            self.next_eval = args["eval_every"]
+            self.status = None
+
+        def evaluate(self):
+            begin = time.perf_counter()
+            wall_s = begin - self.start - self.eval_s
+            gap = schedule_gap(self.model, eval_env, scenario["optimum"])
+            self.curve.append((round(wall_s, 3), self.num_timesteps, round(gap, 5)))
+            self.next_eval = self.num_timesteps + args["eval_every"]
+            best = min(g for _, _, g in self.curve)
+            if gap <= args["target_gap"]:
+                self.status = "reached"
+            elif (self.num_timesteps >= args["warmup_timesteps"]
+                  and should_prune(history, index, wall_s, best, args["min_runs"])):
+                self.status = "pruned"
+            self.eval_s += time.perf_counter() - begin
+
+        def _on_rollout_start(self):
+            if self.num_timesteps >= self.next_eval:
+                self.evaluate()
+
+        def _on_step(self):
+            return self.status is None
+
+        def _on_training_end(self):
+            if self.status is None:
+                self.evaluate()
+            if self.status is None:
+                self.status = "budget"
+
+    eval_env = make_env(agent, scenario)
+    callback = QualityCallback()
+    callbacks = [callback]
+    if telemetry_requested(args["telemetry"]):
+        callbacks.append(TelemetryCallback(run_name=f"sweep-{agent}-scenario{index}"))
+    model = PPO("MlpPolicy", make_env(agent, scenario), verbose=0, seed=seed, **config)
+    model.learn(total_timesteps=args["budget"], callback=callbacks)
+
+    reached = callback.curve[-1] if callback.status == "reached" else None
+    run = {
+        "scenario": index,
+        "status": callback.status,
+        "wall_s_to_target": reached[0] if reached else None,
+        "timesteps_to_target": reached[1] if reached else None,
+        "best_gap": min(g for _, _, g in callback.curve),
+        "curve": callback.curve,
+    }
+    history.append(run)
+    return run
+
+
+def run_trial(trial, agent, config, scenarios, args, history):
+    """Train `config` on every scenario in turn; stops at the first scenario it is pruned on."""
+    start = time.perf_counter()
+    runs = []
+    for index, scenario in enumerate(scenarios):
+        runs.append(_train_scenario(agent, config, scenario, index, args, history, seed=args["seed"] + index))
+        if runs[-1]["status"] == "pruned":
+            break
+    reached = len(runs) == len(scenarios) and all(r["status"] == "reached" for r in runs)
+    return {
+        "trial": trial,
+        "config": config,
+        "status": "reached" if reached else ("pruned" if runs[-1]["status"] == "pruned" else "budget"),
+        "time_to_target_s": round(sum(r["wall_s_to_target"] for r in runs), 3) if reached else None,
+        "timesteps_to_target": max(r["timesteps_to_target"] for r in runs) if reached else None,
+        "scenarios_reached": sum(r["status"] == "reached" for r in runs),
+        "mean_best_gap": round(float(np.mean([r["best_gap"] for r in runs])), 5),
+        "wall_s": round(time.perf_counter() - start, 3),
+        "runs": runs,
+    }
+
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+def rank(results):
+    """Trials reaching the target everywhere by time to target, then the rest by progress and gap."""
+    return sorted(results, key=lambda r: (r["status"] != "reached",
+                                          r["time_to_target_s"] if r["status"] == "reached" else 0.0,
+                                          -r["scenarios_reached"], r["mean_best_gap"]))
+
+
+def sweep(agent="energy_agent_preferences", trials=12, scenarios=3, workers=None, target_gap=0.05,
+          budget=50000, eval_every=1024, warmup_timesteps=4096, min_runs=3, seed=0, verbose=True, telemetry=None):
+    """
+    Run the sweep and return (ranked trial results, scenarios).
+    With telemetry (default: the TRAINING_TELEMETRY environment variable), every
+    training run also logs its throughput under logs/training.
+    """
+    scenario_set = standard_scenarios(scenarios, seed)
+    for scenario in scenario_set:
+        scenario["optimum"] = optimum(agent, scenario)
+    args = {"target_gap": target_gap, "budget": budget, "eval_every": eval_every,
+            "warmup_timesteps": warmup_timesteps, "min_runs": min_runs, "seed": seed,
+            "telemetry": telemetry}
+    workers = workers or len(usable_cores())
+    context = multiprocessing.get_context("spawn")
+
+    results = []
+    with context.Manager() as manager:
+        history = manager.list()
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+            futures = [pool.submit(run_trial, i, agent, config, scenario_set, args, history)
+                       for i, config in enumerate(sample_configs(trials, seed))]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if verbose:
+                    print(f"trial {result['trial']:>3} {result['status']:<8} {format_config(result['config'])}  "
+                          f"{_format_time(result)}  best gap {result['mean_best_gap']:+.3f}  "
+                          f"({result['wall_s']:.1f}s)")
+    return rank(results), scenario_set
+
+
+def format_config(config):
+    return (f"lr={config['learning_rate']:<7g} n_steps={config['n_steps']:<5} batch={config['batch_size']:<4} "
+            f"epochs={config['n_epochs']:<3} gamma={config['gamma']}")
+
+
+def _format_time(result):
+    if result["status"] == "reached":
+        return f"{result['time_to_target_s']:7.1f}s to target"
+    return f"{result['scenarios_reached']} scenario(s) reached"
+
+
+def winning_timesteps(result):
+    """Timesteps the winner needed on its slowest scenario plus the margin, in whole rollouts."""
+    n_steps = result["config"]["n_steps"]
+    return int(math.ceil(result["timesteps_to_target"] * TIMESTEPS_MARGIN / n_steps) * n_steps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep PPO hyperparameters for time to a target gap vs the optimum")
+    parser.add_argument("--agent", choices=AGENTS, default="energy_agent_preferences")
+    parser.add_argument("--trials", type=int, default=12, help="Configurations to try (the first is the current default)")
+    parser.add_argument("--scenarios", type=int, default=3)
+    parser.add_argument("--workers", type=int, help="Parallel trials (default: usable cores)")
+    parser.add_argument("--target-gap", type=float, default=0.05, help="Gap vs the optimum that counts as trained")
+    parser.add_argument("--budget", type=int, default=50000, help="Timesteps per scenario before giving up")
+    parser.add_argument("--eval-every", type=int, default=1024, help="Timesteps between evaluations")
+    parser.add_argument("--warmup-timesteps", type=int, default=4096, help="No pruning before this many timesteps")
+    parser.add_argument("--min-runs", type=int, default=3, help="Finished runs of a scenario needed before pruning")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--config", default=None, help=f"Config file to update (default {config_path()})")
+    parser.add_argument("--results", help="Also write every trial's results and curves as JSON")
+    parser.add_argument("--dry-run", action="store_true", help="Rank only; do not write the config")
+    parser.add_argument("--telemetry", action="store_true", default=None,
+                        help="Log training throughput under logs/training (default: TRAINING_TELEMETRY)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ranked, scenario_set = sweep(args.agent, args.trials, args.scenarios, args.workers, args.target_gap,
+                                 args.budget, args.eval_every, args.warmup_timesteps, args.min_runs, args.seed,
+                                 telemetry=args.telemetry)
+    print(f"\nRanking ({len(ranked)} trials in {time.perf_counter() - start:.1f}s, "
+          f"target gap {args.target_gap:.0%} on {len(scenario_set)} scenarios):")
+    for place, result in enumerate(ranked, 1):
+        print(f"{place:>3}. trial {result['trial']:>3} {format_config(result['config'])}  {_format_time(result)}")
+
+    if args.results:
+        with open(args.results, "w") as f:
+            json.dump(ranked, f, indent=2)
+
+    winner = ranked[0]
+    if winner["status"] != "reached":
+        print(f"\n⚠️ No configuration reached a {args.target_gap:.0%} gap on every scenario; config not written")
+    elif args.dry_run:
+        print(f"\nWinner: trial {winner['trial']} (dry run, config not written)")
+    else:
+        path = save_ppo_config(args.agent, winner["config"], winning_timesteps(winner), path=args.config, sweep={
+            "target_gap": args.target_gap,
+            "time_to_target_s": winner["time_to_target_s"],
+            "timesteps_to_target": winner["timesteps_to_target"],
+            "scenarios": len(scenario_set),
+            "trials": len(ranked),
+            "seed": args.seed,
+            "date": time.strftime("%Y-%m-%d"),
+        })
+        print(f"\n✅ Wrote trial {winner['trial']} to {path} ({winning_timesteps(winner):,} timesteps)")
@@ -0,0 +1,379 @@
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+HISTORY_PATH = "data/price_history.csv"
+TIMEZONE = "America/Chicago"
+MODELS = ("seasonal_naive", "ridge")
+
+MS_PER_HOUR = 3_600_000
+
+
+def append_price_history(df, path=HISTORY_PATH):
+    """
+    Append raw ComEd 5-minute points (millisUTC, price in ¢/kWh) to the local
+    price history, dropping duplicates so repeated fetches are harmless.
+    """
+    new = df[["millisUTC", "price"]].dropna()
+    new = new.astype({"millisUTC": "int64", "price": "float64"})
+    if os.path.exists(path):
+        new = pd.concat([pd.read_csv(path), new], ignore_index=True)
+    new = new.drop_duplicates("millisUTC", keep="last").sort_values("millisUTC")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    new.to_csv(path, index=False)
+    return len(new)
+
+
+def load_price_history(path=HISTORY_PATH):
+    """
+    Load the local 5-minute price history.
+
+    Returns:
+        millis: int64 array of UTC timestamps in milliseconds, sorted
+        prices: float64 array of prices in $/kWh
+    """
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    df = pd.read_csv(path).dropna()
+    df = df.sort_values("millisUTC")
+    return df["millisUTC"].to_numpy(np.int64), df["price"].to_numpy(np.float64) / 100.0
+
+
+def _local_hours(epoch_hours, tz):
+    """Local hour-of-day (0-23) for each UTC epoch hour."""
+    stamps = pd.to_datetime(np.asarray(epoch_hours, dtype=np.int64) * 3600, unit="s", utc=True)
+    return stamps.tz_convert(tz).hour.to_numpy(np.int8)
+
+
+class PriceForecaster:
+    """
+    Short-horizon hourly price forecaster fed from the ComEd 5-minute feed.
+
+    5-minute points are folded into hourly buckets as they arrive. The ridge
+    model is a direct multi-output regression (one column per forecast hour)
+    over the last `lags` hourly prices plus the hour of day; its normal
+    equations are accumulated row by row, so each new complete hour costs one
+    small solve instead of a full refit. Forecasts are cached until new data
+    arrives, so repeated calls are a slice of a read-only array.
+    """
+
+    def __init__(self, model="ridge", horizon=24, lags=48, alpha=1.0, season_days=1, tz=TIMEZONE):
+        if model not in MODELS:
+            raise ValueError(f"Unknown forecast model '{model}'. Expected one of {MODELS}")
+
+        self.model = model
+        self.horizon = horizon
+        self.lags = lags
+        self.alpha = alpha
+        self.season_days = season_days
+        self.tz = tz
+
+        self.last_millis = None
+        self._hour0 = None
+        self._sums = np.zeros(0)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._hod = np.zeros(0, dtype=np.int8)
+
+        num_features = lags + 24 + 1
+        self._xtx = np.zeros((num_features, num_features))
+        self._xty = np.zeros((num_features, horizon))
+        self._num_rows = 0
+        self._next_origin = lags - 1
+        self._coef = None
+
+        self._version = 0
+        self._cache_version = -1
+        self._cache = None
+
+    # ------------------------------------------------------------------
+    # Data ingestion
+    # ------------------------------------------------------------------
+    def update(self, millis, prices):
+        """
+        Fold new 5-minute points into the hourly buckets.
+
+        Args:
+            millis: UTC timestamps in milliseconds
+            prices: Prices in $/kWh
+
+        Returns:
+            Number of points accepted
+        """
+        millis = np.asarray(millis, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64) * 100.0  # fit in ¢/kWh
+        keep = np.isfinite(prices)
+        millis, prices = millis[keep], prices[keep]
+        if millis.size == 0:
+            return 0
+
+        hours = millis // MS_PER_HOUR
+        lo, hi = int(hours.min()), int(hours.max())
+
+        if self._hour0 is None:
+            self._hour0 = lo
+        # Data from before the first bucket shifts every origin, so refit from scratch
+        needs_refit = lo < self._hour0
+        self._grow(lo, hi)
+
+        idx = hours - self._hour0
+        np.add.at(self._sums, idx, prices)
+        np.add.at(self._counts, idx, 1)
+
+        newest = int(millis.max())
+        self.last_millis = newest if self.last_millis is None else max(self.last_millis, newest)
+        self._version += 1
+
+        if needs_refit:
+            self._refit_ridge()
+        elif self.model == "ridge":
+            self._accumulate_rows()
+        return int(millis.size)
+
+    def _grow(self, first_hour, last_hour):
+        """Resize the bucket arrays to cover [first_hour, last_hour]."""
+        cur_first = self._hour0
+        cur_last = cur_first + self._sums.size - 1
+        new_first = min(first_hour, cur_first)
+        new_last = max(last_hour, cur_last)
+        if new_first == cur_first and new_last == cur_last:
+            return
+
+        size = new_last - new_first + 1
+        offset = cur_first - new_first
+        sums = np.zeros(size)
+        counts = np.zeros(size, dtype=np.int64)
+        sums[offset:offset + self._sums.size] = self._sums
+        counts[offset:offset + self._counts.size] = self._counts
+
+        self._hour0 = new_first
+        self._sums, self._counts = sums, counts
+        # One extra hour so the newest bucket also has a "next hour of day"
+        self._hod = _local_hours(np.arange(new_first, new_last + 2), self.tz)
+
+    def hourly_prices(self):
+        """Hourly mean prices in ¢/kWh (NaN for hours without data)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self._counts > 0, self._sums / np.maximum(self._counts, 1), np.nan)
+
+    # ------------------------------------------------------------------
+    # Ridge model
+    # ------------------------------------------------------------------
+    def _features(self, values, origins):
+        """Design rows for the given origin indices: lags, next hour-of-day one-hot, intercept."""
+        window = origins[:, None] + np.arange(-self.lags + 1, 1)
+        lag_block = values[window]
+        next_hod = self._hod[origins + 1]
+        hod_block = np.zeros((origins.size, 24))
+        hod_block[np.arange(origins.size), next_hod] = 1.0
+        return np.hstack([lag_block, hod_block, np.ones((origins.size, 1))])
+
+    def _accumulate_rows(self):
+        """Add normal-equation rows for origins whose targets are now complete."""
+        # The newest bucket may still be filling, so targets stop one short of it
+        last_origin = self._sums.size - 2 - self.horizon
+        if last_origin < self._next_origin:
+            return
+
+        values = self.hourly_prices()
+        origins = np.arange(self._next_origin, last_origin + 1)
+        X = self._features(values, origins)
+        Y = values[origins[:, None] + np.arange(1, self.horizon + 1)]
+        ok = np.isfinite(X).all(axis=1) & np.isfinite(Y).all(axis=1)
+        X, Y = X[ok], Y[ok]
+
+        self._xtx += X.T @ X
+        self._xty += X.T @ Y
+        self._num_rows += int(ok.sum())
+        self._next_origin = last_origin + 1
+        self._coef = None
+
+    def _refit_ridge(self):
+        """Rebuild the normal equations from scratch (after out-of-order data)."""
+        self._xtx[:] = 0.0
+        self._xty[:] = 0.0
+        self._num_rows = 0
+        self._next_origin = self.lags - 1
+        self._coef = None
+        if self.model == "ridge":
+            self._accumulate_rows()
+
+    def _solve(self):
+        penalty = np.full(self._xtx.shape[0], self.alpha)
+        penalty[-1] = 0.0  # do not shrink the intercept
+        A = self._xtx + np.diag(penalty)
+        try:
+            self._coef = np.linalg.solve(A, self._xty)
+        except np.linalg.LinAlgError:
+            self._coef = np.linalg.lstsq(A, self._xty, rcond=None)[0]
+
+    # ------------------------------------------------------------------
+    # Forecasting
+    # ------------------------------------------------------------------
+    def _seasonal_naive(self, values, horizon):
+        """Average of the same hour over the last `season_days` days."""
+        n = values.size
+        targets = n + np.arange(horizon)
+        base = targets - 24 * np.ceil((targets - (n - 1)) / 24).astype(int)
+        idx = base[:, None] - 24 * np.arange(self.season_days)
+        idx = np.where(idx >= 0, idx, base[:, None])
+        seen = values[idx]
+        finite = np.isfinite(seen)
+        count = finite.sum(axis=1)
+        total = np.where(finite, seen, 0.0).sum(axis=1)
+        fallback = values[np.isfinite(values)].mean()
+        return np.where(count > 0, total / np.maximum(count, 1), fallback)
+
+    def forecast(self, horizon=None):
+        """
+        Forecast hourly prices ($/kWh) for the hours after the newest bucket.
+
+        The result is cached and read-only; it is recomputed only after `update`
+        has accepted new points.
+        """
+        horizon = horizon or self.horizon
+        if self._sums.size < 24:
+            raise ValueError("Need at least 24 hours of price history to forecast")
+
+        if self._cache_version != self._version or self._cache.size < horizon:
+            values = self.hourly_prices()
+            length = max(horizon, self.horizon)
+            out = self._seasonal_naive(values, length)
+
+            if self.model == "ridge" and self._num_rows >= self._xtx.shape[0]:
+                if self._coef is None:
+                    self._solve()
+                x = self._features(np.nan_to_num(values, nan=np.nanmean(values)), np.array([values.size - 1]))
+                out[:self.horizon] = (x @ self._coef)[0]
+
+            cache = out / 100.0
+            cache.setflags(write=False)
+            self._cache = cache
+            self._cache_version = self._version
+
+        return self._cache[:horizon]
+
+    def forecast_hours(self, horizon=None):
+        """UTC epoch hours covered by `forecast(horizon)`."""
+        horizon = horizon or self.horizon
+        return self._hour0 + self._sums.size + np.arange(horizon)
+
+
+# ----------------------------------------------------------------------
+# Process-wide serving
+# ----------------------------------------------------------------------
+_forecasters = {}
+_forecasters_lock = threading.Lock()
+
+
+def get_forecaster(model="ridge", horizon=24, path=HISTORY_PATH):
+    """
+    Return a process-wide forecaster kept in sync with the history file.
+    Only points newer than the ones already folded in are read into the model.
+    """
+    key = (model, horizon, path)
+    with _forecasters_lock:
+        entry = _forecasters.get(key)
+        if entry is None:
+            entry = _forecasters[key] = {"forecaster": PriceForecaster(model, horizon), "mtime": None}
+
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        if mtime != entry["mtime"]:
+            forecaster = entry["forecaster"]
+            millis, prices = load_price_history(path)
+            if forecaster.last_millis is not None:
+                new = millis > forecaster.last_millis
+                millis, prices = millis[new], prices[new]
+            forecaster.update(millis, prices)
+            entry["mtime"] = mtime
+
+        return entry["forecaster"]
+
+
+def forecast_prices(horizon=24, model="ridge", path=HISTORY_PATH):
+    """Next-`horizon`-hour price vector ($/kWh) for the optimizer and envs."""
+    forecaster = get_forecaster(model, max(horizon, 24), path)
+    with _forecasters_lock:
+        return forecaster.forecast(horizon)
+
+
+def forecast_frame(horizon=24, model="ridge", path=HISTORY_PATH):
+    """Forecast in the same time/price layout as `fetch_comed_prices`."""
+    forecaster = get_forecaster(model, max(horizon, 24), path)
+    with _forecasters_lock:
+        prices = forecaster.forecast(horizon)
+        hours = forecaster.forecast_hours(horizon)
+    stamps = pd.to_datetime(hours * 3600, unit="s", utc=True).tz_convert(forecaster.tz)
+    return pd.DataFrame({"time": stamps.strftime("%I:%M %p"), "price": np.asarray(prices)})
+
+
+# ----------------------------------------------------------------------
+# Backtesting
+# ----------------------------------------------------------------------
+def backtest(millis, prices, models=MODELS, horizon=24, min_train_hours=24 * 7, step=24):
+    """
+    Rolling-origin backtest. Each model is fed the history in `step`-hour
+    increments (exercising the incremental update path) and forecasts the
+    following `horizon` hours after every increment.
+
+    Returns:
+        DataFrame indexed by model with MAE/RMSE/bias ($/kWh), the number of
+        origins evaluated, mean update (fit) time in ms and mean forecast
+        latency in µs.
+    """
+    millis = np.asarray(millis, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    order = np.argsort(millis)
+    millis, prices = millis[order], prices[order]
+
+    hours = millis // MS_PER_HOUR
+    first = int(hours[0])
+    num_hours = int(hours[-1]) - first + 1
+    sums = np.bincount(hours - first, weights=prices, minlength=num_hours)
+    counts = np.bincount(hours - first, minlength=num_hours)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        actual = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    # Point index where each hour starts, to slice arrivals per increment
+    starts = np.searchsorted(hours, first + np.arange(num_hours + 1))
+
+    rows = []
+    for model in models:
+        forecaster = PriceForecaster(model, horizon)
+        errors, fit_times, predict_times = [], [], []
+        fed = 0
+        for end_hour in range(min_train_hours, num_hours - horizon + 1, step):
+            t0 = time.perf_counter()
+            forecaster.update(millis[starts[fed]:starts[end_hour]], prices[starts[fed]:starts[end_hour]])
+            forecaster.forecast()
+            fit_times.append(time.perf_counter() - t0)
+            fed = end_hour
+
+            t0 = time.perf_counter()
+            predicted = forecaster.forecast()
+            predict_times.append(time.perf_counter() - t0)
+
+            errors.append(predicted - actual[end_hour:end_hour + horizon])
+
+        errors = np.array(errors)
+        rows.append({
+            "model": model,
+            "origins": len(errors),
+            "mae": float(np.nanmean(np.abs(errors))) if errors.size else np.nan,
+            "rmse": float(np.sqrt(np.nanmean(errors ** 2))) if errors.size else np.nan,
+            "bias": float(np.nanmean(errors)) if errors.size else np.nan,
+            "fit_ms": 1e3 * float(np.mean(fit_times)) if fit_times else np.nan,
+            "forecast_us": 1e6 * float(np.median(predict_times)) if predict_times else np.nan,
+        })
+
+    return pd.DataFrame(rows).set_index("model")
+
+
+if __name__ == "__main__":
+    millis, prices = load_price_history()
+    if millis.size == 0:
+        print(f"No price history at {HISTORY_PATH}. Run fetch_live_prices.py to start collecting it.")
+    else:
+        print(backtest(millis, prices).round(5))
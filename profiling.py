@@ -0,0 +1,168 @@
+"""
+Opt-in profiling of single optimization requests.
+
+Each profiled stage (LP solve, PPO training + rollout, ...) is run under
+cProfile and a stack sampler, and leaves two files behind:
+
+    <PROFILE_DIR>/<request>/<run>/<stage>.prof        deterministic profile (pstats / snakeviz)
+    <PROFILE_DIR>/<request>/<run>/<stage>.collapsed   sampled stacks, one "a;b;c count" line per stack
+                                                      (flamegraph.pl, speedscope, inferno)
+
+<request> is the scenario hash (result_cache.scenario_key), so all runs of
+one scenario sit together, and every capture is appended to
+<PROFILE_DIR>/index.ndjson. Profiling is off unless requested per call or
+with PROFILE_REQUESTS=1; PROFILE_DIR defaults to logs/profiles.
+
+    python profiling.py                 # list captures
+    python profiling.py <request> [-n 25]  # top functions of that request's latest run
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_DIR = "logs/profiles"
+SAMPLE_INTERVAL = 0.005
+
+
+def profiling_requested(flag=None):
+    """Per-request flag if given, otherwise the PROFILE_REQUESTS environment variable."""
+    if flag is not None:
+        return bool(flag)
+    return os.environ.get("PROFILE_REQUESTS", "").lower() in ("1", "true", "yes")
+
+
+def profile_dir():
+    return os.environ.get("PROFILE_DIR", PROFILE_DIR)
+
+
+def new_run_dir(request_id):
+    """Directory for one profiled run of `request_id` (a new one per run)."""
+    run = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident() % 10000:04d}"
+    return os.path.join(profile_dir(), request_id, run)
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds into collapsed-stack counts."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.counts[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def profile_call(run_dir, stage, fn, *args, request_id=None, **kwargs):
+    """
+    Call fn(*args, **kwargs) under cProfile and the stack sampler, write
+    <run_dir>/<stage>.prof and .collapsed, index them, and return fn's result.
+    """
+    os.makedirs(run_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident())
+    start = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    error = None
+    try:
+        return fn(*args, **kwargs)
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        profiler.disable()
+        sampler.stop()
+        duration = time.perf_counter() - start
+        prof_path = os.path.join(run_dir, f"{stage}.prof")
+        collapsed_path = os.path.join(run_dir, f"{stage}.collapsed")
+        profiler.dump_stats(prof_path)
+        sampler.write(collapsed_path)
+        _index({
+            "time": time.time(),
+            "request": request_id or os.path.basename(os.path.dirname(run_dir)),
+            "run": os.path.basename(run_dir),
+            "stage": stage,
+            "duration_s": round(duration, 6),
+            "samples": sum(sampler.counts.values()),
+            "error": error,
+            "profile": prof_path,
+            "collapsed": collapsed_path,
+        })
+
+
+_index_lock = threading.Lock()
+
+
+def _index(record):
+    path = os.path.join(profile_dir(), "index.ndjson")
+    with _index_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def read_index():
+    path = os.path.join(profile_dir(), "index.ndjson")
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    import argparse
+    import pstats
+
+    parser = argparse.ArgumentParser(description="Inspect captured request profiles")
+    parser.add_argument("request", nargs="?", help="Request hash (or a prefix of it)")
+    parser.add_argument("-n", type=int, default=20, help="Functions to show per stage")
+    parser.add_argument("--sort", default="cumulative", help="pstats sort key")
+    args = parser.parse_args()
+
+    index = read_index()
+    if not args.request:
+        if not index:
+            print(f"No captures in {profile_dir()}.")
+        for r in index:
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r['time']))}  {r['request']}  "
+                  f"{r['run']}  {r['stage']:<10} {r['duration_s']:8.3f}s  {r['samples']:>6} samples")
+        sys.exit()
+
+    matches = [r for r in index if r["request"].startswith(args.request)]
+    if not matches:
+        sys.exit(f"No captures for request {args.request}")
+    latest = matches[-1]["run"]
+    for r in matches:
+        if r["run"] != latest:
+            continue
+        print(f"=== {r['request']} / {r['run']} / {r['stage']}: {r['duration_s']:.3f}s "
+              f"(collapsed stacks: {r['collapsed']})")
+        pstats.Stats(r["profile"]).strip_dirs().sort_stats(args.sort).print_stats(args.n)
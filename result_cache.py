@@ -0,0 +1,89 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+from metrics import inc
+
+
+def scenario_key(prices=None, appliances=None, restricted_hours=None, preferences=None, **extra):
+    """
+    Canonical hash of an optimization scenario.
+
+    Equal inputs hash equally however they were built: prices are compared as
+    float64, restricted hours as a sorted set, and preference hour lists and
+    keys are sorted. Appliance order is kept, since it fixes the RL action layout.
+    Any extra keyword (e.g. total_timesteps) becomes part of the key.
+    """
+    canonical = {
+        "prices": None if prices is None else np.asarray(prices, dtype=np.float64).tolist(),
+        "appliances": None if appliances is None else [
+            [a["name"], float(a["power"]), int(a["duration"])] for a in appliances
+        ],
+        "restricted_hours": None if restricted_hours is None else sorted({int(h) for h in restricted_hours}),
+        "preferences": None if preferences is None else {
+            name: {
+                k: sorted(int(h) for h in v) if isinstance(v, (list, tuple, set)) else v
+                for k, v in pref.items()
+            }
+            for name, pref in preferences.items()
+        },
+        "extra": extra,
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with a fixed number of entries.
+
+    Instances are module-level, so every Streamlit session in the server
+    process shares them.
+    """
+
+    def __init__(self, maxsize, name="results"):
+        self.maxsize = maxsize
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                inc("cache_requests_total", cache=self.name, result="miss")
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            inc("cache_requests_total", cache=self.name, result="hit")
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {"size": len(self), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+# LP results only depend on prices, appliances and restrictions, so changing a
+# preference reuses them; RL results also depend on preferences and training length
+lp_results = ResultCache(maxsize=256, name="lp")
+rl_results = ResultCache(maxsize=64, name="rl")
+# The HTTP service caches its JSON responses under the same scenario keys,
+# so they live apart from the (Schedule, cost) results the app stores above
+lp_responses = ResultCache(maxsize=256, name="lp_responses")
@@ -0,0 +1,100 @@
+import numpy as np
+from comfort import score_comfort
+
+
+def restriction_mask(restricted_hours, num_scenarios, num_hours):
+    """(num_scenarios, num_hours) bool mask from a shared hour list or a per-scenario mask."""
+    if restricted_hours is None:
+        return np.zeros((num_scenarios, num_hours), dtype=bool)
+    restricted = np.asarray(restricted_hours)
+    if restricted.dtype == bool:
+        return np.broadcast_to(restricted, (num_scenarios, num_hours))
+    mask = np.zeros(num_hours, dtype=bool)
+    mask[[h for h in restricted.tolist() if 0 <= h < num_hours]] = True
+    return np.broadcast_to(mask, (num_scenarios, num_hours))
+
+
+def rollout_batch(model, prices, appliances, restricted_hours=None, preferences=None, durations=None):
+    """
+    Roll a trained policy out over many scenarios at once.
+
+    All scenarios share the appliance list (it fixes the policy's input size),
+    but each may have its own prices, restrictions and durations. Every hour
+    the still-running scenarios are stacked into one observation batch and the
+    policy is evaluated once, with the same dynamics as EnergyEnv /
+    EnergyEnvWithPreferences and the same recording rule as `run_agent`.
+
+    Args:
+        model: Policy with `predict(obs, deterministic=True)` accepting (n, 1 + A) batches,
+            e.g. PPO, numpy_policy.NumpyPolicy or policy_table.TablePolicy
+        prices: (num_scenarios, num_hours) prices, or one (num_hours,) vector
+        appliances: List of appliance dicts with name, power, duration
+        restricted_hours: Shared list of hour indices, or (num_scenarios, num_hours) bool mask
+        preferences: Optional preference dict used for the comfort scores
+        durations: Optional (num_scenarios, A) durations overriding the appliance ones
+
+    Returns:
+        Dict with
+            hours: bool array (num_scenarios, A, num_hours); row i of scenario n
+                is a Schedule row, e.g. Schedule(names, power, hours[n])
+            cost, comfort, peak_load: float arrays (num_scenarios,)
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=np.float64))
+    num_scenarios, num_hours = prices.shape
+    num_appliances = len(appliances)
+    names = [a["name"] for a in appliances]
+    power = np.array([a["power"] for a in appliances], dtype=np.float64)
+
+    if durations is None:
+        durations = [a["duration"] for a in appliances]
+    remaining = np.array(np.broadcast_to(durations, (num_scenarios, num_appliances)), dtype=np.int64)
+    restricted = restriction_mask(restricted_hours, num_scenarios, num_hours)
+
+    hours = np.zeros((num_scenarios, num_appliances, num_hours), dtype=bool)
+    obs = np.zeros((num_scenarios, 1 + num_appliances), dtype=np.float32)
+    running = np.arange(num_scenarios)
+    # Lookup-table policies (policy_table.TablePolicy) are distilled for one horizon
+    # and skip building observations
+    model_hours = getattr(model, "num_hours", None)
+    if model_hours is not None and model_hours != num_hours:
+        raise ValueError(f"Policy was distilled for {model_hours} hours, got {num_hours} prices")
+    use_lookup = hasattr(model, "lookup")
+
+    for hour in range(num_hours):
+        if running.size == 0:
+            break
+
+        has_remaining = remaining[running] > 0
+        if use_lookup:
+            action = model.lookup(hour, has_remaining)
+        else:
+            obs_batch = obs[:running.size]
+            obs_batch[:, 0] = hour / num_hours
+            obs_batch[:, 1:] = has_remaining
+
+            action, _ = model.predict(obs_batch, deterministic=True)
+            action = np.asarray(action).reshape(running.size, num_appliances) == 1
+
+        # Only record if appliance had remaining duration before the step
+        active = action & has_remaining
+        hours[running, :, hour] = active
+
+        # Restricted hours are penalized by the env but never consume duration
+        open_hour = ~restricted[running, hour]
+        remaining[running] -= active & open_hour[:, None]
+
+        finished = open_hour & (remaining[running] <= 0).all(axis=1)
+        running = running[~finished]
+
+    if preferences:
+        comfort = score_comfort(hours, names, preferences)
+    else:
+        comfort = np.full(num_scenarios, 5.0)
+    load = np.einsum("a,nat->nt", power, hours)
+
+    return {
+        "hours": hours,
+        "cost": np.einsum("nt,nt->n", load, prices),
+        "comfort": comfort,
+        "peak_load": load.max(axis=1) if num_hours else np.zeros(num_scenarios),
+    }
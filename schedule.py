@@ -0,0 +1,131 @@
+from collections.abc import Mapping
+import numpy as np
+from comfort import score_comfort
+
+
+class Schedule(Mapping):
+    """
+    Appliance schedule backed by an appliance × hour-slot boolean array.
+
+    It still reads like the legacy `{name: [hours]}` dict (`schedule[name]`,
+    `.items()`, `.get()`...), so existing callers keep working, while cost,
+    peak load, comfort and formatting are computed on the array directly.
+
+    Attributes:
+        names: Appliance names, one per row
+        power: Power draw per appliance (kWh per slot)
+        hours: Boolean array of shape (num_appliances, num_slots)
+    """
+
+    def __init__(self, names, power, hours):
+        self.names = list(names)
+        self.power = np.asarray(power, dtype=np.float64)
+        self.hours = np.asarray(hours, dtype=bool)
+        if self.hours.ndim != 2 or self.hours.shape[0] != len(self.names):
+            raise ValueError(f"hours must have shape ({len(self.names)}, num_slots), got {self.hours.shape}")
+
+        # Like the legacy dict, a repeated name refers to its last appliance
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def empty(cls, appliances, num_slots):
+        """All-off schedule for a list of appliance dicts."""
+        return cls(
+            [a["name"] for a in appliances],
+            [a["power"] for a in appliances],
+            np.zeros((len(appliances), num_slots), dtype=bool),
+        )
+
+    @classmethod
+    def from_dict(cls, schedule, appliances=None, num_slots=None):
+        """
+        Build a Schedule from a legacy `{name: [hours]}` dict.
+
+        Hours may be ints, floats or numeric strings; invalid entries are skipped.
+        Power is looked up by name in `appliances` (0.0 when unknown).
+        """
+        if isinstance(schedule, Schedule):
+            return schedule
+
+        power_by_name = {a["name"]: a["power"] for a in appliances or []}
+        names = list(schedule)
+        rows = []
+        for name in names:
+            valid = []
+            for h in schedule[name] or []:
+                try:
+                    valid.append(int(float(h)))  # safely cast string or float to int
+                except (TypeError, ValueError) as e:
+                    print(f"Skipping invalid hour '{h}' for {name}: {e}")
+            rows.append(valid)
+
+        if num_slots is None:
+            num_slots = max([max(r) + 1 for r in rows if r] + [24])
+
+        hours = np.zeros((len(names), num_slots), dtype=bool)
+        for i, valid in enumerate(rows):
+            valid = [h for h in valid if 0 <= h < num_slots]
+            hours[i, valid] = True
+
+        return cls(names, [power_by_name.get(n, 0.0) for n in names], hours)
+
+    # ------------------------------------------------------------------
+    # Mapping interface (legacy dict compatibility)
+    # ------------------------------------------------------------------
+    def __getitem__(self, name):
+        return np.flatnonzero(self.hours[self._index[name]]).tolist()
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        return f"Schedule({self.to_dict()!r})"
+
+    def to_dict(self):
+        """Legacy `{name: [hours]}` representation."""
+        return {name: self[name] for name in self}
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+    @property
+    def num_slots(self):
+        return self.hours.shape[1]
+
+    def load(self):
+        """Energy drawn in each slot (kWh). Not cached: callers fill `hours` in place."""
+        return self.power @ self.hours
+
+    def cost(self, prices):
+        """Total electricity cost for the given per-slot prices."""
+        return float(self.load() @ np.asarray(prices, dtype=np.float64)[:self.num_slots])
+
+    def peak_load(self):
+        """Highest energy drawn in any single slot (kWh)."""
+        return float(self.load().max()) if self.num_slots else 0.0
+
+    def comfort(self, preferences):
+        """Comfort score (0-10) of this schedule, see comfort.score_comfort."""
+        return float(score_comfort(self.hours, self.names, preferences)[0])
+
+    # ------------------------------------------------------------------
+    # Formatting
+    # ------------------------------------------------------------------
+    def format_readable(self):
+        """Human-readable time ranges per appliance, e.g. "2:00–4:00, 13:00–14:00"."""
+        padded = np.zeros((self.hours.shape[0], self.num_slots + 2), dtype=np.int8)
+        padded[:, 1:-1] = self.hours
+        edges = np.diff(padded, axis=1)
+
+        readable = {}
+        for name in self:
+            row = edges[self._index[name]]
+            starts, ends = np.flatnonzero(row == 1), np.flatnonzero(row == -1)
+            if starts.size == 0:
+                readable[name] = "Not scheduled"
+                continue
+            readable[name] = ", ".join(f"{s}:00–{e}:00" for s, e in zip(starts, ends))
+        return readable
@@ -0,0 +1,412 @@
+"""
+Headless batch scheduling for whole fleets of households.
+
+Reads a fleet appliance file (one row per household appliance, see
+utils.io_utils.FleetDatasetReader), schedules every household with the chosen
+engine across a process pool and streams the results to NDJSON (gzip when the
+path ends in .gz) or to a directory of Parquet parts.
+
+Engines:
+    lp  optimize_schedule_lp per household (CBC)
+    dp  optimizer.cheapest_hours_batch, same optimum as lp without a solver
+    rl  a trained policy (lookup table or NumPy export) rolled out in batches
+
+Progress is checkpointed after every chunk next to the output
+(<output>.checkpoint.json); rerunning the same command resumes there.
+
+Usage:
+    python schedule_fleet.py fleet.csv schedules.ndjson.gz --engine dp
+    python schedule_fleet.py fleet.csv schedules/ --format parquet --engine rl --workers 8
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from policy_pool import get_policy
+from utils.io_utils import FleetDatasetReader
+
+ENGINES = ("lp", "dp", "rl")
+DEFAULT_POLICIES = ("models/energy_agent_preferences_table.npz", "models/energy_agent_preferences.npz")
+
+# Set once per worker process by _init_worker
+_worker = {}
+
+
+def parse_hours(text):
+    """'0-7,22,23' -> [0, 1, ..., 7, 22, 23]"""
+    hours = []
+    for part in filter(None, (p.strip() for p in (text or "").split(","))):
+        start, _, end = part.partition("-")
+        hours.extend(range(int(start), int(end or start) + 1))
+    return sorted(set(hours))
+
+
+def load_household_settings(path):
+    """
+    Per-household preferences and restrictions, keyed by household id (as str).
+
+    Accepts NDJSON lines or one JSON object keyed by household:
+        {"household": "17", "preferences": {...}, "restricted_hours": [0, 1]}
+    """
+    if not path:
+        return {}
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        return {str(k): v for k, v in data.items()}
+    return {str(r["household"]): r for r in data}
+
+
+# ----------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------
+def _init_worker(engine, prices, restricted_hours, policy_path):
+    _worker.update(engine=engine, prices=np.asarray(prices, dtype=np.float64),
+                   restricted_hours=restricted_hours, policy=None)
+    if engine == "rl":
+        policy = get_policy(policy_path)
+        _worker["policy"] = policy
+        _worker["num_actions"] = getattr(policy, "num_appliances", None) or policy.action_size
+
+
+def _solve_lp(names, power, duration, restricted_hours):
+    """Hours (A, T) and status for one household with optimize_schedule_lp."""
+    from optimizer import solve_schedule_lp
+
+    prices = _worker["prices"]
+    # Appliances do not interact, so each one only has to fit the allowed hours on its own (as in the dp engine)
+    allowed = len(prices) - len({h for h in restricted_hours if 0 <= h < len(prices)})
+    if (duration > allowed).any():
+        return np.zeros((len(names), len(prices)), dtype=bool), "infeasible"
+    appliances = [{"name": f"{i}_{n}", "power": float(p), "duration": int(d)}
+                  for i, (n, p, d) in enumerate(zip(names, power, duration))]
+    schedule, status = solve_schedule_lp(prices, appliances, restricted_hours)
+    if status != "Optimal":
+        return np.zeros((len(names), len(prices)), dtype=bool), "infeasible"
+    return schedule.hours, "ok"
+
+
+def _rollout_group(rows, chunk, restricted):
+    """Roll the policy out for households that share the action layout, padded to it."""
+    from rollout import rollout_batch
+
+    num_actions, offsets = _worker["num_actions"], chunk["offsets"]
+    durations = np.zeros((len(rows), num_actions), dtype=np.int64)
+    for k, i in enumerate(rows):
+        lo, hi = offsets[i], offsets[i + 1]
+        durations[k, :hi - lo] = chunk["duration"][lo:hi]
+
+    # Padding slots have no duration left, so their status bit stays off
+    placeholder = [{"name": str(a), "power": 0.0, "duration": 0} for a in range(num_actions)]
+    result = rollout_batch(_worker["policy"], np.broadcast_to(_worker["prices"], (len(rows), len(_worker["prices"]))),
+                           placeholder, restricted[rows], durations=durations)
+    return result["hours"]
+
+
+def _schedule_chunk(chunk, settings):
+    """Schedule one reader chunk; returns columnar results in household order."""
+    from comfort import score_comfort
+
+    prices = _worker["prices"]
+    num_hours = len(prices)
+    households, offsets = chunk["households"], chunk["offsets"]
+    names, power, duration = chunk["names"], chunk["power"], chunk["duration"]
+
+    restricted = np.zeros((len(households), num_hours), dtype=bool)
+    for i, household in enumerate(households):
+        hours_i = settings.get(str(household), {}).get("restricted_hours", _worker["restricted_hours"])
+        restricted[i, [h for h in hours_i if 0 <= h < num_hours]] = True
+
+    hours = np.zeros((len(names), num_hours), dtype=bool)
+    status = np.full(len(households), "ok", dtype=object)
+
+    if _worker["engine"] == "rl":
+        sizes = np.diff(offsets)
+        fits = np.flatnonzero(sizes <= _worker["num_actions"])
+        status[sizes > _worker["num_actions"]] = "unsupported"
+        if fits.size:
+            rolled = _rollout_group(fits, chunk, restricted)
+            for k, i in enumerate(fits):
+                lo, hi = offsets[i], offsets[i + 1]
+                hours[lo:hi] = rolled[k, :hi - lo]
+                if (hours[lo:hi].sum(axis=1) < duration[lo:hi]).any():
+                    status[i] = "incomplete"
+    elif _worker["engine"] == "dp":
+        from optimizer import cheapest_hours_batch
+        row_household = np.repeat(np.arange(len(households)), np.diff(offsets))
+        hours, feasible = cheapest_hours_batch(prices, duration, restricted[row_household])
+        status[np.unique(row_household[~feasible])] = "infeasible"
+    else:
+        for i in range(len(households)):
+            lo, hi = offsets[i], offsets[i + 1]
+            hours[lo:hi], status[i] = _solve_lp(
+                names[lo:hi], power[lo:hi], duration[lo:hi].astype(np.int64), np.flatnonzero(restricted[i]).tolist())
+
+    # Per-household cost, peak load and comfort straight from the CSR arrays
+    load = power[:, None].astype(np.float64) * hours
+    household_load = np.add.reduceat(load, offsets[:-1], axis=0) if len(households) else load[:0]
+    comfort = np.full(len(households), 5.0)
+    for i, household in enumerate(households):
+        preferences = settings.get(str(household), {}).get("preferences")
+        if preferences:
+            lo, hi = offsets[i], offsets[i + 1]
+            comfort[i] = score_comfort(hours[lo:hi], list(names[lo:hi]), preferences)[0]
+
+    return {
+        "households": households,
+        "offsets": offsets,
+        "names": names,
+        "hours_mask": hours @ (np.uint64(1) << np.arange(num_hours, dtype=np.uint64)) if num_hours else
+        np.zeros(len(names), dtype=np.uint64),
+        "status": status,
+        "cost": household_load @ prices,
+        "peak_load": household_load.max(axis=1) if num_hours else np.zeros(len(households)),
+        "comfort": comfort,
+        "num_hours": num_hours,
+    }
+
+
+def _run_chunk(chunk, settings, output_format, output_path):
+    """Schedule and encode one chunk; returns the output bytes and status counts."""
+    result = _schedule_chunk(chunk, settings)
+    return {
+        "payload": WRITERS[output_format].encode(result, output_path),
+        "households": len(result["households"]),
+        "statuses": Counter(result["status"].tolist()),
+    }
+
+
+# ----------------------------------------------------------------------
+# Output
+# ----------------------------------------------------------------------
+def _hours_from_mask(mask, num_hours):
+    return [h for h in range(num_hours) if mask >> h & 1]
+
+
+class NdjsonWriter:
+    """
+    One JSON line per household. Gzip output is written as one gzip member
+    per chunk, so the file can be truncated back to any checkpoint.
+
+    `encode` runs in the workers, so the parent process only appends bytes.
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        if offset and not os.path.exists(path):
+            sys.exit(f"Cannot resume: {path} is missing; rerun with --restart")
+        self._file = open(path, "r+b" if offset else "wb")
+        self._file.truncate(offset)
+        self._file.seek(offset)
+
+    @staticmethod
+    def encode(result, path):
+        num_hours = result["num_hours"]
+        offsets = result["offsets"]
+        names, masks = result["names"].tolist(), result["hours_mask"].tolist()
+        lines = []
+        for i, household in enumerate(result["households"].tolist()):
+            lo, hi = offsets[i], offsets[i + 1]
+            lines.append(json.dumps({
+                "household": household,
+                "status": result["status"][i],
+                "cost": round(float(result["cost"][i]), 6),
+                "comfort": float(result["comfort"][i]),
+                "peak_load": round(float(result["peak_load"][i]), 6),
+                "schedule": {str(name): _hours_from_mask(mask, num_hours)
+                             for name, mask in zip(names[lo:hi], masks[lo:hi])},
+            }))
+        data = "".join(line + "\n" for line in lines).encode()
+        return gzip.compress(data, compresslevel=6) if path.endswith(".gz") else data
+
+    def write(self, payload, index):
+        self._file.write(payload)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """One zstd-compressed Parquet part per chunk in an output directory (requires pyarrow)."""
+
+    def __init__(self, path, offset=0):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            sys.exit("Parquet output requires pyarrow (pip install pyarrow); use an .ndjson output instead")
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        # Parts past the checkpoint (or from an earlier run) are rewritten or dropped
+        for name in os.listdir(path):
+            if name.startswith("part-") and int(name[5:10]) >= offset:
+                os.remove(os.path.join(path, name))
+
+    @staticmethod
+    def encode(result, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        list_offsets = pa.array(result["offsets"].astype(np.int32))
+        table = pa.table({
+            "household": pa.array(result["households"].astype(str)),
+            "status": pa.array(result["status"].astype(str)),
+            "cost": result["cost"],
+            "comfort": result["comfort"],
+            "peak_load": result["peak_load"],
+            "appliances": pa.ListArray.from_arrays(list_offsets, pa.array(result["names"].astype(str))),
+            "hours_mask": pa.ListArray.from_arrays(list_offsets, pa.array(result["hours_mask"])),
+        })
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression="zstd")
+        return sink.getvalue().to_pybytes()
+
+    def write(self, payload, index):
+        part = os.path.join(self.path, f"part-{index:05d}.parquet")
+        with open(part + ".tmp", "wb") as f:
+            f.write(payload)
+        os.replace(part + ".tmp", part)
+        return index + 1
+
+    def close(self):
+        pass
+
+
+WRITERS = {"ndjson": NdjsonWriter, "parquet": ParquetWriter}
+
+
+# ----------------------------------------------------------------------
+# Checkpoints
+# ----------------------------------------------------------------------
+def run_fingerprint(args, prices, restricted_hours):
+    """Identifies a run, so a checkpoint is only resumed by the same command."""
+    stat = os.stat(args.fleet)
+    parts = [args.fleet, stat.st_size, stat.st_mtime_ns, args.engine, args.format, args.chunk_rows,
+             list(np.asarray(prices, dtype=float)), restricted_hours, args.settings, args.policy]
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def read_checkpoint(path, fingerprint):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("fingerprint") != fingerprint:
+        print(f"⚠️ Ignoring checkpoint {path}: it was written by a different run")
+        return None
+    return checkpoint
+
+
+def write_checkpoint(path, checkpoint):
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+def run(args):
+    prices = pd.read_csv(args.prices)["price"].to_numpy(np.float64)
+    if len(prices) > 64:
+        sys.exit("At most 64 price slots are supported (schedules are stored as 64-bit hour masks)")
+    restricted_hours = parse_hours(args.restricted_hours)
+    settings = load_household_settings(args.settings)
+    if args.engine == "rl" and args.policy is None:
+        args.policy = next((p for p in DEFAULT_POLICIES if os.path.exists(p)), None)
+        if args.policy is None:
+            sys.exit("No trained policy found; pass --policy")
+
+    checkpoint_path = args.output.rstrip("/") + ".checkpoint.json"
+    fingerprint = run_fingerprint(args, prices, restricted_hours)
+    checkpoint = None if args.restart else read_checkpoint(checkpoint_path, fingerprint)
+    if checkpoint and checkpoint.get("complete"):
+        print(f"{args.output} is already complete ({checkpoint['households']:,} households); use --restart to redo it")
+        return
+    checkpoint = checkpoint or {"fingerprint": fingerprint, "chunks": 0, "households": 0,
+                                "rows": 0, "position": 0, "statuses": {}}
+    skip = checkpoint["chunks"]
+    if skip:
+        print(f"Resuming after chunk {skip} ({checkpoint['households']:,} households already written)")
+
+    writer = WRITERS[args.format](args.output, checkpoint["position"])
+    reader = FleetDatasetReader(args.fleet, chunksize=args.chunk_rows)
+    statuses = Counter(checkpoint["statuses"])
+    households = rows = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                             initargs=(args.engine, prices, restricted_hours, args.policy)) as pool:
+        pending = deque()
+
+        def drain(limit):
+            nonlocal households, rows
+            while len(pending) > limit:
+                index, num_rows, future = pending.popleft()
+                done = future.result()
+                checkpoint["position"] = writer.write(done["payload"], index)
+                households += done["households"]
+                rows += num_rows
+                statuses.update(done["statuses"])
+                checkpoint.update(chunks=index + 1, households=checkpoint["households"] + done["households"],
+                                  rows=checkpoint["rows"] + num_rows, statuses=dict(statuses))
+                write_checkpoint(checkpoint_path, checkpoint)
+
+                elapsed = time.perf_counter() - start
+                print(f"chunk {index + 1}: {checkpoint['households']:,} households "
+                      f"({households / elapsed:,.0f}/s, {rows / elapsed:,.0f} appliance rows/s)")
+
+        for index, chunk in enumerate(reader.iter_chunks()):
+            if index < skip:
+                continue
+            settings_chunk = {str(h): settings[str(h)] for h in chunk["households"] if str(h) in settings}
+            pending.append((index, len(chunk["names"]), pool.submit(_run_chunk, chunk, settings_chunk, args.format, args.output)))
+            drain(2 * args.workers)
+        drain(0)
+
+    writer.close()
+    checkpoint["complete"] = True
+    write_checkpoint(checkpoint_path, checkpoint)
+
+    elapsed = time.perf_counter() - start
+    print(f"\nScheduled {households:,} households ({rows:,} appliances) in {elapsed:.1f}s "
+          f"with {args.engine} on {args.workers} workers")
+    print(f"Throughput: {households / max(elapsed, 1e-9):,.0f} households/s, "
+          f"{rows / max(elapsed, 1e-9):,.0f} appliance rows/s")
+    print("Status: " + ", ".join(f"{k} {v:,}" for k, v in statuses.most_common()))
+    if reader.rows_rejected:
+        print(f"Skipped {reader.rows_rejected} invalid rows:\n{reader.reject_summary().to_string(index=False)}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Schedule a fleet of households from the command line")
+    parser.add_argument("fleet", help="Fleet appliance CSV (household, appliance, power, duration columns)")
+    parser.add_argument("output", help="Output .ndjson[.gz] file, or directory for --format parquet")
+    parser.add_argument("--engine", choices=ENGINES, default="dp")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="ndjson")
+    parser.add_argument("--prices", default="data/prices.csv", help="CSV with a price column ($/kWh per slot)")
+    parser.add_argument("--restricted-hours", default="", help="Hours no appliance may run, e.g. '0-7,22'")
+    parser.add_argument("--settings", help="JSON/NDJSON with per-household preferences and restricted_hours")
+    parser.add_argument("--policy", help="Policy .npz for the rl engine (lookup table or NumPy export)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=20_000, help="Appliance rows per work unit")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    return parser
+
+
+if __name__ == "__main__":
+    run(build_parser().parse_args())
@@ -0,0 +1,439 @@
+"""
+Local async HTTP scheduling service.
+
+Endpoints (JSON in, JSON out):
+    GET  /health
+    GET  /policies                    policies, micro-batching and policy pool stats
+    GET  /metrics                     stage timings and counters in Prometheus text format
+                                      (recorded when started with --metrics, see metrics.py)
+    POST /optimize                    {"prices", "appliances", "restricted_hours"}
+                                      -> cheapest schedule and CBC status (optimize_schedule_lp, worker pool);
+                                      422 when the solve is not Optimal
+                                      ?profile=1 profiles the solve (see profiling.py)
+    POST /comfort                     {"schedule": {name: [hours 0-23]}, "preferences"} -> comfort score
+    POST /policies/{name}/predict     {"obs": [...] or [[...], ...]} -> policy actions
+    POST /policies/{name}/schedule    {"prices", "appliances", "restricted_hours", "preferences"}
+                                      -> policy schedule
+
+Trained policies are loaded into the process-wide policy pool
+(policy_pool.py) at startup and stay resident. Concurrent
+predict/schedule requests for the same policy that arrive within
+--batch-window-ms are answered by one batched forward pass (one
+rollout_batch call for schedules). LP solves run in a process pool so they
+never block the event loop.
+
+Run from the repository root:
+    python service.py [--port 8080] [--workers 4] [--batch-window-ms 2] [--metrics]
+"""
+import argparse
+import asyncio
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from aiohttp import web
+import metrics
+from result_cache import lp_responses, scenario_key
+from rollout import rollout_batch
+from schedule import Schedule
+from policy_pool import default_pool, get_policy
+from profiling import new_run_dir, profile_call, profiling_requested
+
+NUM_HOURS = 24
+
+
+class MicroBatcher:
+    """
+    Collects items submitted within `window` seconds (or until `max_batch`
+    items are waiting) and processes them with one `fn(items)` call in a
+    worker thread. `fn` returns one result per item.
+    """
+
+    def __init__(self, fn, max_batch=256, window=0.002):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.window = window
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await asyncio.to_thread(self.fn, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {"batches": self.batches, "requests": self.items,
+                "mean_batch": self.items / self.batches if self.batches else 0.0}
+
+
+# ----------------------------------------------------------------------
+# Batched policy work (runs in a worker thread)
+# ----------------------------------------------------------------------
+def _action_size(policy):
+    return getattr(policy, "num_appliances", None) or policy.action_size
+
+
+def predict_batch(policy, items):
+    """One forward pass for a list of observation arrays (each (obs_dim,) or (n, obs_dim))."""
+    obs = [np.atleast_2d(np.asarray(o, dtype=np.float32)) for o in items]
+    actions, _ = policy.predict(np.concatenate(obs), deterministic=True)
+    actions = np.asarray(actions).reshape(-1, _action_size(policy))
+    splits = np.cumsum([len(o) for o in obs])[:-1]
+    return [
+        (a if np.ndim(o) == 2 else a[0]).astype(int).tolist()
+        for a, o in zip(np.split(actions, splits), items)
+    ]
+
+
+def schedule_batch(policy, items):
+    """Schedules for many requests, with one rollout_batch call per price-vector length."""
+    by_length = {}
+    for k, item in enumerate(items):
+        by_length.setdefault(len(item["prices"]), []).append(k)
+
+    results = [None] * len(items)
+    for rows in by_length.values():
+        for k, result in zip(rows, _schedule_group(policy, [items[k] for k in rows])):
+            results[k] = result
+    return results
+
+
+def _schedule_group(policy, items):
+    num_actions = _action_size(policy)
+    num_hours = len(items[0]["prices"])
+    durations = np.zeros((len(items), num_actions), dtype=np.int64)
+    restricted = np.zeros((len(items), num_hours), dtype=bool)
+    for k, item in enumerate(items):
+        durations[k, :len(item["appliances"])] = [a["duration"] for a in item["appliances"]]
+        restricted[k, [h for h in item["restricted_hours"] if 0 <= h < num_hours]] = True
+
+    # Unused action slots get no duration, so the policy never runs them
+    placeholder = [{"name": str(i), "power": 0.0, "duration": 0} for i in range(num_actions)]
+    prices = np.array([item["prices"] for item in items], dtype=np.float64)
+    hours = rollout_batch(policy, prices, placeholder, restricted, durations=durations)["hours"]
+
+    results = []
+    for k, item in enumerate(items):
+        appliances = item["appliances"]
+        schedule = Schedule([a["name"] for a in appliances], [a["power"] for a in appliances],
+                            hours[k, :len(appliances)])
+        results.append({
+            "schedule": schedule.to_dict(),
+            "readable": schedule.format_readable(),
+            "cost": schedule.cost(prices[k]),
+            "peak_load": schedule.peak_load(),
+            "comfort": schedule.comfort(item["preferences"]) if item["preferences"] else None,
+        })
+    return results
+
+
+def _solve_lp(prices, appliances, restricted_hours):
+    from optimizer import solve_schedule_lp
+    schedule, status = solve_schedule_lp(prices, appliances, restricted_hours)
+    return {"schedule": schedule.to_dict(), "readable": schedule.format_readable(),
+            "cost": schedule.cost(prices), "status": status}
+
+
+# ----------------------------------------------------------------------
+# HTTP handlers
+# ----------------------------------------------------------------------
+class BadRequest(Exception):
+    pass
+
+
+async def _read_json(request, *required):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise BadRequest("Request body must be JSON")
+    if not isinstance(body, dict):
+        raise BadRequest("Request body must be a JSON object")
+    missing = [k for k in required if k not in body]
+    if missing:
+        raise BadRequest(f"Missing field(s): {', '.join(missing)}")
+    return body
+
+
+def _appliances(body):
+    try:
+        return [{"name": str(a["name"]), "power": float(a["power"]), "duration": int(a["duration"])}
+                for a in body["appliances"]]
+    except (KeyError, TypeError, ValueError) as e:
+        raise BadRequest(f"Invalid appliances: {e}")
+
+
+def _schedule(body):
+    """{name: [hours]} with every hour in 0-23, as a Schedule."""
+    schedule = body["schedule"]
+    if not isinstance(schedule, dict):
+        raise BadRequest("Invalid schedule: expected an object keyed by appliance name")
+    try:
+        checked = {str(name): [int(h) for h in hours] for name, hours in schedule.items()}
+    except (TypeError, ValueError) as e:
+        raise BadRequest(f"Invalid schedule: {e}")
+    bad = [h for hours in checked.values() for h in hours if not 0 <= h < NUM_HOURS]
+    if bad:
+        raise BadRequest(f"Invalid schedule: hours must be 0-{NUM_HOURS - 1}, got {bad[0]}")
+    return Schedule.from_dict(checked, num_slots=NUM_HOURS)
+
+
+def _prices(body):
+    if not isinstance(body["prices"], list):
+        raise BadRequest("Invalid prices: expected a list of numbers")
+    try:
+        return [float(p) for p in body["prices"]]
+    except (TypeError, ValueError) as e:
+        raise BadRequest(f"Invalid prices: {e}")
+
+
+def _restricted_hours(body):
+    hours = body.get("restricted_hours") or []
+    if not isinstance(hours, list):
+        raise BadRequest("Invalid restricted_hours: expected a list of hour indices")
+    try:
+        return [int(h) for h in hours]
+    except (TypeError, ValueError) as e:
+        raise BadRequest(f"Invalid restricted_hours: {e}")
+
+
+def _preferences(body):
+    """{name: {"avoid_hours": [int], "preferred_hours": [int], "avoid_penalty": float, "preferred_bonus": float}}"""
+    preferences = body.get("preferences") or {}
+    if not isinstance(preferences, dict):
+        raise BadRequest("Invalid preferences: expected an object keyed by appliance name")
+    try:
+        checked = {}
+        for name, pref in preferences.items():
+            if not isinstance(pref, dict):
+                raise TypeError(f"preferences for '{name}' must be an object")
+            checked[name] = dict(pref)
+            for field in ("avoid_hours", "preferred_hours"):
+                if field in pref:
+                    checked[name][field] = [int(h) for h in pref[field]]
+            for field in ("avoid_penalty", "preferred_bonus"):
+                if field in pref:
+                    checked[name][field] = float(pref[field])
+        return checked
+    except (TypeError, ValueError) as e:
+        raise BadRequest(f"Invalid preferences: {e}")
+
+
+@web.middleware
+async def error_middleware(request, handler):
+    try:
+        return await handler(request)
+    except BadRequest as e:
+        return web.json_response({"error": str(e)}, status=400)
+
+
+def _policy(request):
+    name = request.match_info["name"]
+    path = request.app["policies"].get(name)
+    if path is None:
+        raise web.HTTPNotFound(text=f"Unknown policy '{name}'")
+    return name, get_policy(path)
+
+
+async def health(request):
+    return web.json_response({"status": "ok", "uptime_s": time.time() - request.app["started"]})
+
+
+async def list_policies(request):
+    app = request.app
+    policies = {}
+    for name, path in app["policies"].items():
+        policy = get_policy(path)
+        policies[name] = {
+            "type": type(policy).__name__,
+            "action_size": _action_size(policy),
+            "predict": app["batchers"][name, "predict"].stats(),
+            "schedule": app["batchers"][name, "schedule"].stats(),
+        }
+    return web.json_response({"policies": policies, "pool": default_pool.stats()})
+
+
+async def optimize(request):
+    body = await _read_json(request, "prices", "appliances")
+    prices = _prices(body)
+    appliances = _appliances(body)
+    restricted_hours = _restricted_hours(body)
+    bad = [a["name"] for a in appliances if not 0 <= a["duration"] <= len(prices)]
+    if bad:
+        raise BadRequest(f"Invalid appliances: duration must be 0-{len(prices)} hours for {', '.join(bad)}")
+
+    key = scenario_key(prices, appliances, restricted_hours)
+    loop = asyncio.get_running_loop()
+    if profiling_requested(request.query.get("profile") == "1" or None):
+        # Profiled requests always solve, so there is something to profile
+        run_dir = new_run_dir(key[:16])
+        result = await loop.run_in_executor(request.app["pool"], profile_call, run_dir, "lp",
+                                            _solve_lp, prices, appliances, restricted_hours)
+        return web.json_response(result, status=_lp_status(result), headers={"X-Profile-Dir": run_dir})
+
+    result = lp_responses.get(key)
+    if result is None:
+        # Build/solve spans are recorded in the worker process, so time the whole round trip here
+        with metrics.span("lp_request"):
+            result = await loop.run_in_executor(request.app["pool"], _solve_lp, prices, appliances, restricted_hours)
+        if _lp_status(result) != 200:
+            return web.json_response(result, status=422)  # not cached, so a retry solves again
+        lp_responses.put(key, result)
+    return web.json_response(result)
+
+
+def _lp_status(result):
+    """HTTP status for an LP result: only Optimal solves are a success."""
+    return 200 if result["status"] == "Optimal" else 422
+
+
+async def metrics_text(request):
+    return web.Response(text=metrics.prometheus_text(),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+async def comfort(request):
+    body = await _read_json(request, "schedule", "preferences")
+    schedule = _schedule(body)
+    return web.json_response({"comfort": schedule.comfort(_preferences(body))})
+
+
+async def predict(request):
+    name, policy = _policy(request)
+    body = await _read_json(request, "obs")
+    obs_dim = 1 + _action_size(policy)
+    try:
+        obs = np.asarray(body["obs"], dtype=np.float32)
+    except (TypeError, ValueError):  # non-numeric or ragged
+        raise BadRequest(f"obs must be numbers, {obs_dim} per observation")
+    if obs.ndim not in (1, 2) or obs.shape[-1] != obs_dim:
+        raise BadRequest(f"obs must have {obs_dim} values per observation")
+    if hasattr(policy, "hour_indices"):
+        try:
+            policy.hour_indices(obs[..., 0])
+        except ValueError as e:
+            raise BadRequest(str(e))
+    with metrics.span("policy_predict", policy=name):
+        actions = await request.app["batchers"][name, "predict"].submit(obs)
+    return web.json_response({"actions": actions})
+
+
+async def policy_schedule(request):
+    name, policy = _policy(request)
+    body = await _read_json(request, "prices", "appliances")
+    prices = _prices(body)
+    appliances = _appliances(body)
+    if len(appliances) > _action_size(policy):
+        raise BadRequest(f"Policy '{name}' schedules at most {_action_size(policy)} appliances")
+    num_hours = getattr(policy, "num_hours", None)
+    if num_hours is not None and len(prices) != num_hours:
+        raise BadRequest(f"Policy '{name}' expects {num_hours} prices")
+
+    item = {
+        "prices": prices,
+        "appliances": appliances,
+        "restricted_hours": _restricted_hours(body),
+        "preferences": _preferences(body),
+    }
+    with metrics.span("policy_schedule", policy=name):
+        result = await request.app["batchers"][name, "schedule"].submit(item)
+    return web.json_response(result)
+
+
+# ----------------------------------------------------------------------
+# App
+# ----------------------------------------------------------------------
+def load_policies(pattern="models/*.npz"):
+    """
+    Paths of every exported policy and lookup table under models/, keyed by
+    file stem. Each one is loaded into the policy pool up front, so the
+    first request does not pay for deserialization.
+    """
+    policies = {}
+    for path in sorted(glob.glob(pattern)):
+        try:
+            get_policy(path)
+        except Exception as e:
+            print(f"⚠️ Skipping policy {path}: {e}")
+            continue
+        policies[os.path.splitext(os.path.basename(path))[0]] = path
+    return policies
+
+
+def create_app(workers=None, batch_window_ms=2.0, max_batch=256, policies=None):
+    """`policies` maps policy names to file paths (default: everything under models/)."""
+    app = web.Application(middlewares=[error_middleware])
+    app["started"] = time.time()
+    app["policies"] = load_policies() if policies is None else policies
+    app["batchers"] = {}
+    window = batch_window_ms / 1000.0
+    for name, path in app["policies"].items():
+        app["batchers"][name, "predict"] = MicroBatcher(
+            lambda items, path=path: predict_batch(get_policy(path), items), max_batch, window)
+        app["batchers"][name, "schedule"] = MicroBatcher(
+            lambda items, path=path: schedule_batch(get_policy(path), items), max_batch, window)
+
+    async def start_pool(app):
+        app["pool"] = ProcessPoolExecutor(workers)
+        yield
+        app["pool"].shutdown(cancel_futures=True)
+
+    app.cleanup_ctx.append(start_pool)
+    app.add_routes([
+        web.get("/health", health),
+        web.get("/policies", list_policies),
+        web.get("/metrics", metrics_text),
+        web.post("/optimize", optimize),
+        web.post("/comfort", comfort),
+        web.post("/policies/{name}/predict", predict),
+        web.post("/policies/{name}/schedule", policy_schedule),
+    ])
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local async HTTP scheduling service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for LP solves")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="How long inference requests wait to be batched together (0 = no waiting)")
+    parser.add_argument("--max-batch", type=int, default=256, help="Use 1 to disable micro-batching")
+    parser.add_argument("--metrics", action="store_true", help="Record timings and counters for GET /metrics")
+    args = parser.parse_args()
+
+    if args.metrics:
+        metrics.enable()
+
+    app = create_app(args.workers, args.batch_window_ms, args.max_batch)
+    print(f"Serving {len(app['policies'])} policies: {', '.join(app['policies'])}")
+    web.run_app(app, host=args.host, port=args.port, print=None)
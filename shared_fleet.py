@@ -0,0 +1,198 @@
+"""
+Zero-copy fleet arrays for process pools.
+
+Pickling the price curves, per-household appliance arrays and hour masks
+into every task costs more than scheduling the households in it. Here the
+parent places every array once in shared memory, or leaves it in its
+memory-mapped .npy file (synthetic_fleet.load_fleet), and sends workers a
+small spec instead. Workers attach to it once, in the pool initializer, and
+then receive tasks as plain household index ranges. They write their results
+into shared output arrays, so nothing but a row count goes back through the
+pipe.
+
+    from synthetic_fleet import load_fleet
+    from shared_fleet import schedule_fleet_shared
+
+    result = schedule_fleet_shared(load_fleet("fleet/"), day=0, workers=8)
+    result["cost"]  # (N,) $ per household
+
+See benchmarks/bench_shared_fleet.py for the per-task overhead against
+pickling the arrays into each task.
+"""
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from optimizer import cheapest_hours_batch
+from synthetic_fleet import NUM_HOURS, unpack_masks
+
+INPUTS = ("offsets", "power", "duration", "restricted", "prices")
+OUTPUTS = {"hours_mask": np.uint32, "cost": np.float64, "peak_load": np.float64, "feasible": bool}
+HOUR_BITS = np.uint32(1) << np.arange(NUM_HOURS, dtype=np.uint32)
+
+# Attached arrays of this worker process, set by _init_worker
+_worker = {}
+# (spec entry -> (shared memory block or None, array)), so a process attaches each block once
+_attached = {}
+
+
+def _is_file_mapped(array):
+    """True for a whole array memory-mapped from a file (np.load(..., mmap_mode=...)), not a slice of one."""
+    return isinstance(array, np.memmap) and isinstance(array.base, mmap.mmap) and array.flags.c_contiguous
+
+
+class SharedArrays:
+    """
+    Named arrays visible to other processes without copying.
+
+    `spec` is a small picklable description ({name: entry}) that attach()
+    turns back into arrays in a worker. Arrays memory-mapped from .npy files
+    are referenced by path; everything else is copied once into a shared
+    memory block, which is freed by close().
+    """
+
+    def __init__(self, arrays=None):
+        self.spec = {}
+        self.arrays = {}
+        self._blocks = []
+        for name, array in (arrays or {}).items():
+            self.add(name, array)
+
+    def add(self, name, array):
+        if _is_file_mapped(array):
+            self.spec[name] = ("file", os.path.abspath(array.filename), array.offset, array.shape, array.dtype.str)
+            self.arrays[name] = array
+            return array
+        array = np.asarray(array)
+        view = self.empty(name, array.shape, array.dtype)
+        view[...] = array
+        return view
+
+    def empty(self, name, shape, dtype):
+        """A new zero-filled shared array, e.g. for worker outputs."""
+        dtype = np.dtype(dtype)
+        shape = tuple(int(n) for n in np.atleast_1d(shape))
+        block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        self._blocks.append(block)
+        view = np.ndarray(shape, dtype, buffer=block.buf)
+        view.fill(0)
+        self.spec[name] = ("shm", block.name, shape, dtype.str)
+        self.arrays[name] = view
+        return view
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    @property
+    def nbytes(self):
+        return sum(block.size for block in self._blocks)
+
+    def close(self):
+        """Release the shared memory blocks; copy out anything you still need first."""
+        self.arrays.clear()
+        for block in self._blocks:
+            try:
+                block.close()
+            except BufferError:  # a view is still alive; the mapping goes away with it
+                pass
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(spec):
+    """Arrays for a SharedArrays.spec, as zero-copy views (cached per process)."""
+    arrays = {}
+    for name, entry in spec.items():
+        cached = _attached.get(entry)
+        if cached is None:
+            kind, where, *layout = entry
+            if kind == "shm":
+                shape, dtype = layout
+                block = shared_memory.SharedMemory(name=where)
+                cached = (block, np.ndarray(shape, np.dtype(dtype), buffer=block.buf))
+            else:
+                offset, shape, dtype = layout
+                cached = (None, np.memmap(where, np.dtype(dtype), mode="r", offset=offset, shape=shape))
+            _attached[entry] = cached
+        arrays[name] = cached[1]
+    return arrays
+
+
+# ----------------------------------------------------------------------
+# Scheduling
+# ----------------------------------------------------------------------
+def schedule_range(arrays, lo, hi, day=0):
+    """
+    Cost-minimal schedules (optimizer.cheapest_hours_batch) for households
+    lo:hi of a fleet. Every household must own at least one appliance.
+
+    Returns hours_mask per appliance row, and cost, peak_load and feasible
+    per household.
+    """
+    offsets = arrays["offsets"]
+    r0, r1 = offsets[lo], offsets[hi]
+    starts = offsets[lo:hi] - r0
+    prices = np.asarray(arrays["prices"][day], dtype=np.float64)
+
+    household = np.repeat(np.arange(hi - lo), np.diff(offsets[lo:hi + 1]))
+    restricted = unpack_masks(arrays["restricted"][lo:hi], len(prices))[household]
+    hours, feasible = cheapest_hours_batch(prices, arrays["duration"][r0:r1], restricted)
+
+    household_load = np.add.reduceat(arrays["power"][r0:r1, None] * hours, starts, axis=0)
+    return {
+        "hours_mask": (hours * HOUR_BITS[:len(prices)]).sum(axis=1, dtype=np.uint32),
+        "cost": household_load @ prices,
+        "peak_load": household_load.max(axis=1),
+        "feasible": np.logical_and.reduceat(feasible, starts),
+    }
+
+
+def _init_worker(spec):
+    _worker.clear()
+    _worker.update(attach(spec))
+
+
+def _schedule_shared(lo, hi, day):
+    """Pool task: schedule households lo:hi and write the results into the shared outputs."""
+    result = schedule_range(_worker, lo, hi, day)
+    r0, r1 = _worker["offsets"][lo], _worker["offsets"][hi]
+    _worker["hours_mask"][r0:r1] = result["hours_mask"]
+    for name in ("cost", "peak_load", "feasible"):
+        _worker[name][lo:hi] = result[name]
+    return hi - lo
+
+
+def household_ranges(num_households, chunk):
+    return [(lo, min(lo + chunk, num_households)) for lo in range(0, num_households, chunk)]
+
+
+def schedule_fleet_shared(fleet, day=0, workers=None, chunk=20_000):
+    """
+    Schedule every household of a fleet (synthetic_fleet arrays) for one day
+    of its prices across a process pool. Returns the output arrays (copied
+    out of shared memory) and the wall time in "seconds".
+    """
+    num_households = len(fleet["offsets"]) - 1
+    workers = workers or os.cpu_count() or 1
+    with SharedArrays({name: fleet[name] for name in INPUTS}) as shared:
+        shared.empty("hours_mask", fleet["offsets"][-1], OUTPUTS["hours_mask"])
+        for name in ("cost", "peak_load", "feasible"):
+            shared.empty(name, num_households, OUTPUTS[name])
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(shared.spec,)) as pool:
+            futures = [pool.submit(_schedule_shared, lo, hi, day) for lo, hi in household_ranges(num_households, chunk)]
+            scheduled = sum(f.result() for f in futures)
+        seconds = time.perf_counter() - start
+
+        result = {name: shared[name].copy() for name in OUTPUTS}
+    result.update(households=scheduled, seconds=seconds)
+    return result
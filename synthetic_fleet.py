@@ -0,0 +1,257 @@
+"""
+Seeded synthetic fleets and price scenarios for load and performance testing.
+
+A fleet is N households with appliance mixes drawn from
+utils.appliance_data.appliance_defaults. Each appliance has a plausible
+power and daily run time. Each household has a sleep window (restricted
+hours) and one of the app's preference presets (comfort.PRESETS). Price
+scenarios are hourly curves with a daily shape, weekday/weekend and
+seasonal swings, noise and occasional spikes.
+
+Everything is generated with vectorized NumPy from one seed, so the same
+command always writes the same fleet, and a 1M-household fleet takes a few
+seconds. It is stored as a directory of .npy arrays that load memory-mapped:
+
+    offsets      int64   (N + 1,)   household i owns rows offsets[i]:offsets[i+1]
+    appliance    uint8   (rows,)    index into meta["appliances"]
+    power        float32 (rows,)    kW
+    duration     int16   (rows,)    hours per day
+    restricted   uint32  (N,)       hour bitmask, bit h = no appliance may run at hour h
+    preset       uint8   (N,)       index into meta["presets"]
+    avoid        uint32  (N,)       hour bitmask of avoided hours (restricted hours removed)
+    prefer       uint32  (N,)       hour bitmask of preferred hours (restricted hours removed)
+    avoid_penalty, prefer_bonus  float32 (N,)
+    prices       float32 (days, 24) $/kWh
+    meta.json    seed, sizes and the lookup tables
+
+Usage:
+    python synthetic_fleet.py fleet/ --households 1000000 --days 365
+    python synthetic_fleet.py fleet/ --households 10000 --csv fleet.csv --settings settings.ndjson
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from comfort import PRESETS
+from utils.appliance_data import appliance_defaults
+
+NUM_HOURS = 24
+APPLIANCES = tuple(appliance_defaults)
+PRESET_NAMES = tuple(PRESETS)
+
+# Share of households owning each appliance and its daily run time range in hours
+OWNERSHIP = {
+    "Washing Machine": (0.80, 1, 2),
+    "Dryer": (0.60, 1, 2),
+    "Dishwasher": (0.65, 1, 2),
+    "Oven": (0.50, 1, 2),
+    "Television": (0.90, 2, 5),
+    "Computer": (0.80, 2, 8),
+    "Air Conditioner": (0.45, 3, 8),
+    "Heater": (0.35, 2, 6),
+    "Lighting": (0.98, 4, 8),
+}
+
+# Share of households per preset, and the hour their sleep window usually starts
+PRESET_SHARES = {"night_sleeper": 0.35, "early_bird": 0.25, "night_owl": 0.20, "clear": 0.20}
+SLEEP_START = {"night_sleeper": 22, "early_bird": 21, "night_owl": 1, "clear": 23}
+SLEEP_SHARE = 0.75
+
+ARRAYS = ("offsets", "appliance", "power", "duration", "restricted", "preset",
+          "avoid", "prefer", "avoid_penalty", "prefer_bonus", "prices")
+
+
+def hours_to_mask(hours):
+    return sum(1 << h for h in hours if 0 <= h < NUM_HOURS)
+
+
+def mask_to_hours(mask):
+    return [h for h in range(NUM_HOURS) if int(mask) >> h & 1]
+
+
+def unpack_masks(masks, num_hours=NUM_HOURS):
+    """uint32 hour bitmasks (N,) -> bool array (N, num_hours)."""
+    return (np.asarray(masks, dtype=np.uint32)[:, None] >> np.arange(num_hours, dtype=np.uint32) & 1).astype(bool)
+
+
+# ----------------------------------------------------------------------
+# Generators
+# ----------------------------------------------------------------------
+def generate_households(num_households, seed=0):
+    """Appliance rows (CSR by household), restrictions and preference masks as arrays."""
+    rng = np.random.default_rng(seed)
+    share, lo, hi = (np.array(column) for column in zip(*(OWNERSHIP[name] for name in APPLIANCES)))
+    base_power = np.array([appliance_defaults[name] for name in APPLIANCES], dtype=np.float32)
+
+    owned = rng.random((num_households, len(APPLIANCES)), dtype=np.float32) < share.astype(np.float32)
+    owned[~owned.any(axis=1), APPLIANCES.index("Lighting")] = True
+    household, appliance = np.nonzero(owned)  # row-major, so each household's rows are contiguous
+    counts = owned.sum(axis=1)
+    offsets = np.zeros(num_households + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    rows = appliance.size
+    power = base_power[appliance] * rng.lognormal(0.0, 0.15, rows).astype(np.float32)
+    duration = rng.integers(lo[appliance], hi[appliance] + 1).astype(np.int16)
+
+    preset = rng.choice(len(PRESET_NAMES), num_households,
+                        p=[PRESET_SHARES[name] for name in PRESET_NAMES]).astype(np.uint8)
+
+    # Sleep window: a preset-dependent start +-1 hour, 6-9 hours long, for most households
+    start = np.array([SLEEP_START[name] for name in PRESET_NAMES])[preset] + rng.integers(-1, 2, num_households)
+    length = np.where(rng.random(num_households) < SLEEP_SHARE, rng.integers(6, 10, num_households), 0)
+    k = np.arange(9)
+    bits = np.uint32(1) << ((start[:, None] + k) % NUM_HOURS).astype(np.uint32)
+    restricted = np.bitwise_or.reduce(np.where(k < length[:, None], bits, np.uint32(0)), axis=1).astype(np.uint32)
+
+    preset_avoid = np.array([hours_to_mask(PRESETS[name][0]) for name in PRESET_NAMES], dtype=np.uint32)
+    preset_prefer = np.array([hours_to_mask(PRESETS[name][1]) for name in PRESET_NAMES], dtype=np.uint32)
+    return {
+        "offsets": offsets,
+        "appliance": appliance.astype(np.uint8),
+        "power": np.round(power, 3),
+        "duration": duration,
+        "restricted": restricted,
+        "preset": preset,
+        "avoid": preset_avoid[preset] & ~restricted,
+        "prefer": preset_prefer[preset] & ~restricted,
+        "avoid_penalty": np.array([PRESETS[name][2] for name in PRESET_NAMES], dtype=np.float32)[preset],
+        "prefer_bonus": np.array([PRESETS[name][3] for name in PRESET_NAMES], dtype=np.float32)[preset],
+    }
+
+
+def generate_prices(num_days, seed=0, spike_rate=0.01):
+    """
+    Hourly $/kWh curves (num_days, 24): overnight dip and evening peak,
+    flatter weekends, a seasonal swing, a mean-reverting daily level,
+    hourly noise and afternoon-heavy price spikes.
+    """
+    rng = np.random.default_rng(seed)
+    hour = np.arange(NUM_HOURS)
+    day = np.arange(num_days)
+
+    peak = 0.02 * np.exp(-((hour - 17) ** 2) / 8.0)
+    dip = 0.01 * np.exp(-((hour - 4) ** 2) / 6.0)
+    weekend = (day % 7 >= 5)[:, None]
+    shape = 0.03 + np.where(weekend, 0.6, 1.0) * peak - dip
+
+    seasonal = 0.006 * np.cos(2 * np.pi * (day - 200) / 365.0)  # summer high
+    level = np.zeros(num_days)
+    shocks = rng.normal(0.0, 0.003, num_days)
+    for d in range(1, num_days):
+        level[d] = 0.8 * level[d - 1] + shocks[d]
+
+    noise = rng.normal(0.0, 0.004, (num_days, NUM_HOURS))
+    rate = spike_rate * (0.5 + 1.5 * np.exp(-((hour - 16) ** 2) / 12.0))
+    spikes = (rng.random((num_days, NUM_HOURS)) < rate) * rng.uniform(0.05, 0.25, (num_days, NUM_HOURS))
+
+    prices = shape + (seasonal + level)[:, None] + noise + spikes
+    return np.round(np.maximum(prices, -0.02), 4).astype(np.float32)
+
+
+def generate_fleet(num_households, num_days=1, seed=0):
+    """Households from `seed` and prices from `seed + 1`, in one dict of arrays."""
+    fleet = generate_households(num_households, seed)
+    fleet["prices"] = generate_prices(num_days, seed + 1)
+    return fleet
+
+
+# ----------------------------------------------------------------------
+# Storage
+# ----------------------------------------------------------------------
+def save_fleet(fleet, path, seed=None):
+    os.makedirs(path, exist_ok=True)
+    for name in ARRAYS:
+        np.save(os.path.join(path, f"{name}.npy"), fleet[name])
+    meta = {
+        "seed": seed,
+        "households": len(fleet["offsets"]) - 1,
+        "rows": int(fleet["offsets"][-1]),
+        "days": len(fleet["prices"]),
+        "appliances": list(APPLIANCES),
+        "presets": list(PRESET_NAMES),
+    }
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def load_fleet(path, mmap_mode="r"):
+    """Arrays of a saved fleet (memory-mapped read-only by default) plus its "meta" dict."""
+    fleet = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS}
+    with open(os.path.join(path, "meta.json")) as f:
+        fleet["meta"] = json.load(f)
+    return fleet
+
+
+def household(fleet, i):
+    """
+    One household in the optimizer format:
+        {"appliances": [{"name", "power", "duration"}, ...], "restricted_hours": [...],
+         "preferences": {name: {"avoid_hours", "preferred_hours", "avoid_penalty", "preferred_bonus"}}}
+    """
+    lo, hi = fleet["offsets"][i], fleet["offsets"][i + 1]
+    appliances = [{"name": APPLIANCES[a], "power": round(float(p), 3), "duration": int(d)}
+                  for a, p, d in zip(fleet["appliance"][lo:hi], fleet["power"][lo:hi], fleet["duration"][lo:hi])]
+    avoid, prefer = mask_to_hours(fleet["avoid"][i]), mask_to_hours(fleet["prefer"][i])
+    preferences = {}
+    if avoid or prefer:
+        preferences = {a["name"]: {"avoid_hours": avoid, "preferred_hours": prefer,
+                                   "avoid_penalty": float(fleet["avoid_penalty"][i]),
+                                   "preferred_bonus": float(fleet["prefer_bonus"][i])} for a in appliances}
+    return {"appliances": appliances, "restricted_hours": mask_to_hours(fleet["restricted"][i]),
+            "preferences": preferences}
+
+
+def write_fleet_csv(fleet, path, settings_path=None, chunk=250_000):
+    """
+    Export for schedule_fleet.py: the appliance CSV and, optionally, the
+    per-household settings as NDJSON.
+    """
+    offsets = np.asarray(fleet["offsets"])
+    num_households = len(offsets) - 1
+    names = np.array(APPLIANCES)
+    with open(path, "w") as f:
+        for start in range(0, num_households, chunk):
+            stop = min(start + chunk, num_households)
+            lo, hi = offsets[start], offsets[stop]
+            pd.DataFrame({
+                "Household ID": np.repeat(np.arange(start, stop), np.diff(offsets[start:stop + 1])),
+                "Appliance": names[fleet["appliance"][lo:hi]],
+                "Power kWh": fleet["power"][lo:hi],
+                "Duration Hours": fleet["duration"][lo:hi],
+            }).to_csv(f, index=False, header=start == 0)
+    if settings_path:
+        with open(settings_path, "w") as f:
+            for i in range(num_households):
+                settings = household(fleet, i)
+                f.write(json.dumps({"household": str(i), "restricted_hours": settings["restricted_hours"],
+                                    "preferences": settings["preferences"]}) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic fleet and price scenarios")
+    parser.add_argument("output", help="Directory for the .npy arrays")
+    parser.add_argument("--households", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=365, help="Days of hourly prices")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="Also write the appliance CSV for schedule_fleet.py")
+    parser.add_argument("--settings", help="With --csv, also write per-household settings NDJSON")
+    parser.add_argument("--prices-csv", help="Also write the first day's prices as a price CSV")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    fleet = generate_fleet(args.households, args.days, args.seed)
+    generated = time.perf_counter() - start
+    meta = save_fleet(fleet, args.output, args.seed)
+    print(f"✅ {meta['households']:,} households ({meta['rows']:,} appliances) and {meta['days']} days of prices "
+          f"generated in {generated:.2f}s, saved to {args.output} in {time.perf_counter() - start - generated:.2f}s")
+
+    if args.csv:
+        write_fleet_csv(fleet, args.csv, args.settings)
+        print(f"✅ Wrote {args.csv}" + (f" and {args.settings}" if args.settings else ""))
+    if args.prices_csv:
+        pd.DataFrame({"hour": np.arange(NUM_HOURS), "price": fleet["prices"][0]}).to_csv(args.prices_csv, index=False)
+        print(f"✅ Wrote {args.prices_csv}")
@@ -2,30 +2,39 @@ import numpy as np
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_checker import check_env
 from energy_env import EnergyEnv
+from metrics import inc, span
+from numpy_policy import export_policy
+from policy_table import MAX_APPLIANCES, distill_policy
+from ppo_config import load_ppo_config
+from rollout import rollout_batch
+from schedule import Schedule
+from training_callbacks import TelemetryCallback, telemetry_requested
 
 
-def train_agent(prices, appliances, restricted_hours):
+def train_agent(prices, appliances, restricted_hours, telemetry=None):
     """
     Train the PPO reinforcement learning agent using the given price data and restricted hours.
+    With telemetry=True (default: the TRAINING_TELEMETRY environment variable), training
+    throughput is logged under logs/training (see training_callbacks).
+    Hyperparameters and timesteps come from ppo_config.
     """
     env = EnergyEnv(prices, appliances, restricted_hours)
     check_env(env, warn=True)
 
-    # Improved hyperparameters for better learning
-    model = PPO(
-        "MlpPolicy", 
-        env, 
-        learning_rate=0.0003,
-        n_steps=2048,
-        batch_size=64,
-        n_epochs=10,
-        gamma=0.99,
-        verbose=0
-    )
-    
-    # More timesteps for better learning
-    model.learn(total_timesteps=50000)
+    # Hyperparameters from the latest sweep (ppo_sweep.py), or the defaults
+    config = load_ppo_config("energy_agent")
+    model = PPO("MlpPolicy", env, verbose=0, **config["ppo"])
+
+    with span("ppo_train", agent="cost"):
+        model.learn(total_timesteps=config["total_timesteps"],
+                    callback=[TelemetryCallback(run_name="energy_agent")] if telemetry_requested(telemetry) else None)
+    inc("training_timesteps_total", model.num_timesteps, agent="cost")
     model.save("models/energy_agent")
+    # Torch-free copy of the actor for serving, see numpy_policy.NumpyPolicy
+    export_policy(model, "models/energy_agent.npz")
+    # Exhaustive (hour, status) -> action table, see policy_table.TablePolicy
+    if env.num_appliances <= MAX_APPLIANCES:
+        distill_policy(model, env.num_hours, env.num_appliances).save("models/energy_agent_table.npz")
 
     return model
 
@@ -34,41 +43,13 @@ def run_agent(model, prices, appliances, restricted_hours):
     """
     Run the trained model to generate an optimized schedule.
     """
-    env = EnergyEnv(prices, appliances, restricted_hours)
-    obs, _ = env.reset()
-    done = False
-
-    schedule = {a["name"]: [] for a in appliances}
-
-    while not done:
-        # Record the hour and remaining durations BEFORE stepping
-        current_hour = env.current_hour
-        remaining_before_step = {a["name"]: env.remaining_durations[a["name"]] for a in appliances}
-        
-        action, _ = model.predict(obs, deterministic=True)
-        obs, reward, done, _, info = env.step(action)
-
-        # Only record if appliance had remaining duration before the step
-        for i, a in enumerate(appliances):
-            if action[i] == 1 and remaining_before_step[a["name"]] > 0:
-                schedule[a["name"]].append(current_hour)
+    with span("rollout", agent="cost"):
+        result = rollout_batch(model, prices, appliances, restricted_hours)
+    schedule = Schedule(
+        [a["name"] for a in appliances],
+        [a["power"] for a in appliances],
+        result["hours"][0],
+    )
 
     # Format hours into human-readable ranges
-    readable_schedule = {}
-    for name, hours in schedule.items():
-        if not hours:
-            readable_schedule[name] = "Not scheduled"
-            continue
-
-        hours = sorted(set(hours))
-        ranges = []
-        start = prev = hours[0]
-        for h in hours[1:]:
-            if h != prev + 1:
-                ranges.append(f"{start}:00–{prev+1}:00")
-                start = h
-            prev = h
-        ranges.append(f"{start}:00–{prev+1}:00")
-        readable_schedule[name] = ", ".join(ranges)
-
-    return readable_schedule
\ No newline at end of file
+    return schedule.format_readable()
\ No newline at end of file
@@ -0,0 +1,244 @@
+import json
+import os
+import resource
+import time
+import uuid
+import torch
+from stable_baselines3.common.callbacks import BaseCallback
+
+TRAINING_LOG_DIR = "logs/training"
+
+
+def telemetry_requested(flag=None):
+    """Per-run flag if given, otherwise the TRAINING_TELEMETRY environment variable."""
+    if flag is not None:
+        return bool(flag)
+    return os.environ.get("TRAINING_TELEMETRY", "").lower() in ("1", "true", "yes")
+
+
+class ProgressCallback(BaseCallback):
+    """
+    Publishes the number of training timesteps to a progress object (the
+    training_scheduler slot's `_SlotProgress`: `timesteps` and a `cancelled`
+    event) and stops training as soon as the job is cancelled.
+    """
+
+    def __init__(self, progress):
+        super().__init__()
+        self.progress = progress
+
+    def _on_step(self):
+        self.progress.timesteps = self.num_timesteps
+        return not self.progress.cancelled.is_set()
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if os.uname().sysname == "Darwin" else peak / 2**10  # bytes on macOS, KB on Linux
+
+
+def _rss_mb():
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return _peak_rss_mb()
+
+
+class TelemetryCallback(BaseCallback):
+    """
+    Records where model.learn spends its time, one NDJSON line per PPO
+    iteration (rollout + update) plus a start and a summary line:
+
+        {"type": "iteration", "iteration", "timesteps", "wall_s", "env_s", "update_s",
+         "fps", "episodes", "ep_reward", "ep_length", "rss_mb"}
+
+    env_s is time spent collecting the rollout (env stepping and policy
+    inference), update_s the gradient update that follows it. Episode
+    statistics come from the Monitor wrapper SB3 puts around the env.
+    See summarize_training_log for the report.
+    """
+
+    def __init__(self, path=None, run_name="ppo"):
+        super().__init__()
+        if path is None:
+            log_dir = os.environ.get("TRAINING_LOG_DIR", TRAINING_LOG_DIR)
+            path = os.path.join(log_dir, f"{run_name}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.ndjson")
+        self.path = path
+        self.run_name = run_name
+        self._file = None
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def _on_training_start(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "w")
+        self._start = time.perf_counter()
+        self._rollout_start = None
+        self._rollout_end = None
+        self._iteration = 0
+        self._env_s = 0.0
+        self._episodes = []
+        self._pending = None  # last rollout, written once its update time is known
+
+        model = self.model
+        self._write({
+            "type": "start",
+            "run": self.run_name,
+            "time": time.time(),
+            "total_timesteps": getattr(model, "_total_timesteps", None),
+            "n_steps": getattr(model, "n_steps", None),
+            "batch_size": getattr(model, "batch_size", None),
+            "n_epochs": getattr(model, "n_epochs", None),
+            "learning_rate": model.learning_rate if isinstance(model.learning_rate, float) else None,
+            "gamma": getattr(model, "gamma", None),
+            "n_envs": model.n_envs,
+            "torch_threads": torch.get_num_threads(),
+            "device": str(model.device),
+        })
+
+    def _on_rollout_start(self):
+        now = time.perf_counter()
+        self._flush_iteration(now)
+        self._rollout_start = now
+
+    def _on_step(self):
+        for info in self.locals.get("infos", ()):
+            episode = info.get("episode")
+            if episode is not None:
+                self._episodes.append((episode["r"], episode["l"]))
+        return True
+
+    def _on_rollout_end(self):
+        self._rollout_end = time.perf_counter()
+        env_s = self._rollout_end - self._rollout_start
+        self._env_s += env_s
+        self._iteration += 1
+        episodes, self._episodes = self._episodes, []
+        self._pending = {
+            "type": "iteration",
+            "iteration": self._iteration,
+            "timesteps": self.num_timesteps,
+            "env_s": round(env_s, 6),
+            "episodes": len(episodes),
+            "ep_reward": round(sum(r for r, _ in episodes) / len(episodes), 4) if episodes else None,
+            "ep_length": round(sum(l for _, l in episodes) / len(episodes), 2) if episodes else None,
+        }
+
+    def _flush_iteration(self, now):
+        """Write the previous iteration now that its update (rollout end -> now) is over."""
+        if self._pending is None:
+            return
+        record, self._pending = self._pending, None
+        update_s = now - self._rollout_end
+        wall_s = now - self._start
+        record.update({
+            "update_s": round(update_s, 6),
+            "wall_s": round(wall_s, 6),
+            "fps": round(record["timesteps"] / wall_s, 1) if wall_s > 0 else None,
+            "rss_mb": round(_rss_mb(), 1),
+        })
+        self._write(record)
+
+    def _on_training_end(self):
+        now = time.perf_counter()
+        self._flush_iteration(now)
+        wall_s = now - self._start
+        self._write({
+            "type": "end",
+            "timesteps": self.num_timesteps,
+            "wall_s": round(wall_s, 6),
+            "env_s": round(self._env_s, 6),
+            "fps": round(self.num_timesteps / wall_s, 1) if wall_s > 0 else None,
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+        })
+        self._file.close()
+        self._file = None
+
+
+def read_training_log(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize_training_log(path):
+    """
+    Summary of one telemetry log: throughput, the env/update time split
+    and how fast episode reward improved per wall-clock second.
+    """
+    records = read_training_log(path)
+    start = next((r for r in records if r["type"] == "start"), {})
+    iterations = [r for r in records if r["type"] == "iteration"]
+    end = next((r for r in records if r["type"] == "end"), None)
+
+    wall_s = end["wall_s"] if end else (iterations[-1]["wall_s"] if iterations else 0.0)
+    timesteps = end["timesteps"] if end else (iterations[-1]["timesteps"] if iterations else 0)
+    env_s = sum(r["env_s"] for r in iterations)
+    update_s = sum(r["update_s"] for r in iterations)
+    rewarded = [r for r in iterations if r["ep_reward"] is not None]
+
+    summary = {
+        "path": path,
+        "run": start.get("run"),
+        "complete": end is not None,
+        "timesteps": timesteps,
+        "iterations": len(iterations),
+        "wall_s": round(wall_s, 3),
+        "fps": round(timesteps / wall_s, 1) if wall_s else None,
+        "env_share": round(env_s / (env_s + update_s), 3) if env_s + update_s else None,
+        "env_s": round(env_s, 3),
+        "update_s": round(update_s, 3),
+        "peak_rss_mb": end["peak_rss_mb"] if end else max((r["rss_mb"] for r in iterations), default=None),
+        "first_ep_reward": rewarded[0]["ep_reward"] if rewarded else None,
+        "final_ep_reward": rewarded[-1]["ep_reward"] if rewarded else None,
+        "final_ep_length": rewarded[-1]["ep_length"] if rewarded else None,
+    }
+    if len(rewarded) >= 2:
+        first, last = rewarded[0], rewarded[-1]
+        elapsed = last["wall_s"] - first["wall_s"]
+        summary["reward_gain_per_s"] = round((last["ep_reward"] - first["ep_reward"]) / elapsed, 4) if elapsed else None
+        # Wall time until the reward first got within 10% of the total improvement from its final value
+        target = last["ep_reward"] - 0.1 * abs(last["ep_reward"] - first["ep_reward"])
+        summary["wall_s_to_90pct_reward"] = next(r["wall_s"] for r in rewarded if r["ep_reward"] >= target)
+    for key in ("n_steps", "batch_size", "n_epochs", "learning_rate", "torch_threads"):
+        summary[key] = start.get(key)
+    return summary
+
+
+def format_summary(summary):
+    lines = [f"{summary['path']}  ({summary['run']}{'' if summary['complete'] else ', incomplete'})"]
+    lines.append(f"  {summary['timesteps']:,} timesteps in {summary['wall_s']:.1f}s = {summary['fps']} fps, "
+                 f"{summary['iterations']} iterations (n_steps={summary['n_steps']}, batch_size={summary['batch_size']}, "
+                 f"n_epochs={summary['n_epochs']}, threads={summary['torch_threads']})")
+    if summary["env_share"] is not None:
+        lines.append(f"  env stepping {summary['env_s']:.1f}s ({summary['env_share']:.0%}), "
+                     f"updates {summary['update_s']:.1f}s ({1 - summary['env_share']:.0%}), "
+                     f"peak RSS {summary['peak_rss_mb']} MB")
+    if summary["final_ep_reward"] is not None:
+        line = (f"  episode reward {summary['first_ep_reward']} -> {summary['final_ep_reward']} "
+                f"(length {summary['final_ep_length']})")
+        if "reward_gain_per_s" in summary:
+            line += (f", {summary['reward_gain_per_s']:+} per second, "
+                     f"90% of the gain after {summary['wall_s_to_90pct_reward']:.1f}s")
+        lines.append(line)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Summarize PPO telemetry logs")
+    parser.add_argument("logs", nargs="*", help=f"Log files (default: every log in {TRAINING_LOG_DIR})")
+    parser.add_argument("--json", action="store_true", help="Print summaries as JSON lines")
+    args = parser.parse_args()
+
+    paths = args.logs or sorted(glob.glob(os.path.join(os.environ.get("TRAINING_LOG_DIR", TRAINING_LOG_DIR), "*.ndjson")))
+    if not paths:
+        print("No training logs found.")
+    for path in paths:
+        summary = summarize_training_log(path)
+        print(json.dumps(summary) if args.json else format_summary(summary))
@@ -0,0 +1,344 @@
+"""
+Training job queue with a fixed number of concurrent slots.
+
+Every slot is a single worker process with its own CPU cores (affinity) and
+torch thread limit, so concurrent PPO trainings do not oversubscribe the
+machine: with S slots of T threads each, at most S * T cores are busy no
+matter how many users click "Optimize Schedule". Further jobs wait in a FIFO
+queue. A job submitted for a scenario that is already queued or training
+joins that job instead of starting another.
+
+    scheduler = get_scheduler()
+    job = scheduler.submit(prices, appliances, restricted_hours, preferences)
+    job.future.result()  # {"schedule": Schedule, "cost": float}, or None if cancelled
+
+Slots and threads per job default to TRAINING_SLOTS / TRAINING_THREADS from
+the environment, and training telemetry to TRAINING_TELEMETRY. Threads default to 1; slots default to the usable cores
+divided by it, at most DEFAULT_MAX_SLOTS, since every slot process keeps
+torch resident (hundreds of MB).
+"""
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import metrics
+from ppo_config import load_ppo_config
+from result_cache import scenario_key
+
+TOTAL_TIMESTEPS = load_ppo_config("energy_agent_preferences")["total_timesteps"]
+DEFAULT_MAX_SLOTS = 4
+
+# Set in each slot process by _init_slot
+_slot = {}
+
+
+def usable_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+# ----------------------------------------------------------------------
+# Slot process side
+# ----------------------------------------------------------------------
+class _SlotProgress:
+    """What training_callbacks.ProgressCallback writes to, backed by shared memory."""
+
+    def __init__(self, timesteps, cancelled):
+        self._timesteps = timesteps
+        self.cancelled = cancelled
+
+    @property
+    def timesteps(self):
+        return self._timesteps.value
+
+    @timesteps.setter
+    def timesteps(self, value):
+        self._timesteps.value = value
+
+
+def _init_slot(cores, threads, timesteps, cancelled):
+    # Thread pools are sized when torch is imported, so limit them first
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # already set in this process
+    _slot["progress"] = _SlotProgress(timesteps, cancelled)
+
+
+def _train(prices, appliances, restricted_hours, preferences, total_timesteps, profile_dir=None, telemetry=None):
+    if profile_dir is not None:
+        from profiling import profile_call
+        return profile_call(profile_dir, "rl", _train_and_run, prices, appliances, restricted_hours,
+                            preferences, total_timesteps, telemetry)
+    return _train_and_run(prices, appliances, restricted_hours, preferences, total_timesteps, telemetry)
+
+
+def _train_and_run(prices, appliances, restricted_hours, preferences, total_timesteps, telemetry=None):
+    import train_agent_with_preferences as trainer
+    from training_callbacks import ProgressCallback
+
+    progress = _slot["progress"]
+    # Jobs train side by side, so they must not all write the shared models/ files
+    model = trainer.train_agent_with_preferences(
+        prices, appliances, restricted_hours, preferences,
+        callback=ProgressCallback(progress), total_timesteps=total_timesteps, save=False, telemetry=telemetry,
+    )
+    if progress.cancelled.is_set():
+        return None
+    schedule = trainer.run_agent_with_preferences(model, prices, appliances, restricted_hours, preferences)
+    return {"schedule": schedule, "cost": schedule.cost(prices)}
+
+
+# ----------------------------------------------------------------------
+# Scheduler side
+# ----------------------------------------------------------------------
+class _Slot:
+    def __init__(self, index, cores, threads, context):
+        self.index = index
+        self.cores = cores
+        self.threads = threads
+        self.context = context
+        self.timesteps = context.Value("q", 0, lock=False)
+        self.cancelled = context.Event()
+        self.job = None
+        self.start()
+
+    def start(self):
+        """(Re)start the worker process, e.g. after it died mid-job."""
+        self.executor = ProcessPoolExecutor(
+            1, mp_context=self.context, initializer=_init_slot,
+            initargs=(self.cores, self.threads, self.timesteps, self.cancelled),
+        )
+
+
+class TrainingJob:
+    """
+    One queued or running training. Reads like jobs.TrainingProgress
+    (`timesteps`, `total_timesteps`, `stage`, `fraction`), so the UI can
+    show it directly; `future` resolves to the result or None if cancelled.
+    """
+
+    def __init__(self, key, args, total_timesteps):
+        self.key = key
+        self.args = args
+        self.total_timesteps = total_timesteps
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        self.subscribers = 1
+        self.slot = None
+        self._timesteps = 0
+        self.cancelled = threading.Event()
+        self._queue_position = None
+
+    @property
+    def timesteps(self):
+        slot = self.slot
+        return slot.timesteps.value if slot is not None else self._timesteps
+
+    @property
+    def fraction(self):
+        return min(1.0, self.timesteps / self.total_timesteps) if self.total_timesteps else 0.0
+
+    @property
+    def stage(self):
+        if self.future.done():
+            if self.future.exception() is not None:
+                return "Failed"
+            return "Cancelled" if self.future.result() is None else "Done"
+        if self.slot is None:
+            return f"Queued ({self._queue_position} ahead)" if self._queue_position else "Queued"
+        if self.timesteps == 0:
+            return "Loading AI libraries"
+        return "Training AI with your preferences"
+
+    @property
+    def wait_seconds(self):
+        end = self.started_at if self.started_at is not None else time.perf_counter()
+        return end - self.submitted_at
+
+
+class TrainingScheduler:
+    """FIFO training queue over `slots` pinned worker processes."""
+
+    def __init__(self, slots=None, threads_per_job=None, telemetry=None):
+        cores = usable_cores()
+        # None leaves it to TRAINING_TELEMETRY in the slot processes (see training_callbacks)
+        self.telemetry = telemetry
+        self.threads_per_job = threads_per_job or int(os.environ.get("TRAINING_THREADS", 1))
+        self.num_slots = (slots or int(os.environ.get("TRAINING_SLOTS", 0))
+                          or max(1, min(DEFAULT_MAX_SLOTS, len(cores) // self.threads_per_job)))
+
+        # spawn: slot processes must not inherit a forked copy of a threaded server
+        context = multiprocessing.get_context("spawn")
+        self._slots = []
+        for i in range(self.num_slots):
+            start = (i * self.threads_per_job) % len(cores)
+            slot_cores = [cores[(start + k) % len(cores)] for k in range(self.threads_per_job)]
+            self._slots.append(_Slot(i, slot_cores, self.threads_per_job, context))
+
+        self._queue = deque()
+        self._active = {}  # scenario key -> TrainingJob (queued or running)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self._waits = deque(maxlen=1000)
+
+    def submit(self, prices, appliances, restricted_hours, preferences, total_timesteps=TOTAL_TIMESTEPS,
+               profile_dir=None):
+        """
+        Queue a training (or join the identical one already queued or running).
+        With `profile_dir`, a new job is profiled into that directory (see profiling.py).
+        """
+        key = scenario_key(prices, appliances, restricted_hours, preferences, total_timesteps=total_timesteps)
+        with self._lock:
+            self.submitted += 1
+            job = self._active.get(key)
+            if job is not None and not job.cancelled.is_set():
+                job.subscribers += 1
+                self.deduplicated += 1
+                metrics.inc("training_jobs_total", outcome="deduplicated")
+                return job
+            args = (list(prices), appliances, list(restricted_hours or []), preferences, total_timesteps, profile_dir,
+                    self.telemetry)
+            job = TrainingJob(key, args, total_timesteps)
+            self._active[key] = job
+            self._queue.append(job)
+            dispatched = self._dispatch()
+        self._after_dispatch(*dispatched)
+        return job
+
+    def cancel(self, job):
+        """Drop one subscriber; the job is cancelled once nobody is waiting for it."""
+        with self._lock:
+            job.subscribers -= 1
+            if job.subscribers > 0 or job.future.done():
+                return
+            job.cancelled.set()
+            self._active.pop(job.key, None)
+            if job.slot is not None:
+                job.slot.cancelled.set()  # ProgressCallback stops training
+                return
+            self._queue.remove(job)
+            self._update_positions()
+        # Outside the lock: callers' done-callbacks run here and may call back into the scheduler
+        job.future.set_result(None)
+
+    def _dispatch(self):
+        """
+        Start queued jobs on free slots (called with the lock held). Returns
+        the (job, future) pairs started and the (job, error) pairs whose submit
+        failed, for _after_dispatch once the lock is released.
+        """
+        started, failed = [], []
+        for slot in self._slots:
+            if not self._queue:
+                break
+            if slot.job is not None:
+                continue
+            job = self._queue.popleft()
+            slot.timesteps.value = 0
+            slot.cancelled.clear()
+            job.started_at = time.perf_counter()
+            self._waits.append(job.wait_seconds)
+            try:
+                future = slot.executor.submit(_train, *job.args)
+            except Exception as e:  # e.g. BrokenProcessPool: the worker died between jobs
+                slot.start()
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+                failed.append((job, e))
+                continue
+            slot.job, job.slot = job, slot
+            started.append((job, future))
+        self._update_positions()
+        return started, failed
+
+    def _after_dispatch(self, started, failed):
+        """
+        Called without the lock: a future that is already done runs its
+        callback (_finished, which takes the lock) immediately.
+        """
+        for job, future in started:
+            future.add_done_callback(lambda done, job=job: self._finished(job, done))
+        for job, error in failed:
+            job.finished_at = time.perf_counter()
+            metrics.inc("training_jobs_total", outcome="failed")
+            job.future.set_exception(error)
+
+    def _update_positions(self):
+        for position, job in enumerate(self._queue):
+            job._queue_position = position
+
+    def _finished(self, job, done):
+        with self._lock:
+            slot = job.slot
+            job.finished_at = time.perf_counter()
+            job._timesteps = slot.timesteps.value
+            job.slot = None
+            slot.job = None
+            if isinstance(done.exception(), BrokenProcessPool):
+                slot.start()
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+            self.completed += 1
+            dispatched = self._dispatch()
+        self._after_dispatch(*dispatched)
+        error = done.exception()
+        outcome = "failed" if error is not None else "cancelled" if job.cancelled.is_set() else "done"
+        # Training itself runs in the slot process, so its metrics are recorded here
+        metrics.inc("training_jobs_total", outcome=outcome)
+        metrics.inc("training_timesteps_total", job._timesteps, agent="preferences")
+        metrics.observe("training_queue_wait_seconds", job.wait_seconds)
+        metrics.observe("stage_seconds", job.finished_at - job.started_at, stage="training_job")
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(None if job.cancelled.is_set() else done.result())
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "slots": self.num_slots,
+                "threads_per_job": self.threads_per_job,
+                "slot_cores": [slot.cores for slot in self._slots],
+                "running": sum(slot.job is not None for slot in self._slots),
+                "queue_depth": len(self._queue),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "completed": self.completed,
+                "wait_p50_s": waits[len(waits) // 2] if waits else 0.0,
+                "wait_max_s": waits[-1] if waits else 0.0,
+            }
+
+    def shutdown(self):
+        for slot in self._slots:
+            slot.cancelled.set()
+            slot.executor.shutdown(wait=True, cancel_futures=True)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler, created on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TrainingScheduler()
+        return _scheduler
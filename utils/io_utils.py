@@ -1,33 +1,218 @@
+import numpy as np
 import pandas as pd
 
-def load_appliance_power_dataset(csv_path_or_file):
+MAX_DURATION = 24  # hours in a scheduling day; also keeps durations inside int16
+
+
+def _detect_columns(columns, household_col=None):
+    """
+    Auto-detect the appliance name, power and duration columns (and the
+    optional household id column) from normalized column names.
+    """
+    if household_col is None:
+        household_col = next((c for c in columns if "household" in c or c in ("home_id", "house_id")), None)
+
+    rest = [c for c in columns if c != household_col]
+    name_col = next((c for c in rest if "appliance" in c), None)
+    power_col = next((c for c in rest if "kw" in c), None)
+    duration_col = next((c for c in rest if "hour" in c or "duration" in c), None)
+
+    if not all([name_col, power_col, duration_col]):
+        raise ValueError(f"Missing one or more required columns in file. Found: {list(columns)}")
+
+    return name_col, power_col, duration_col, household_col
+
+
+def _normalize_columns(df):
+    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
+    return df
+
+
+def _household_ids(column):
+    """
+    Household ids as str, the form the settings file is keyed by. A numeric
+    column read as float because of missing ids gives "17", not "17.0".
+    """
+    if pd.api.types.is_float_dtype(column):
+        whole = column.dropna()
+        if (whole == np.floor(whole)).all():
+            column = column.astype("Int64")
+    return column.astype("string").to_numpy(object)
+
+
+def _validate_frame(df, cols, row_offset=0):
+    """
+    Convert and validate whole columns at once.
+
+    Returns:
+        valid: DataFrame with household, name, power, duration columns
+        rejects: DataFrame with the source row number and rejection reason
+    """
+    name_col, power_col, duration_col, household_col = cols
+
+    names = df[name_col].astype("string").str.strip()
+    power = pd.to_numeric(df[power_col], errors="coerce").to_numpy(np.float64, na_value=np.nan)
+    duration = pd.to_numeric(df[duration_col], errors="coerce").to_numpy(np.float64, na_value=np.nan)
+    missing_name = names.isna().to_numpy() | (names == "").fillna(False).to_numpy(bool)
+
+    # First failing check wins, in the order below
+    checks = [
+        ("missing name", missing_name),
+        ("invalid power", ~np.isfinite(power)),
+        ("negative power", power < 0),
+        ("invalid duration", ~np.isfinite(duration)),
+        ("negative duration", duration < 0),
+        ("duration too large", duration > MAX_DURATION),
+    ]
+    if household_col is not None:
+        checks.insert(0, ("missing household", df[household_col].isna().to_numpy()))
+
+    reason = np.select([failed for _, failed in checks], [label for label, _ in checks], default="")
+    bad = reason != ""
+
+    rejects = pd.DataFrame({
+        "row": np.flatnonzero(bad) + row_offset,
+        "reason": reason[bad],
+    })
+
+    good = ~bad
+    valid = pd.DataFrame({
+        "household": _household_ids(df[household_col])[good] if household_col else "default",
+        "name": names.to_numpy(object)[good],
+        "power": power[good].astype(np.float32),
+        "duration": np.rint(duration[good]).astype(np.int16),
+    })
+    return valid, rejects
+
+
+def summarize_rejects(rejects, examples=5):
+    """Collapse per-row rejects into one line per reason with a few example row numbers."""
+    if rejects is None or rejects.empty:
+        return pd.DataFrame(columns=["reason", "count", "example_rows"])
+    return (
+        rejects.groupby("reason", sort=False)["row"]
+        .agg(count="size", example_rows=lambda rows: rows.head(examples).tolist())
+        .reset_index()
+        .sort_values("count", ascending=False, ignore_index=True)
+    )
+
+
+def load_appliance_power_dataset(csv_path_or_file, return_rejects=False):
     """
     Loads your appliance power dataset and converts it to the optimizer format:
     [
         {"name": "Washer", "power": 0.5, "duration": 2},
         ...
     ]
+
+    Invalid rows are skipped and reported once as a summary table. Pass
+    `return_rejects=True` to get that table back alongside the appliances.
     """
 
-    df = pd.read_csv(csv_path_or_file)
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
+    df = _normalize_columns(pd.read_csv(csv_path_or_file))
+    cols = _detect_columns(df.columns)
+    valid, rejects = _validate_frame(df, cols)
 
-    # Normalize and auto-detect relevant columns
-    name_col = next((c for c in df.columns if "appliance" in c), None)
-    power_col = next((c for c in df.columns if "kw" in c), None)
-    duration_col = next((c for c in df.columns if "hour" in c or "duration" in c), None)
+    summary = summarize_rejects(rejects)
+    if not summary.empty:
+        print(f"Skipped {len(rejects)} invalid rows:\n{summary.to_string(index=False)}")
 
-    if not all([name_col, power_col, duration_col]):
-        raise ValueError(f"Missing one or more required columns in file. Found: {df.columns.tolist()}")
-
-    appliances = []
-    for _, row in df.iterrows():
-        try:
-            appliances.append({
-                "name": str(row[name_col]).strip(),
-                "power": float(row[power_col]),
-                "duration": int(round(float(row[duration_col]))),
-            })
-        except Exception as e:
-            print(f"Skipping invalid row: {row.to_dict()}, error: {e}")
+    appliances = [
+        {"name": n, "power": float(p), "duration": int(d)}
+        for n, p, d in zip(valid["name"], valid["power"], valid["duration"])
+    ]
+    if return_rejects:
+        return appliances, summary
     return appliances
+
+
+class FleetDatasetReader:
+    """
+    Streams a fleet appliance file (one row per household appliance) in chunks.
+
+    `iter_chunks` yields compact CSR-style arrays per chunk:
+        households: household ids, one per household in the chunk
+        offsets: int64 array, household i owns rows offsets[i]:offsets[i+1]
+        names, power (float32), duration (int16): per-appliance arrays
+
+    Iterating the reader itself yields one dict per household with
+    `household`, `names`, `power` and `duration` arrays.
+
+    Rows of one household are expected to be contiguous (the file grouped or
+    sorted by household id); a household split across chunk boundaries is
+    carried over and emitted whole.
+    """
+
+    def __init__(self, path, chunksize=250_000, household_col=None):
+        self.path = path
+        self.chunksize = chunksize
+        self.household_col = household_col
+        self.rows_read = 0
+        self._rejects = []
+
+    def iter_chunks(self):
+        self.rows_read = 0
+        self._rejects = []
+        carry = None
+        cols = None
+
+        for df in pd.read_csv(self.path, chunksize=self.chunksize):
+            df = _normalize_columns(df)
+            if cols is None:
+                cols = _detect_columns(df.columns, self.household_col)
+            valid, rejects = _validate_frame(df, cols, row_offset=self.rows_read)
+            self.rows_read += len(df)
+            if not rejects.empty:
+                self._rejects.append(rejects)
+
+            if carry is not None:
+                valid = pd.concat([carry, valid], ignore_index=True)
+            if valid.empty:
+                carry = None
+                continue
+
+            # Hold back the last household; it may continue in the next chunk
+            ids = valid["household"].to_numpy()
+            others = np.flatnonzero(ids != ids[-1])
+            split = others[-1] + 1 if others.size else 0
+            if split == 0:
+                carry = valid
+                continue
+            carry = valid.iloc[split:].reset_index(drop=True)
+            yield self._pack(valid.iloc[:split])
+
+        if carry is not None and not carry.empty:
+            yield self._pack(carry)
+
+    @staticmethod
+    def _pack(valid):
+        ids = valid["household"].to_numpy()
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        return {
+            "households": ids[starts],
+            "offsets": np.append(starts, len(ids)).astype(np.int64),
+            "names": valid["name"].to_numpy(object),
+            "power": valid["power"].to_numpy(np.float32),
+            "duration": valid["duration"].to_numpy(np.int16),
+        }
+
+    def __iter__(self):
+        for chunk in self.iter_chunks():
+            offsets = chunk["offsets"]
+            for i, household in enumerate(chunk["households"]):
+                lo, hi = offsets[i], offsets[i + 1]
+                yield {
+                    "household": household,
+                    "names": chunk["names"][lo:hi],
+                    "power": chunk["power"][lo:hi],
+                    "duration": chunk["duration"][lo:hi],
+                }
+
+    @property
+    def rows_rejected(self):
+        return sum(len(r) for r in self._rejects)
+
+    def reject_summary(self, examples=5):
+        """Rejected rows seen so far, one line per reason."""
+        rejects = pd.concat(self._rejects, ignore_index=True) if self._rejects else None
+        return summarize_rejects(rejects, examples)
@@ -0,0 +1,37 @@
+# utils/lazy_imports.py
+# The optimizer pulls in pulp and the training modules pull in stable-baselines3
+# and torch, which together take seconds to import. The app loads them on first
+# use instead of at the top of the script, and preloads them in a background
+# thread once the first page has rendered.
+import importlib
+import threading
+
+HEAVY_MODULES = ("optimizer", "train_agent_with_preferences")
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+
+def load(name):
+    """Import a module on first use (waits for a warm-up import already in progress)."""
+    return importlib.import_module(name)
+
+
+def _import_all(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"⚠️ Background import of {name} failed: {e}")
+
+
+def warm_up(modules=HEAVY_MODULES):
+    """Preload modules in a daemon thread, at most once per process."""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(
+                target=_import_all, args=(tuple(modules),), name="import-warmup", daemon=True
+            )
+            _warmup_thread.start()
+    return _warmup_thread